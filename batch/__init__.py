@@ -0,0 +1 @@
+"""Headless batch runs of the optimizer. Run modules from the repository root."""
@@ -0,0 +1,284 @@
+"""Headless batch optimization of many maps and optimizer settings.
+
+A manifest is a JSON file listing maps and ChiOptimizer settings. Every map
+is optimized with every settings entry, jobs are distributed over a process
+pool and the result of every job is appended to a JSONL file as soon as it
+finishes:
+
+    {
+        "defaults": {"num_iterations": 20, "radius": 0.2},
+        "maps": [
+            {"poly_id": 3},
+            {"name": "big", "generate": {"num_vertices": 40, "num_holes": 25,
+                                         "num_cells": 200, "seed": 0, "radius": 28}},
+            {"name": "site_a", "snapshot": "maps/site_a.snap"}
+        ],
+        "settings": [
+            {"name": "default"},
+            {"name": "scheduled", "scheduled": true}
+        ]
+    }
+
+Maps are bundled maps by poly_id, seeded maps of utils.map_generator or
+snapshots written by Decomposition.save. Settings entries override the
+defaults. Job ids are "<map name>/<settings name>"; the names default to
+map_<poly_id>, the snapshot path and the list index.
+
+Rerunning with --resume skips every job that already has a successful result
+line in the output, failed and missing jobs are run again.
+
+Usage:
+    python -m batch.runner manifest.json [--output results.jsonl] [--workers 8] [--resume]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import traceback
+from multiprocessing import Pool
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Set
+
+from shapely.geometry import Polygon
+
+from decomposition import Decomposition
+from optimizer import ChiOptimizer
+from utils.map_generator import generate_decomposition
+from utils.polygons import decomposition_generator
+
+
+def map_name(spec: Dict, index: int) -> str:
+    """Name of a map of the manifest, see the module docstring."""
+    if 'name' in spec:
+        return spec['name']
+    if 'poly_id' in spec:
+        return "map_{}".format(spec['poly_id'])
+    if 'snapshot' in spec:
+        return spec['snapshot']
+    return "map{}".format(index)
+
+
+def load_map(spec: Dict) -> Optional[Decomposition]:
+    """Builds the decomposition of a map of the manifest.
+
+    Returns:
+        Decomposition or None if the map could not be built.
+    """
+    if 'poly_id' in spec:
+        return decomposition_generator(spec['poly_id'])
+    if 'generate' in spec:
+        return generate_decomposition(**spec['generate'])
+    if 'snapshot' in spec:
+        return Decomposition.load(spec['snapshot'])
+    return None
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """Reads a manifest and expands it into jobs.
+
+    Returns:
+        list of jobs, dicts of a unique job_id, the map name and spec and the
+        full optimizer settings.
+    """
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    return expand_jobs(manifest)
+
+
+def expand_jobs(manifest: Dict) -> List[Dict]:
+    """Jobs of every map with every settings entry of a manifest, see load_manifest."""
+    defaults = manifest.get('defaults', {})
+    jobs = []
+    for map_index, map_spec in enumerate(manifest['maps']):
+        for settings_index, settings in enumerate(manifest.get('settings', [{}])):
+            settings = dict(settings)
+            settings_name = settings.pop('name', str(settings_index))
+            name = map_name(map_spec, map_index)
+            jobs.append({
+                'job_id': "{}/{}".format(name, settings_name),
+                'map': name,
+                'map_spec': map_spec,
+                'settings': dict(defaults, **settings),
+            })
+
+    job_ids = [job['job_id'] for job in jobs]
+    duplicates = sorted({job_id for job_id in job_ids if job_ids.count(job_id) > 1})
+    if duplicates:
+        raise ValueError("Duplicate job ids in manifest: {}".format(duplicates))
+    return jobs
+
+
+def completed_jobs(path: str) -> Set[str]:
+    """Ids of the jobs with a successful result in a results file.
+
+    Lines that are not valid JSON, e.g. the last line of an interrupted run,
+    are ignored.
+    """
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+
+    with open(path) as results_file:
+        for line in results_file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get('status') == 'ok':
+                completed.add(result['job_id'])
+    return completed
+
+
+def cell_rings(polygon: Polygon) -> List:
+    """Cell as [exterior, holes] with rings as lists of [x, y]."""
+    return [[list(vertex) for vertex in polygon.exterior.coords],
+            [[list(vertex) for vertex in interior.coords] for interior in polygon.interiors]]
+
+
+def run_job(job: Dict) -> Dict:
+    """Optimizes the map of a job, failures are reported in the result instead of raised.
+
+    Returns:
+        dict with the job id, map and settings, 'status' 'ok' or 'error',
+        and on success the original and new costs, run statistics, timings
+        and the final cells and robot sites.
+    """
+    result = {'job_id': job['job_id'], 'map': job['map'], 'settings': job['settings']}
+    start = perf_counter()
+
+    try:
+        decomposition = load_map(job['map_spec'])
+        if decomposition is None:
+            return dict(result, status='error', error="Map could not be built.")
+        load_seconds = perf_counter() - start
+
+        optimizer = ChiOptimizer(**job['settings'])
+        old_costs, new_costs = optimizer.run_iterations(decomposition)
+
+        result.update({
+            'status': 'ok',
+            'original_costs': old_costs,
+            'new_costs': new_costs,
+            'initial_max_chi': optimizer.run_stats['initial_max_chi'],
+            'final_max_chi': optimizer.run_stats['final_max_chi'],
+            'iterations': optimizer.run_stats['iterations'],
+            'stop_reason': optimizer.run_stats['stop_reason'],
+            'max_chi_history': optimizer.run_stats['max_chi_history'],
+            'seconds': {'load': load_seconds,
+                        'optimize': optimizer.run_stats['seconds'],
+                        'total': perf_counter() - start},
+            'cells': {cell_id: cell_rings(cell) for cell_id, cell, _ in decomposition.items()},
+            'robot_sites': {cell_id: list(site.coords[0])
+                            for cell_id, _, site in decomposition.items()},
+        })
+    except Exception:  # pylint: disable=broad-except
+        # One bad map or setting must not take the whole batch down.
+        result.update(status='error', error=traceback.format_exc())
+
+    return result
+
+
+def _init_worker(verbose: bool):
+    """Pool initializer, silences the optimizer's logs unless verbose."""
+    if not verbose:
+        logging.disable(logging.WARNING)
+
+
+def run_batch(jobs: List[Dict],
+              output: str,
+              num_workers: int = 0,
+              resume: bool = False,
+              verbose: bool = False) -> Dict[str, int]:
+    """Runs jobs and appends one JSON line per finished job to the output.
+
+    Args:
+        jobs (List): Jobs as returned by load_manifest.
+        output (str): JSONL results file. Replaced unless resuming.
+        num_workers (int): Worker processes, 0 or 1 runs the jobs in this
+            process. Workers can not start pools of their own, so the
+            num_workers setting of the jobs is only honoured when running
+            serially.
+        resume (bool): Skip the jobs already completed in the output.
+        verbose (bool): Keep the optimizer's logs.
+
+    Returns:
+        dict counting jobs that succeeded, failed and were skipped.
+    """
+    skip = completed_jobs(output) if resume else set()
+    pending = [job for job in jobs if job['job_id'] not in skip]
+    if num_workers > 1:
+        pending = [dict(job, settings=dict(job['settings'], num_workers=0)) for job in pending]
+
+    counts = {'ok': 0, 'error': 0, 'skipped': len(jobs) - len(pending)}
+    print("Running %d jobs, skipping %d completed." % (len(pending), counts['skipped']))
+
+    mode = 'a' if resume else 'w'
+    # A line cut short by an interrupted run must not swallow the next result.
+    if resume and os.path.exists(output) and os.path.getsize(output) > 0:
+        with open(output, 'rb') as results_file:
+            results_file.seek(-1, os.SEEK_END)
+            needs_newline = results_file.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    with open(output, mode) as results_file:
+        if needs_newline:
+            results_file.write('\n')
+
+        for result in _results(pending, num_workers, verbose):
+            results_file.write(json.dumps(result) + '\n')
+            results_file.flush()
+
+            counts[result['status']] += 1
+            if result['status'] == 'ok':
+                print("%-40s max chi %9.2f -> %9.2f  %.2fs" % (
+                    result['job_id'], result['initial_max_chi'], result['final_max_chi'],
+                    result['seconds']['total']))
+            else:
+                print("%-40s failed: %s" % (result['job_id'],
+                                            result['error'].strip().split('\n')[-1]))
+
+    return counts
+
+
+def _results(jobs: List[Dict], num_workers: int, verbose: bool) -> Iterator[Dict]:
+    """Results of the jobs in the order they finish."""
+    if num_workers <= 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+
+    with Pool(processes=num_workers, initializer=_init_worker, initargs=(verbose,)) as pool:
+        yield from pool.imap_unordered(run_job, jobs, chunksize=1)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('manifest', help="JSON manifest of maps and optimizer settings.")
+    parser.add_argument('--output', default='batch_results.jsonl',
+                        help="JSONL file to write results to.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes, 0 runs jobs in this process.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip jobs already completed in the output.")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Keep the optimizer's logs.")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    jobs = load_manifest(args.manifest)
+
+    counts = run_batch(jobs, args.output, num_workers=args.workers, resume=args.resume,
+                       verbose=args.verbose)
+    print("{ok} succeeded, {error} failed, {skipped} skipped. Results in {output}".format(
+        output=args.output, **counts))
+
+    return 0 if counts['error'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1 @@
+"""Benchmarks of the planner's hot paths. Run modules from the repository root."""
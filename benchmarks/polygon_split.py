@@ -0,0 +1,62 @@
+"""Benchmark of polygon_split against PolygonSplitter on the bundled maps.
+
+Usage:
+    python -m benchmarks.polygon_split [num_samples]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+from shapely.geometry import LineString
+
+from optimizer.cut_candidates import generate_cut_candidates, sample_boundary
+from utils.polygons import decomposition_generator
+from utils.polygon_split import polygon_split, PolygonSplitter
+
+
+NUM_POLY_IDS = 11
+
+
+def union_polygons(decomposition):
+    """Unions of adjacent cells, the polygons the optimizer splits."""
+    for cell_id, neighbors in decomposition.adjacency.items():
+        for neighbor_id in neighbors:
+            if neighbor_id > cell_id:
+                union = decomposition[cell_id][0].union(decomposition[neighbor_id][0])
+                if union.geom_type == 'Polygon':
+                    yield union
+
+
+def benchmark(num_samples: int = 50):
+    """Splits every union polygon of every map along all its cut candidates."""
+    print("%4s %6s %8s %10s %10s %8s" % ("map", "unions", "cuts", "geos [s]", "coords [s]",
+                                          "speedup"))
+    for poly_id in range(NUM_POLY_IDS):
+        polygons = list(union_polygons(decomposition_generator(poly_id)))
+        num_cuts = 0
+        geos_time = coords_time = 0.
+
+        for polygon in polygons:
+            cuts, _ = generate_cut_candidates(*sample_boundary(polygon.exterior, num_samples))
+            num_cuts += len(cuts)
+
+            start = perf_counter()
+            expected = [polygon_split(polygon, LineString(cut)) for cut in cuts]
+            geos_time += perf_counter() - start
+
+            start = perf_counter()
+            result = PolygonSplitter(polygon).split_chords(cuts)
+            coords_time += perf_counter() - start
+
+            for split, expected_split in zip(result, expected):
+                assert (split is None) == (expected_split is None)
+                if expected_split is not None:
+                    assert np.isclose(sum(piece.area for piece in split),
+                                      sum(piece.area for piece in expected_split))
+
+        print("%4d %6d %8d %10.3f %10.3f %7.1fx" % (poly_id, len(polygons), num_cuts, geos_time,
+                                                   coords_time, geos_time / max(coords_time, 1e-9)))
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
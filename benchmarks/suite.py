@@ -0,0 +1,271 @@
+"""Benchmark suite over the bundled maps and procedurally generated large maps.
+
+Every map is run through compute_adjacency, compute_chi on all cells,
+polygon_split and PolygonSplitter on the cut candidates of adjacent cell
+pairs, and finally ChiOptimizer.run_iterations. Wall-clock time, peak
+memory and the max chi before and after optimization are written to a JSON
+file, so results of different commits can be compared side by side. The
+file is rewritten after every map, so a map that fails leaves the results
+of the maps before it. Cuts accepted by only one of the two split stages
+are counted as split_mismatches.
+
+Peak memory is measured with tracemalloc in a separate run of every stage,
+so tracing does not distort the timings. It only covers allocations made by
+Python, not the ones made inside GEOS.
+
+Usage:
+    python -m benchmarks.suite [--output results.json] [--iterations 3] [--quick]
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter, strftime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import shapely
+from shapely.geometry import LineString
+
+from decomposition import Decomposition, compute_adjacency
+from metrics.chi import compute_chi
+from optimizer import ChiOptimizer
+from optimizer.cut_candidates import generate_cut_candidates
+from utils.boundary import Boundary
+from utils.map_generator import generate_decomposition
+from utils.polygons import decomposition_generator
+from utils.polygon_split import polygon_split, PolygonSplitter
+
+
+NUM_POLY_IDS = 11
+
+# (number of exterior vertices, number of holes, number of cells) of the generated maps.
+GENERATED_SIZES = [(12, 0, 10), (20, 5, 50), (30, 10, 100), (40, 25, 200), (60, 50, 500)]
+QUICK_GENERATED_SIZES = GENERATED_SIZES[:2]
+SEED = 0
+
+RADIUS = 0.2
+LINEAR_PENALTY = 1.0
+ANGULAR_PENALTY = 100*1.0/360
+
+
+def measure(func: Callable, trace_memory: bool = True) -> Tuple[object, Dict[str, float]]:
+    """Runs func once timed and, if requested, once more under tracemalloc.
+
+    Args:
+        func (Callable): Stage to measure, called without arguments. Must be
+            repeatable if trace_memory is set.
+        trace_memory (bool): Measure peak memory in a second run.
+
+    Returns:
+        (result of the timed run, {'seconds': ..., 'peak_memory_bytes': ...})
+    """
+    start = perf_counter()
+    result = func()
+    stats = {'seconds': perf_counter() - start}
+
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        stats['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, stats
+
+
+def scenarios(quick: bool = False) -> Iterator[Tuple[str, Callable[[], Decomposition]]]:
+    """Names and factories of all benchmarked maps."""
+    for poly_id in range(NUM_POLY_IDS):
+        yield "map_%d" % poly_id, lambda poly_id=poly_id: decomposition_generator(poly_id)
+
+    # Scaling the map with the number of cells keeps cells about as large as
+    # the ones of the bundled maps.
+    for num_vertices, num_holes, num_cells in QUICK_GENERATED_SIZES if quick else GENERATED_SIZES:
+        yield ("voronoi_%d_cells_%d_holes" % (num_cells, num_holes),
+               lambda num_vertices=num_vertices, num_holes=num_holes, num_cells=num_cells:
+               generate_decomposition(num_vertices, num_holes, num_cells, 'voronoi',
+                                      seed=SEED, radius=2*num_cells**0.5))
+
+
+def adjacent_unions(decomposition: Decomposition, max_unions: int) -> List:
+    """Unions of up to max_unions pairs of adjacent cells, the polygons the optimizer splits."""
+    unions = []
+    for cell_id in sorted(decomposition.adjacency):
+        for neighbor_id in decomposition.neighbors(cell_id):
+            if neighbor_id <= cell_id:
+                continue
+            union = decomposition[cell_id][0].union(decomposition[neighbor_id][0])
+            if union.geom_type == 'Polygon':
+                unions.append(union)
+            if len(unions) == max_unions:
+                return unions
+    return unions
+
+
+def max_chi(costs: List[Tuple[int, float]]) -> Optional[float]:
+    """Largest cost of sorted (cell id, chi) pairs."""
+    return costs[0][1] if costs else None
+
+
+def benchmark_map(factory: Callable[[], Decomposition],
+                  iterations: int,
+                  num_samples: int,
+                  max_unions: int,
+                  trace_memory: bool) -> Dict:
+    """Runs all stages on one map.
+
+    Args:
+        factory (Callable): Builds a fresh decomposition of the map.
+        iterations (int): Number of reoptimization iterations.
+        num_samples (int): Number of samples along the boundary of a pair of cells.
+        max_unions (int): Number of adjacent cell pairs to split in the split stages.
+        trace_memory (bool): Measure peak memory of every stage.
+
+    Returns:
+        dict of per stage statistics and map properties.
+    """
+    decomposition = factory()
+    cells = [(cell, site) for _, cell, site in decomposition.items()]
+    unions = adjacent_unions(decomposition, max_unions)
+    cuts = [generate_cut_candidates(*Boundary(union.exterior).uniform(num_samples))[0]
+            for union in unions]
+
+    stages = {}
+    _, stages['compute_adjacency'] = measure(
+        lambda: compute_adjacency(decomposition), trace_memory)
+    _, stages['compute_chi'] = measure(
+        lambda: [compute_chi(cell, site, RADIUS, LINEAR_PENALTY, ANGULAR_PENALTY)
+                 for cell, site in cells], trace_memory)
+    expected, stages['polygon_split'] = measure(
+        lambda: [polygon_split(union, LineString(cut))
+                 for union, union_cuts in zip(unions, cuts) for cut in union_cuts], trace_memory)
+    splits, stages['polygon_splitter'] = measure(
+        lambda: [split for union, union_cuts in zip(unions, cuts)
+                 for split in PolygonSplitter(union).split_chords(union_cuts)], trace_memory)
+
+    optimizer = ChiOptimizer(num_iterations=iterations,
+                             radius=RADIUS,
+                             lin_penalty=LINEAR_PENALTY,
+                             ang_penalty=ANGULAR_PENALTY,
+                             num_samples=num_samples)
+
+    def optimize():
+        optimizer.cost_func.clear()
+        return optimizer.run_iterations(factory())
+
+    (old_costs, new_costs), stages['run_iterations'] = measure(optimize, trace_memory)
+
+    return {
+        'num_cells': len(cells),
+        'num_holes': len(decomposition.polygon.interiors),
+        'num_vertices': len(decomposition.polygon.exterior.coords) - 1,
+        'num_unions': len(unions),
+        'num_cuts': sum(len(union_cuts) for union_cuts in cuts),
+        'split_mismatches': sum((split is None) != (expected_split is None)
+                                for split, expected_split in zip(splits, expected)),
+        'initial_max_chi': max_chi(old_costs),
+        'final_max_chi': max_chi(new_costs),
+        'iterations': optimizer.run_stats['iterations'],
+        'stop_reason': optimizer.run_stats['stop_reason'],
+        'stages': stages,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit hash of the working tree, None outside of a git checkout."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(iterations: int = 3,
+              num_samples: int = 20,
+              max_unions: int = 10,
+              quick: bool = False,
+              trace_memory: bool = True,
+              output: Optional[str] = None) -> Dict:
+    """Benchmarks every scenario and collects the results.
+
+    Args:
+        output (str): JSON file rewritten with the results so far after every map.
+
+    Returns:
+        dict with run metadata under 'meta' and per map results under 'maps'.
+    """
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'date': strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'shapely': shapely.__version__,
+            'iterations': iterations,
+            'num_samples': num_samples,
+            'max_unions': max_unions,
+            'seed': SEED,
+            'radius': RADIUS,
+            'lin_penalty': LINEAR_PENALTY,
+            'ang_penalty': ANGULAR_PENALTY,
+        },
+        'maps': {},
+    }
+
+    for name, factory in scenarios(quick):
+        result = benchmark_map(factory, iterations, num_samples, max_unions, trace_memory)
+        results['maps'][name] = result
+        if output is not None:
+            write_results(output, results)
+
+        print("%-28s %4d cells %3d holes  max chi %9.2f -> %9.2f  mismatches %d  %s" % (
+            name, result['num_cells'], result['num_holes'], result['initial_max_chi'],
+            result['final_max_chi'], result['split_mismatches'],
+            "  ".join("%s %.3fs" % (stage, stats['seconds'])
+                      for stage, stats in result['stages'].items())))
+
+    return results
+
+
+def write_results(path: str, results: Dict):
+    """Writes results as JSON, replacing the file."""
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="JSON file to write results to.")
+    parser.add_argument('--iterations', type=int, default=3,
+                        help="Reoptimization iterations per map.")
+    parser.add_argument('--num-samples', type=int, default=20,
+                        help="Samples along the boundary of a pair of cells.")
+    parser.add_argument('--max-unions', type=int, default=10,
+                        help="Adjacent cell pairs split per map in the split stages.")
+    parser.add_argument('--quick', action='store_true',
+                        help="Only run the two smallest generated maps.")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the tracemalloc runs.")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Keep the optimizer's logs.")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    results = run_suite(iterations=args.iterations,
+                        num_samples=args.num_samples,
+                        max_unions=args.max_unions,
+                        quick=args.quick,
+                        trace_memory=not args.no_memory,
+                        output=args.output)
+    write_results(args.output, results)
+
+    print("Results written to %s" % args.output)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
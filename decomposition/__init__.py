@@ -1,2 +1,4 @@
 from .decomposition import Decomposition
 from .decomposition_processing import compute_adjacency
+from .cell_store import CellStore
+from .spatial_index import CellIndex
@@ -0,0 +1,270 @@
+"""Compact storage of cell polygons in one coordinate buffer."""
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from shapely.geometry import Polygon
+
+from log_utils import get_logger
+
+
+# Configure logging properties for this module
+logger = get_logger("cell_store")
+
+class CellStore(MutableMapping):
+    """Mapping from cell id to polygon backed by contiguous arrays.
+
+    The vertices of all rings of all cells live in a single float64 buffer of
+    shape (num_coords, 2). Every ring is a (start, stop) row of an offset
+    array, and every cell points to a run of consecutive rings, exterior
+    first. Rings are stored without their closing vertex.
+
+    Replacing a cell appends its new rings, the old ones become garbage until
+    the buffer is repacked. Shapely polygons are only built when a cell is
+    read and are then cached, optionally only the most recently read ones.
+    Dropping the cache with release leaves the buffer as the only copy.
+    """
+    __slots__ = (
+        'coords',
+        'num_coords',
+        'ring_bounds',
+        'num_rings',
+        'cell_rings',
+        'cache_size',
+        '_cache',
+    )
+
+    def __init__(self, cache_size: Optional[int] = None):
+        """
+        Args:
+            cache_size (int): Number of materialized polygons to keep, None keeps
+                all of them. Keep it above the number of cells whenever a
+                spatial index is built over the store, as builds read every cell.
+        """
+        self.coords = np.empty((64, 2), dtype=np.float64)
+        self.num_coords = 0
+        self.ring_bounds = np.empty((16, 2), dtype=np.int64)
+        self.num_rings = 0
+        # Cell id -> (index of its first ring, number of rings).
+        self.cell_rings: Dict[int, Tuple[int, int]] = {}
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+
+    @classmethod
+    def from_arrays(cls, coords: np.ndarray, ring_bounds: np.ndarray, cell_ids: np.ndarray,
+                    num_rings: np.ndarray, cache_size: Optional[int] = None
+                    ) -> Optional['CellStore']:
+        """Store over existing buffers, for instance the arrays of a snapshot.
+
+        The buffers are used as they are, memory-mapped ones stay mapped until
+        the next cell is stored. Every cell owns the next run of rings, in the
+        order of cell_ids.
+
+        Args:
+            coords (np.ndarray): Vertices of all rings, of shape (N, 2).
+            ring_bounds (np.ndarray): (start, stop) row into coords per ring.
+            cell_ids (np.ndarray): Ids of the cells.
+            num_rings (np.ndarray): Number of rings of every cell, exterior first.
+            cache_size (int): See __init__.
+
+        Returns:
+            CellStore or None if the arrays do not describe a set of cells.
+        """
+        cell_ids = np.asarray(cell_ids)
+        num_rings = np.asarray(num_rings)
+
+        error = None
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            error = "coordinates are not an array of points"
+        elif ring_bounds.ndim != 2 or ring_bounds.shape[1] != 2:
+            error = "ring bounds are not (start, stop) rows"
+        elif cell_ids.ndim != 1 or cell_ids.shape != num_rings.shape:
+            error = "every cell needs one ring count"
+        elif len(np.unique(cell_ids)) != len(cell_ids):
+            error = "cell ids are repeated"
+        elif (num_rings < 1).any() or num_rings.sum() != len(ring_bounds):
+            error = "ring counts do not partition the rings"
+        elif len(ring_bounds) and ((ring_bounds[:, 0] < 0).any() or
+                                   (ring_bounds[:, 1] > len(coords)).any() or
+                                   (ring_bounds[:, 1] - ring_bounds[:, 0] < 3).any()):
+            error = "rings are out of the coordinates or have less than 3 vertices"
+        if error is not None:
+            logger.warning("Invalid cell arrays: %s", error)
+            return None
+
+        store = cls(cache_size)
+        store.coords = coords
+        store.num_coords = len(coords)
+        store.ring_bounds = ring_bounds
+        store.num_rings = len(ring_bounds)
+
+        first_rings = np.cumsum(num_rings) - num_rings
+        store.cell_rings = dict(zip(cell_ids.tolist(),
+                                    zip(first_rings.tolist(), num_rings.tolist())))
+        return store
+
+    @staticmethod
+    def polygon_rings(cell: Union[Polygon, List]) -> List[np.ndarray]:
+        """Open rings of a polygon or of a cell in canonical form, exterior first.
+
+        These are the rings a cell is stored as, see rings for the ones of a
+        stored cell.
+        """
+        if isinstance(cell, Polygon):
+            rings = [np.asarray(cell.exterior.coords)[:-1]]
+            rings.extend(np.asarray(interior.coords)[:-1] for interior in cell.interiors)
+            return rings
+
+        exterior, holes = cell
+        rings = [np.asarray(ring, dtype=np.float64).reshape(-1, 2) for ring in [exterior] + holes]
+        # Canonical rings may repeat their first vertex at the end.
+        return [ring[:-1] if len(ring) > 1 and (ring[0] == ring[-1]).all() else ring
+                for ring in rings]
+
+    def _reserve(self, num_coords: int, num_rings: int):
+        """Grows the buffers geometrically to fit that many more coordinates and rings."""
+        if self.num_coords + num_coords > len(self.coords):
+            size = max(2 * len(self.coords), self.num_coords + num_coords)
+            self.coords = np.resize(self.coords, (size, 2))
+        if self.num_rings + num_rings > len(self.ring_bounds):
+            size = max(2 * len(self.ring_bounds), self.num_rings + num_rings)
+            self.ring_bounds = np.resize(self.ring_bounds, (size, 2))
+
+    def __setitem__(self, cell_id: int, cell: Union[Polygon, List]):
+        """Stores a cell given as a polygon or in canonical form."""
+        rings = self.polygon_rings(cell)
+        self._reserve(sum(len(ring) for ring in rings), len(rings))
+
+        first_ring = self.num_rings
+        for ring in rings:
+            stop = self.num_coords + len(ring)
+            self.coords[self.num_coords:stop] = ring
+            self.ring_bounds[self.num_rings] = (self.num_coords, stop)
+            self.num_coords = stop
+            self.num_rings += 1
+
+        self.cell_rings[cell_id] = (first_ring, len(rings))
+        self._cache.pop(cell_id, None)
+        if isinstance(cell, Polygon):
+            self._remember(cell_id, cell)
+
+    def __getitem__(self, cell_id: int) -> Polygon:
+        """Polygon of a cell, built from the buffer unless it is cached."""
+        try:
+            polygon = self._cache[cell_id]
+        except KeyError:
+            pass
+        else:
+            self._cache.move_to_end(cell_id)
+            return polygon
+
+        rings = self.rings(cell_id)
+        polygon = Polygon(rings[0], rings[1:])
+        self._remember(cell_id, polygon)
+        return polygon
+
+    def _remember(self, cell_id: int, polygon: Polygon):
+        if self.cache_size == 0:
+            return
+        self._cache[cell_id] = polygon
+        if self.cache_size is not None and len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def release(self):
+        """Drops all materialized polygons."""
+        self._cache.clear()
+
+    def __delitem__(self, cell_id: int):
+        del self.cell_rings[cell_id]
+        self._cache.pop(cell_id, None)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cell_rings)
+
+    def __len__(self) -> int:
+        return len(self.cell_rings)
+
+    def __contains__(self, cell_id) -> bool:
+        return cell_id in self.cell_rings
+
+    def copy(self) -> 'CellStore':
+        """Copy sharing the buffers, cells later added to either one do not show in the other.
+
+        Stored rings are never written again. Both stores give up the spare
+        capacity of the shared buffers, so the next cell stored in either one
+        reallocates instead of writing where the other would.
+        """
+        self.coords = self.coords[:self.num_coords]
+        self.ring_bounds = self.ring_bounds[:self.num_rings]
+
+        store = CellStore(self.cache_size)
+        store.coords = self.coords
+        store.num_coords = self.num_coords
+        store.ring_bounds = self.ring_bounds
+        store.num_rings = self.num_rings
+        store.cell_rings = dict(self.cell_rings)
+        store._cache = OrderedDict(self._cache)
+        return store
+
+    def rings(self, cell_id: int) -> List[np.ndarray]:
+        """Views of the open rings of a cell into the buffer, exterior first."""
+        first_ring, num_rings = self.cell_rings[cell_id]
+        return [self.coords[start:stop]
+                for start, stop in self.ring_bounds[first_ring:first_ring + num_rings]]
+
+    def canonical(self, cell_id: int) -> List:
+        """Canonical form of a cell, see Decomposition.add_cell."""
+        rings = [[tuple(vertex) for vertex in ring.tolist()] for ring in self.rings(cell_id)]
+        return [rings[0], rings[1:]]
+
+    @property
+    def num_garbage(self) -> int:
+        """Number of buffered coordinates of replaced or deleted cells."""
+        live = sum(int(np.diff(self.ring_bounds[first:first + count], axis=1).sum())
+                   for first, count in self.cell_rings.values())
+        return self.num_coords - live
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the coordinate and offset buffers."""
+        return self.coords.nbytes + self.ring_bounds.nbytes
+
+    def repack(self):
+        """Drops the rings of replaced or deleted cells and shrinks the buffers to fit."""
+        rings = {cell_id: [ring.copy() for ring in self.rings(cell_id)]
+                 for cell_id in self.cell_rings}
+
+        num_coords = sum(len(ring) for cell_rings in rings.values() for ring in cell_rings)
+        num_rings = sum(len(cell_rings) for cell_rings in rings.values())
+        self.coords = np.empty((max(num_coords, 1), 2), dtype=np.float64)
+        self.ring_bounds = np.empty((max(num_rings, 1), 2), dtype=np.int64)
+        self.num_coords = 0
+        self.num_rings = 0
+        self.cell_rings = {}
+
+        cache = self._cache
+        for cell_id, cell_rings in rings.items():
+            self[cell_id] = [cell_rings[0], cell_rings[1:]]
+        self._cache = cache
+
+
+class CanonicalCells(Mapping):
+    """Read-only view of a CellStore in canonical form, built on access."""
+    __slots__ = (
+        'store',
+    )
+
+    def __init__(self, store: CellStore):
+        self.store = store
+
+    def __getitem__(self, cell_id: int) -> List:
+        if cell_id not in self.store:
+            raise KeyError(cell_id)
+        return self.store.canonical(cell_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.store)
+
+    def __len__(self) -> int:
+        return len(self.store)
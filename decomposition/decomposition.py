@@ -1,9 +1,14 @@
 """Defining decomposition class."""
 from copy import deepcopy
-from typing import Dict, List, Tuple, Iterable
+from typing import Dict, List, Optional, Tuple, Iterable, Union
 
+import numpy as np
 from shapely.geometry import Polygon, Point
 
+from .cell_store import CanonicalCells, CellStore
+from .snapshot import read_snapshot, read_snapshot_attrs, write_snapshot
+from .spatial_index import CellIndex, update_adjacency
+
 
 def poly_shapely_to_canonical(polygon):
     """
@@ -41,7 +46,12 @@ def poly_shapely_to_canonical(polygon):
 
 
 class Decomposition():
-    """Container class for storing decomposition and everything related to it."""
+    """Container class for storing decomposition and everything related to it.
+
+    In compact mode cells live in a CellStore, a single coordinate buffer, and
+    both the Shapely polygons in cells and the lists in canonical_cells are
+    built from it on access.
+    """
     __slots__ = (
         'polygon',
         'canonical_polygon',
@@ -50,24 +60,38 @@ class Decomposition():
         'cells',
         'canonical_robot_sites',
         'robot_sites',
+        'adjacency',
+        'compact',
+        '_index',
     )
 
-    def __init__(self, polygon: List[List]):
+    def __init__(self, polygon: List[List], compact: bool = False):
         """
         Args:
             polygon (List): Polygon in its canonical form.
+            compact (bool): Keep cells in a CellStore instead of dicts of
+                polygons and canonical lists.
         """
         self.canonical_polygon = deepcopy(polygon)
         self.polygon = Polygon(*polygon)
 
         self.num_cells = 0
+        self.compact = compact
 
-        self.canonical_cells: Dict[int, List] = {}
-        self.cells: Dict[int, Polygon] = {}
+        if compact:
+            self.cells = CellStore()
+            self.canonical_cells = CanonicalCells(self.cells)
+        else:
+            self.canonical_cells: Dict[int, List] = {}
+            self.cells: Dict[int, Polygon] = {}
 
         self.canonical_robot_sites: Dict[int, Tuple] = {}
         self.robot_sites: Dict[int, Point] = {}
 
+        # Sparse adjacency graph: cell id -> {neighbour id: shared edge length}.
+        self.adjacency: Dict[int, Dict[int, float]] = {}
+        self._index = CellIndex(self.cells)
+
     def add_cell(self, cell: List[List]) -> int:
         """Adds a cell to the decomposition and returns its assigned index.
 
@@ -76,8 +100,12 @@ class Decomposition():
         Returns:
             index assigned to this cell.
         """
-        self.canonical_cells[self.num_cells] = deepcopy(cell)
-        self.cells[self.num_cells] = Polygon(*cell)
+        if self.compact:
+            self.cells[self.num_cells] = Polygon(*cell)
+        else:
+            self.canonical_cells[self.num_cells] = deepcopy(cell)
+            self.cells[self.num_cells] = Polygon(*cell)
+        self._update_adjacency(self.num_cells)
 
         self.num_cells += 1
 
@@ -106,8 +134,223 @@ class Decomposition():
         return self.cells[key], self.robot_sites[key]
 
     def __setitem__(self, key: int, val: Polygon):
+        self._store_cell(key, val)
+        self._update_adjacency(key)
+
+    def _store_cell(self, key: int, val: Polygon):
+        """Replaces the geometry of a cell in every representation kept."""
         self.cells[key] = val
-        self.canonical_cells[key] = poly_shapely_to_canonical(val)
+        if not self.compact:
+            self.canonical_cells[key] = poly_shapely_to_canonical(val)
+
+    def update_cells(self, cells: Dict[int, Polygon]) -> bool:
+        """Replaces several cells at once.
+
+        All new cells are validated before the decomposition is touched, and
+        adjacency is only rechecked once every cell has its new geometry. This
+        is how the results of several concurrent cuts should be committed.
+
+        Args:
+            cells (Dict): Mapping from existing cell id to its new polygon.
+
+        Returns:
+            bool indicated success of update. Nothing is changed on failure.
+        """
+        for key, val in cells.items():
+            if key not in self.cells:
+                return False
+            if not isinstance(val, Polygon) or val.is_empty:
+                return False
+
+        for key, val in cells.items():
+            self._store_cell(key, val)
+            self._index.mark_dirty(key)
+
+        for key in cells:
+            self._update_adjacency(key)
+
+        return True
+
+    def _update_adjacency(self, cell_id: int):
+        """Rechecks adjacency of a changed cell against the cells near it."""
+        self._index.mark_dirty(cell_id)
+        update_adjacency(self.adjacency,
+                         self.cells,
+                         cell_id,
+                         self._index.candidates(self.cells[cell_id]))
 
     def items(self) -> List:
         return [(key, val, self.robot_sites[key]) for key, val in self.cells.items()]
+
+    def neighbors(self, cell_id: int) -> List[int]:
+        """Sorted ids of the cells sharing an edge with the given cell."""
+        return sorted(self.adjacency[cell_id])
+
+    def cells_intersecting(self, geometry) -> List[int]:
+        """Sorted ids of the cells intersecting a shapely geometry."""
+        return self._index.intersecting(geometry)
+
+    def containing_cell(self, point: Union[Point, Tuple[float, float]]) -> Optional[int]:
+        """Id of the cell containing the point, or None if it is outside all cells.
+
+        Points on a boundary shared by several cells go to the lowest cell id.
+        """
+        return self._index.containing(Point(point))
+
+    def nearest_cell(self, site: Union[Point, Tuple[float, float]]) -> Optional[int]:
+        """Id of the cell nearest to a site, e.g. a robot's starting location.
+
+        Ties go to the lowest cell id. Returns None if there are no cells.
+        """
+        return self._index.nearest(Point(site))
+
+    def copy(self) -> 'Decomposition':
+        """Copy that is not affected by later changes to this decomposition.
+
+        Cell polygons are immutable and shared, only the containers are
+        copied, so the copy is cheap enough to take in the optimization loop
+        and hand to another thread.
+        """
+        decomposition = Decomposition.__new__(Decomposition)
+        decomposition.canonical_polygon = self.canonical_polygon
+        decomposition.polygon = self.polygon
+        decomposition.num_cells = self.num_cells
+        decomposition.compact = self.compact
+
+        if self.compact:
+            decomposition.cells = self.cells.copy()
+            decomposition.canonical_cells = CanonicalCells(decomposition.cells)
+        else:
+            decomposition.cells = dict(self.cells)
+            decomposition.canonical_cells = dict(self.canonical_cells)
+
+        decomposition.canonical_robot_sites = dict(self.canonical_robot_sites)
+        decomposition.robot_sites = dict(self.robot_sites)
+        decomposition.adjacency = {cell_id: dict(neighbors)
+                                   for cell_id, neighbors in self.adjacency.items()}
+        decomposition._index = CellIndex(decomposition.cells)
+
+        return decomposition
+
+    def save(self, path: str, metadata: Optional[Dict] = None) -> bool:
+        """Writes the decomposition to a binary snapshot file, see snapshot.py.
+
+        Rings of the polygon and of all cells are flattened into one
+        coordinate array with (start, stop) offsets per ring. Robot sites and
+        the adjacency graph are stored as arrays as well, so loading does not
+        have to recompute anything.
+
+        Args:
+            path (str): Destination file, replaced atomically.
+            metadata (Dict): JSON serializable data stored along, see read_metadata.
+
+        Returns:
+            bool indicated success of save.
+        """
+        cell_ids = sorted(self.cells)
+        rings = [CellStore.polygon_rings(self.polygon)]
+        for cell_id in cell_ids:
+            if self.compact:
+                rings.append(self.cells.rings(cell_id))
+            else:
+                rings.append(CellStore.polygon_rings(self.cells[cell_id]))
+
+        ring_sizes = [len(ring) for cell_rings in rings for ring in cell_rings]
+        ring_stops = np.cumsum(ring_sizes, dtype=np.int64)
+        num_rings = np.array([len(cell_rings) for cell_rings in rings], dtype=np.int64)
+
+        site_ids = sorted(self.robot_sites)
+        edges = [(cell_id, neighbor_id, length)
+                 for cell_id in sorted(self.adjacency)
+                 for neighbor_id, length in sorted(self.adjacency[cell_id].items())
+                 if neighbor_id > cell_id]
+
+        arrays = {
+            'coords': np.concatenate([ring for cell_rings in rings for ring in cell_rings])
+                      .reshape(-1, 2),
+            'ring_bounds': np.stack([ring_stops - ring_sizes, ring_stops], axis=1),
+            # The first entry belongs to the polygon, the rest to cell_ids.
+            'num_rings': num_rings,
+            'cell_ids': np.array(cell_ids, dtype=np.int64),
+            'site_ids': np.array(site_ids, dtype=np.int64),
+            'sites': np.array([self.robot_sites[cell_id].coords[0] for cell_id in site_ids],
+                              dtype=np.float64).reshape(-1, 2),
+            'edges': np.array([edge[:2] for edge in edges], dtype=np.int64).reshape(-1, 2),
+            'edge_lengths': np.array([edge[2] for edge in edges], dtype=np.float64),
+        }
+        attrs = {'num_cells': self.num_cells, 'metadata': metadata}
+
+        return write_snapshot(path, arrays, attrs)
+
+    @classmethod
+    def load(cls, path: str, compact: bool = False, mmap: bool = True) -> Optional['Decomposition']:
+        """Reads a decomposition written by save.
+
+        A compact decomposition loaded with mmap keeps the memory-mapped
+        coordinates as its buffer, so loading only reads the offsets and
+        cells are built from the file when first accessed. The buffer is
+        copied on the first change to a cell. Canonical forms of the loaded
+        polygon and cells have open rings of tuples.
+
+        Args:
+            path (str): Snapshot file.
+            compact (bool): Load into a compact decomposition.
+            mmap (bool): Memory-map the file instead of reading it.
+
+        Returns:
+            Decomposition or None if the file could not be read or holds
+            inconsistent rings.
+        """
+        snapshot = read_snapshot(path, mmap=mmap)
+        if snapshot is None:
+            return None
+        arrays, attrs = snapshot
+
+        # The polygon owns the first run of rings, the cells the runs after it.
+        coords = arrays['coords']
+        ring_bounds = arrays['ring_bounds']
+        num_rings = arrays['num_rings']
+        num_outline_rings = int(num_rings[0]) if len(num_rings) else 0
+        outline = CellStore.from_arrays(coords, ring_bounds[:num_outline_rings],
+                                        [0], num_rings[:1])
+        # Cells are loaded through a store, the compact one stays in use.
+        store = CellStore.from_arrays(coords, ring_bounds[num_outline_rings:],
+                                      arrays['cell_ids'], num_rings[1:])
+        if outline is None or store is None:
+            return None
+
+        decomposition = cls(outline.canonical(0), compact=compact)
+
+        if compact:
+            decomposition.cells = store
+            decomposition.canonical_cells = CanonicalCells(store)
+            decomposition._index = CellIndex(store)
+        else:
+            for cell_id in store:
+                decomposition.cells[cell_id] = store[cell_id]
+                decomposition.canonical_cells[cell_id] = store.canonical(cell_id)
+            store.release()
+        decomposition.num_cells = attrs['num_cells']
+
+        for cell_id, site in zip(arrays['site_ids'].tolist(), arrays['sites'].tolist()):
+            decomposition.add_robot_site(cell_id, tuple(site))
+
+        decomposition.adjacency = {cell_id: {} for cell_id in decomposition.cells}
+        for (cell_a, cell_b), length in zip(arrays['edges'].tolist(),
+                                            arrays['edge_lengths'].tolist()):
+            decomposition.adjacency[cell_a][cell_b] = length
+            decomposition.adjacency[cell_b][cell_a] = length
+
+        return decomposition
+
+    @staticmethod
+    def read_metadata(path: str) -> Optional[Dict]:
+        """Metadata saved along with a decomposition, read without loading it.
+
+        Returns:
+            the metadata dict, None if there was none or the file could not be read.
+        """
+        attrs = read_snapshot_attrs(path)
+        if attrs is None:
+            return None
+        return attrs['metadata']
@@ -48,7 +48,8 @@ def compute_adjacency(decomposition):
 
             intersection = poly_a.intersection(poly_b)
 
-            if isinstance(intersection, Point):
+            # Touching at one or several points only.
+            if intersection.length == 0:
                 continue
 
             adj_matrix[poly_a_idx][poly_b_idx] = True
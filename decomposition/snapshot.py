@@ -0,0 +1,166 @@
+"""Binary snapshot files of named numpy arrays with a JSON header.
+
+Layout of a snapshot file:
+
+    8 bytes   magic, b'DCSNAP' followed by the format version as two bytes
+    8 bytes   little endian length of the header
+    header    UTF-8 JSON with the dtype, shape and offset of every array and
+              a dict of JSON attributes
+    data      raw array buffers, each starting at a multiple of ALIGNMENT
+
+Arrays are stored uncompressed and aligned, so a reader can memory-map the
+file and hand out views of the arrays without reading or copying them.
+"""
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from log_utils import get_logger
+
+
+SNAPSHOT_MAGIC = b'DCSNAP\x00\x01'
+ALIGNMENT = 64
+
+logger = get_logger("snapshot")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], attrs: Dict) -> bool:
+    """Writes arrays and attributes to a snapshot file.
+
+    The file is written next to its destination and moved into place once
+    complete, so readers never see a partially written snapshot.
+
+    Args:
+        path (str): Destination file.
+        arrays (Dict): Arrays by name, stored in little endian C order.
+        attrs (Dict): JSON serializable attributes.
+
+    Returns:
+        bool indicated success of write.
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=np.asarray(array).dtype.newbyteorder('<'))
+              for name, array in arrays.items()}
+
+    # Offsets are relative to the start of the data section, which is only
+    # known once the header is serialized.
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        descriptors[name] = {'dtype': array.dtype.str,
+                             'shape': list(array.shape),
+                             'offset': offset}
+        offset += array.nbytes
+
+    try:
+        header = json.dumps({'arrays': descriptors, 'attrs': attrs}).encode('utf-8')
+    except (TypeError, ValueError) as err:
+        logger.warning("Snapshot attributes are not serializable: %s", err)
+        return False
+
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header))
+    tmp_path = "{}.tmp".format(path)
+    try:
+        with open(tmp_path, 'wb') as snapshot:
+            snapshot.write(SNAPSHOT_MAGIC)
+            snapshot.write(len(header).to_bytes(8, 'little'))
+            snapshot.write(header)
+            for name, array in arrays.items():
+                snapshot.seek(data_start + descriptors[name]['offset'])
+                snapshot.write(array.tobytes())
+            # Pad to the full data size in case the last arrays are empty.
+            snapshot.truncate(data_start + offset)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(tmp_path, path)
+    except OSError as err:
+        logger.warning("Failed to write snapshot %s: %s", path, err)
+        return False
+
+    return True
+
+
+def _read_header(snapshot) -> Optional[Dict]:
+    if snapshot.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+        return None
+    header_size = int.from_bytes(snapshot.read(8), 'little')
+    try:
+        header = json.loads(snapshot.read(header_size).decode('utf-8'))
+    except ValueError:
+        return None
+    header['data_start'] = _aligned(len(SNAPSHOT_MAGIC) + 8 + header_size)
+    return header
+
+
+def read_snapshot_attrs(path: str) -> Optional[Dict]:
+    """Attributes of a snapshot file, read from its header only.
+
+    Returns:
+        dict of attributes or None if the file is missing or not a snapshot.
+    """
+    try:
+        with open(path, 'rb') as snapshot:
+            header = _read_header(snapshot)
+    except OSError as err:
+        logger.warning("Failed to read snapshot %s: %s", path, err)
+        return None
+
+    if header is None:
+        logger.warning("%s is not a snapshot file", path)
+        return None
+    return header['attrs']
+
+
+def read_snapshot(path: str, mmap: bool = True) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+    """Reads all arrays and attributes of a snapshot file.
+
+    Args:
+        path (str): Snapshot file.
+        mmap (bool): Memory-map the file and return read-only views into it
+            instead of reading it. Pages are only loaded when touched.
+
+    Returns:
+        tuple of arrays by name and attributes, or None if the file is
+        missing or not a snapshot.
+    """
+    try:
+        with open(path, 'rb') as snapshot:
+            header = _read_header(snapshot)
+            if header is not None and not mmap:
+                snapshot.seek(header['data_start'])
+                data = np.frombuffer(bytearray(snapshot.read()), dtype=np.uint8)
+        if header is not None and mmap:
+            # Files holding empty arrays only end at the data section and can
+            # not be mapped.
+            if os.path.getsize(path) > header['data_start']:
+                data = np.memmap(path, dtype=np.uint8, mode='r', offset=header['data_start'])
+            else:
+                data = np.empty(0, dtype=np.uint8)
+    except (OSError, ValueError) as err:
+        logger.warning("Failed to read snapshot %s: %s", path, err)
+        return None
+
+    if header is None:
+        logger.warning("%s is not a snapshot file", path)
+        return None
+
+    arrays = {}
+    for name, descriptor in header['arrays'].items():
+        dtype = np.dtype(descriptor['dtype'])
+        shape = tuple(descriptor['shape'])
+        start = descriptor['offset']
+        stop = start + dtype.itemsize*int(np.prod(shape, dtype=np.int64))
+        if stop > len(data):
+            logger.warning("Snapshot %s is truncated", path)
+            return None
+        # Plain ndarray views, a memmap subclass would leak into every result
+        # computed from them.
+        arrays[name] = np.asarray(data[start:stop]).view(dtype).reshape(shape)
+
+    return arrays, header['attrs']
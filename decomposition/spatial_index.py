@@ -0,0 +1,154 @@
+"""Spatial index over the cells of a decomposition."""
+from typing import Dict, Iterable, List, Optional, Set
+
+from shapely.geometry import Point, Polygon, box
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+
+
+class CellIndex():
+    """STRtree over cell geometries that tolerates cell updates.
+
+    An STRtree can not be modified once built. Cells updated after the build
+    are tracked as dirty and always returned as candidates, the tree itself is
+    only rebuilt once too many cells went dirty or when a query needs exact
+    geometries, e.g. nearest cell lookups.
+    """
+    __slots__ = (
+        'cells',
+        'max_dirty',
+        'num_builds',
+        '_tree',
+        '_tree_ids',
+        '_dirty',
+        '_stale',
+    )
+
+    def __init__(self, cells: Dict[int, Polygon], max_dirty: int = 32):
+        """
+        Args:
+            cells (Dict): Mapping from cell id to its polygon. Kept by reference,
+                changes must be reported through mark_dirty.
+            max_dirty (int): Number of dirty cells that triggers a rebuild.
+        """
+        self.cells = cells
+        self.max_dirty = max_dirty
+        self.num_builds = 0
+
+        self._tree = None
+        self._tree_ids: List[int] = []
+        self._dirty: Set[int] = set()
+        self._stale = True
+
+    def build(self):
+        """(Re)builds the tree over all cells."""
+        self._tree_ids = list(self.cells)
+        geoms = [self.cells[cell_id] for cell_id in self._tree_ids]
+
+        self._tree = STRtree(geoms) if geoms else None
+        self._dirty = set()
+        self._stale = False
+        self.num_builds += 1
+
+    def mark_dirty(self, cell_id: int):
+        """Records that the geometry of a cell has changed since the last build."""
+        self._dirty.add(cell_id)
+        if len(self._dirty) > self.max_dirty:
+            self._stale = True
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True if the index was never built or too many cells went dirty."""
+        return self._stale
+
+    def candidates(self, geometry: BaseGeometry) -> Set[int]:
+        """Ids of cells whose envelope may intersect the geometry's envelope.
+
+        Args:
+            geometry (BaseGeometry): Query geometry.
+
+        Returns:
+            set of candidate cell ids, including all dirty cells.
+        """
+        if self.needs_rebuild:
+            self.build()
+
+        found = set(self._dirty)
+        if self._tree is not None:
+            # Queries return indices into the geometries the tree was built on.
+            found.update(self._tree_ids[idx] for idx in self._tree.query(geometry).tolist())
+
+        return found
+
+    def intersecting(self, geometry: BaseGeometry) -> List[int]:
+        """Sorted ids of cells intersecting the geometry."""
+        return sorted(cell_id for cell_id in self.candidates(geometry)
+                      if self.cells[cell_id].intersects(geometry))
+
+    def containing(self, point: Point) -> Optional[int]:
+        """Id of the cell covering the point, the lowest id on shared boundaries.
+
+        Returns:
+            cell id or None if the point is outside of all cells.
+        """
+        found = self.intersecting(point)
+        return found[0] if found else None
+
+    def nearest(self, point: Point) -> Optional[int]:
+        """Id of the cell closest to the point, the lowest id on ties.
+
+        Returns:
+            cell id or None if there are no cells.
+        """
+        if self._dirty:
+            self.build()
+        if self._tree is None:
+            return None
+
+        nearest_id = self._tree_ids[int(self._tree.nearest(point))]
+        distance = self.cells[nearest_id].distance(point)
+
+        # STRtree breaks ties arbitrarily, settle them among all cells in reach.
+        reach = box(point.x - distance, point.y - distance, point.x + distance, point.y + distance)
+        return min(self.candidates(reach), key=lambda cell_id: (self.cells[cell_id].distance(point),
+                                                                  cell_id))
+
+
+def shared_edge_length(poly_a: Polygon, poly_b: Polygon) -> float:
+    """Length of the boundary shared by two cells, 0 if they are not adjacent.
+
+    Cells only touching at points share a boundary of length 0.
+    """
+    if not poly_a.touches(poly_b):
+        return 0.
+
+    return poly_a.intersection(poly_b).length
+
+
+def update_adjacency(adjacency: Dict[int, Dict[int, float]],
+                     cells: Dict[int, Polygon],
+                     cell_id: int,
+                     candidates: Iterable[int]):
+    """Recomputes the adjacency of a single cell against candidate cells.
+
+    Args:
+        adjacency (Dict): Sparse adjacency graph, mutated in place. Maps a cell
+            id to its neighbours and the length of the shared edge.
+        cells (Dict): Mapping from cell id to its polygon.
+        cell_id (int): Id of the cell that changed.
+        candidates (Iterable): Ids of cells that may be adjacent to it.
+    """
+    for neighbor_id in adjacency.pop(cell_id, {}):
+        adjacency[neighbor_id].pop(cell_id, None)
+
+    neighbors = adjacency[cell_id] = {}
+    polygon = cells[cell_id]
+
+    for neighbor_id in candidates:
+        if neighbor_id == cell_id:
+            continue
+
+        length = shared_edge_length(polygon, cells[neighbor_id])
+        if length > 0:
+            neighbors[neighbor_id] = length
+            adjacency.setdefault(neighbor_id, {})[cell_id] = length
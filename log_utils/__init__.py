@@ -1 +1 @@
-from .logger import get_logger
+from .logger import get_logger, TraceSampler, TRACE
@@ -1,27 +1,90 @@
 """Everything to do with logging."""
 import logging
+import os
 from logging import Logger
+from typing import Set
+
+
+LOG_DIR = "logs"
+
+# Level below DEBUG for per candidate records of hot loops, see TraceSampler.
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# Names of loggers whose handlers are already attached.
+_configured: Set[str] = set()
 
 
 def get_logger(logger_name: str) -> Logger:
-    """Helper function for setting up the logger."""
+    """Helper function for setting up the logger.
+
+    Handlers are attached on the first call for a name only, later calls return
+    the same logger, so creating many optimizers does not duplicate every line.
+    The log file is opened on the first record.
+    """
 
     # logging module seems to use snake case
     # pylint: disable=invalid-name
     logger = logging.getLogger(logger_name)
+    if logger_name in _configured:
+        return logger
 
-    fileHandler = logging.FileHandler("logs/{}.log".format(logger_name))
+    os.makedirs(LOG_DIR, exist_ok=True)
+    fileHandler = logging.FileHandler(os.path.join(LOG_DIR, "{}.log".format(logger_name)),
+                                      delay=True)
     streamHandler = logging.StreamHandler()
 
     logger.addHandler(fileHandler)
     logger.addHandler(streamHandler)
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-    fileHandler.setFormatter(formatter)
-    streamHandler.setFormatter(formatter)
+    fileHandler.setFormatter(_formatter)
+    streamHandler.setFormatter(_formatter)
 
     # Default logging level INFO
     logger.setLevel(logging.INFO)
 
+    _configured.add(logger_name)
     return logger
+
+
+class TraceSampler():
+    """Logs every n-th record of a hot loop at TRACE level.
+
+    Nothing is counted or formatted unless the logger is enabled for TRACE.
+    Loops should check enabled() once before the loop and skip calling the
+    sampler altogether when it is off.
+
+    Usage:
+        trace = TraceSampler(logger, every=100)
+        tracing = trace.enabled()
+        for ...:
+            if tracing:
+                trace("Cut %d: cost %.2f", idx, cost)
+    """
+    __slots__ = (
+        'logger',
+        'every',
+        'count',
+    )
+
+    def __init__(self, logger: Logger, every: int = 100):
+        """
+        Args:
+            logger (Logger): Logger to emit to.
+            every (int): Sampling period, 1 logs every record.
+        """
+        self.logger = logger
+        self.every = every
+        self.count = 0
+
+    def enabled(self) -> bool:
+        """True if the logger currently emits TRACE records."""
+        return self.logger.isEnabledFor(TRACE)
+
+    def __call__(self, msg: str, *args):
+        """Logs the record if it is the first of its sampling period."""
+        if self.count % self.every == 0:
+            self.logger.log(TRACE, msg, *args)
+        self.count += 1
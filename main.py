@@ -1,10 +1,16 @@
-"""Entry point for distributed planner"""
+"""Entry point for distributed planner
+
+Usage:
+    python main.py <poly_id> [--iterations 10] [--headless] [--figures DIR]
+"""
+import argparse
+import os
 import sys
+from typing import List, Optional, Tuple
 
 from utils.polygons import decomposition_generator
 from optimizer import ChiOptimizer
 from log_utils import get_logger
-import visuals.coverage_plot as splot
 
 
 GLKH_LOCATION = "/home//misc/GLKH-1.0/"
@@ -31,10 +37,17 @@ def pretty_print_decomposition(decomposition):
         print("\n"),
 
 
-def distributed_planner(poly_id: int = 0, num_reopt_iters: int = 10):
+def distributed_planner(poly_id: int = 0,
+                        num_reopt_iters: int = 10,
+                        headless: bool = False,
+                        figure_dir: Optional[str] = None) -> Tuple[List, List]:
     """
     Main function that orchestrates distrubted planner and plots the results.
 
+    Headless runs never import matplotlib. If a figure directory is given,
+    the original and reoptimized decompositions are rendered to files there
+    by a background process while the optimizer runs.
+
     Assumptions:
         Robots are assigned to the cells nearest to them.
 
@@ -44,18 +57,37 @@ def distributed_planner(poly_id: int = 0, num_reopt_iters: int = 10):
     Args:
         poly_id (int): Id of the polygon. Needed to select started polygons.
         num_reopt_iters (int): Run reoptimizer for this many iterations.
+        headless (bool): Skip the interactive plots.
+        figure_dir (str): Directory to render figures to, None renders none.
+
+    Returns:
+        original and new costs as returned by ChiOptimizer.run_iterations.
     """
-    # Start visuals
-    # Initialize plotting tools
-    ax_old = splot.init_axis("Original Decomposition", "+0+100")
-    ax_new = splot.init_axis("Reoptimized Decomposition", "+700+100")
+    renderer = None
+    if figure_dir is not None:
+        # pylint: disable=import-outside-toplevel
+        from visuals.render import FigureRenderer
+        os.makedirs(figure_dir, exist_ok=True)
+        renderer = FigureRenderer()
+
+    if not headless:
+        # Start visuals
+        # Initialize plotting tools
+        # pylint: disable=import-outside-toplevel
+        import visuals.coverage_plot as splot
+        ax_old = splot.init_axis("Original Decomposition", "+0+100")
+        ax_new = splot.init_axis("Reoptimized Decomposition", "+700+100")
 
 
     #polygon, cell_to_site_map, decomposition = decomposition_generator(poly_id)
     decomposition = decomposition_generator(poly_id)
-    splot.plot_polygon_outline(ax_old, decomposition.canonical_polygon)
-    splot.plot_decomposition(ax_old, decomposition)
-    splot.plot_init_pos_and_assignment(ax_old, decomposition)
+    if not headless:
+        splot.plot_polygon_outline(ax_old, decomposition.canonical_polygon)
+        splot.plot_decomposition(ax_old, decomposition)
+        splot.plot_init_pos_and_assignment(ax_old, decomposition)
+    if renderer is not None:
+        renderer.submit(os.path.join(figure_dir, "poly_%d_original.png" % poly_id),
+                        "Original Decomposition", decomposition)
 
     logger.info("Reoptimizing polygon: %3d", poly_id)
     logger.info("Attempting %d reoptimization iterations.", num_reopt_iters)
@@ -67,9 +99,13 @@ def distributed_planner(poly_id: int = 0, num_reopt_iters: int = 10):
     old_costs, new_costs = optimizer.run_iterations(decomposition)
 
     # Populate the drawing canvas
-    splot.plot_polygon_outline(ax_new, decomposition.canonical_polygon)
-    splot.plot_decomposition(ax_new, decomposition)
-    splot.plot_init_pos_and_assignment(ax_new, decomposition)
+    if not headless:
+        splot.plot_polygon_outline(ax_new, decomposition.canonical_polygon)
+        splot.plot_decomposition(ax_new, decomposition)
+        splot.plot_init_pos_and_assignment(ax_new, decomposition)
+    if renderer is not None:
+        renderer.submit(os.path.join(figure_dir, "poly_%d_reoptimized.png" % poly_id),
+                        "Reoptimized Decomposition", decomposition)
 
     logger.info("Old costs: %s", old_costs)
     logger.info("New costs: %s", new_costs)
@@ -86,8 +122,15 @@ def distributed_planner(poly_id: int = 0, num_reopt_iters: int = 10):
 
 
 
+    if renderer is not None:
+        for path in renderer.close():
+            logger.info("Figure written to %s", path)
+
     # Send the plot command
-    splot.display()
+    if not headless:
+        splot.display()
+
+    return old_costs, new_costs
 
 
 
@@ -110,8 +153,23 @@ def distributed_planner(poly_id: int = 0, num_reopt_iters: int = 10):
 #splot.plot_tour_dubins(ax, tour, mapping, RADIUS/2)
 #splot.display()
 
-if __name__ == '__main__':
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Distributed coverage planner.")
+    parser.add_argument('poly_id', type=int, help="Id of the polygon to reoptimize.")
+    parser.add_argument('--iterations', type=int, default=10,
+                        help="Reoptimization iterations.")
+    parser.add_argument('--headless', action='store_true',
+                        help="Skip the interactive plots, matplotlib is never imported.")
+    parser.add_argument('--figures', metavar='DIR',
+                        help="Render the original and reoptimized decompositions to DIR.")
+    args = parser.parse_args(argv)
 
-    poly_id_ = int(sys.argv[1])
+    distributed_planner(poly_id=args.poly_id,
+                        num_reopt_iters=args.iterations,
+                        headless=args.headless,
+                        figure_dir=args.figures)
 
-    distributed_planner(poly_id=poly_id_)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
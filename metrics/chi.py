@@ -1,35 +1,116 @@
 """Computation of the chi metric."""
 import logging
+import math
 
 from shapely.geometry import LinearRing
 from shapely.geometry import LineString
 from shapely.geometry import Polygon
 from shapely.geometry import MultiPolygon
 
+from log_utils import get_logger
+
 
 # Configure logging properties for this module
-logger = logging.getLogger("chi")
-fileHandler = logging.FileHandler("logs/chi.log")
-streamHandler = logging.StreamHandler()
-logger.addHandler(fileHandler)
-logger.addHandler(streamHandler)
+logger = get_logger("chi")
 
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-fileHandler.setFormatter(formatter)
-streamHandler.setFormatter(formatter)
-logger.setLevel(logging.INFO)
+def compute_num_contours(polygon, radius=1, limit=None):
+    """
+    Computing contours of P
 
+    Level j of the contours is the polygon eroded by (1 + j^2)*radius/2. The
+    count is always that of compute_num_contours_buffered: GEOS simplifies
+    the input of negative buffers, so no closed form on the inscribed radius
+    reproduces it near level boundaries. When a limit is given, convex
+    polygons whose area and perimeter already guarantee it skip the buffer
+    loop altogether.
 
-def compute_num_contours(polygon, radius=1):
+    Params:
+        polygon: A shapely object representing the polygon
+        solverParams: A dict representing solver parameters
+        limit: Stop counting once this many contours are found
+    Returns:
+        Number of contours, a lower bound of it if limit was reached
+    """
+
+    if limit is not None:
+        lower = contour_lower_bound(polygon, radius)
+        if lower >= limit:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Number of contours: at least %d", lower)
+            return lower
+
+    return compute_num_contours_buffered(polygon, radius=radius, limit=limit)
+
+
+def contour_lower_bound(polygon, radius=1):
+    """
+    Cheap lower bound on the number of contours of P
+
+    Params:
+        polygon: A shapely object representing the polygon
+        radius: Radius of the robot footprint
+    Returns:
+        Lower bound on compute_num_contours, exact for convex triangles
+    """
+
+    if not is_convex(polygon):
+        return 0
+
+    area = polygon.area
+    perimeter = polygon.length
+
+    # Triangles are tangential, their inscribed radius is exactly 2A/P.
+    if len(polygon.exterior.coords) == 4:
+        return num_contour_levels(2*area/perimeter, radius)
+
+    return num_contour_levels(area/perimeter, radius)
+
+
+def num_contour_levels(inscribed_radius, radius=1):
+    """
+    Number of contour levels of a convex polygon with given inscribed radius
+
+    Params:
+        inscribed_radius: Radius of the largest circle inside the polygon
+        radius: Radius of the robot footprint
+    Returns:
+        Number of levels j with (1 + j^2)*radius/2 < inscribed_radius
     """
-    Computing contours of P
+
+    max_level = 2*inscribed_radius/radius - 1
+    if max_level <= 0:
+        return 0
+
+    return int(math.ceil(math.sqrt(max_level)))
+
+
+def is_convex(polygon):
+    """
+    Checks that the polygon is convex and has no holes
+
+    Params:
+        polygon: A shapely object representing the polygon
+    Returns:
+        True if polygon is a convex Polygon without holes
+    """
+
+    if not isinstance(polygon, Polygon) or polygon.is_empty or polygon.interiors:
+        return False
+
+    return polygon.convex_hull.area - polygon.area <= 1e-12*polygon.area
+
+
+def compute_num_contours_buffered(polygon, radius=1, limit=None):
+    """
+    Computing contours of P by repeatedly buffering it inwards
 
     Params:
         polygon: A shapely object representing the polygon
         solverParams: A dict representing solver parameters
+        limit: Stop counting once this many contours are found
     Returns:
-        Number of contours
+        Number of contours, a lower bound of it if limit was reached
     """
 
     level = 0
@@ -38,15 +119,19 @@ def compute_num_contours(polygon, radius=1):
     test_polygon = Polygon(polygon).buffer(-(2*level+1)*radius/2.0)
 
     while not test_polygon.is_empty:
+        if limit is not None and num_contours >= limit:
+            break
+
         test_polygon = test_polygon.buffer(-(2*level+1)*radius/2.0)
         level += 1
 
         if isinstance(test_polygon, MultiPolygon):
-            num_contours += len(test_polygon)
+            num_contours += len(test_polygon.geoms)
         else:
             num_contours += 1
 
-    logger.debug("Number of contours: %d", num_contours)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Number of contours: %d", num_contours)
 
     return num_contours
 
@@ -67,17 +152,48 @@ def compute_chi(polygon, init_pos, radius=1, lin_penalty=1.0, ang_penalty=1.0):
         chi: Cost chi of coverage of the polygon
     """
 
+    distance = polygon.distance(init_pos)
+    area = polygon.area
+    num_contours = compute_num_contours(polygon=polygon, radius=radius)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Distance: %6.2f Area: %6.2f Contours: %d", distance, area, num_contours)
+
+    return chi_from_terms(distance=distance,
+                          area=area,
+                          num_contours=num_contours,
+                          radius=radius,
+                          lin_penalty=lin_penalty,
+                          ang_penalty=ang_penalty)
+
+
+def chi_from_terms(distance, area, num_contours, radius=1, lin_penalty=1.0, ang_penalty=1.0):
+    """
+    Metric chi assembled from its precomputed geometric terms.
+
+    Works on scalars as well as on numpy arrays of terms, which lets callers
+    score many polygons at once. compute_chi is built on top of it.
+
+    Args:
+        distance: Distance from the robot to the polygon.
+        area: Area of the polygon.
+        num_contours: Number of contours of the polygon, see compute_num_contours.
+        radius: Radius of the robot footprint.
+        lin_penalty: Weight of the linear terms.
+        ang_penalty: Weight of the angular term.
+    Returns:
+        chi: Cost chi of coverage of the polygon
+    """
+
     # Naming for these constants should match naming paper.
     # pylint: disable=invalid-name
     K1 = 2.0
     K2 = 1.0/radius
     K3 = 360.0
 
-    F1 = K1*polygon.distance(init_pos)
-    F2 = K2*polygon.area
-    F3 = K3*compute_num_contours(polygon=polygon, radius=radius)
-
-    logger.debug("F1: %6.2f F2: %6.2f F3: %6.2f", F1, F2, F3)
+    F1 = K1*distance
+    F2 = K2*area
+    F3 = K3*num_contours
 
     return lin_penalty*(F1 + F2) + ang_penalty*F3
 
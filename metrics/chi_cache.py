@@ -0,0 +1,96 @@
+"""Memoization of the chi metric."""
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from shapely.geometry import Point, Polygon
+
+from utils.profiler import NULL_PROFILER
+from .chi import compute_chi
+
+
+class ChiCache():
+    """Bounded LRU cache in front of compute_chi.
+
+    Entries are keyed by the WKB of the polygon, the robot site and the metric
+    parameters, so a cell whose geometry did not change is never scored twice.
+    """
+    __slots__ = (
+        'radius',
+        'lin_penalty',
+        'ang_penalty',
+        'maxsize',
+        'hits',
+        'misses',
+        'evictions',
+        'profiler',
+        '_entries',
+    )
+
+    def __init__(self,
+                 radius: float = 0.1,
+                 lin_penalty: float = 1.0,
+                 ang_penalty: float = 10 * 1.0 / 360.,
+                 maxsize: int = 4096,
+                 profiler=NULL_PROFILER):
+        self.radius = radius
+        self.lin_penalty = lin_penalty
+        self.ang_penalty = ang_penalty
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.profiler = profiler
+        self._entries: OrderedDict = OrderedDict()
+
+    def key(self, polygon: Polygon, init_pos: Point) -> Tuple:
+        """Cache key of a polygon and robot site pair."""
+        return (polygon.wkb, init_pos.x, init_pos.y,
+                self.radius, self.lin_penalty, self.ang_penalty)
+
+    def __call__(self, polygon: Polygon, init_pos: Point) -> float:
+        """Returns chi of the polygon for the robot at init_pos, computing it on a miss."""
+        key = self.key(polygon, init_pos)
+
+        try:
+            chi = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return chi
+
+        self.misses += 1
+        with self.profiler.timer('chi'):
+            chi = compute_chi(polygon, init_pos,
+                              radius=self.radius,
+                              lin_penalty=self.lin_penalty,
+                              ang_penalty=self.ang_penalty)
+
+        self._entries[key] = chi
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return chi
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Drops all entries and resets the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of the cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
@@ -0,0 +1,143 @@
+"""Coarse-to-fine search for the best cut of a polygon."""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from utils.boundary import Boundary
+from .cut_evaluator import CutEvaluator
+from .cut_candidates import chord_masks, generate_cut_pairs
+
+
+def _chord_keys(chords: np.ndarray, length: float) -> np.ndarray:
+    """Hashable rows identifying chords given by the arc lengths of their end points.
+
+    End points are rounded to a billionth of the boundary length, so a chord
+    reached on different levels maps to one key, whichever end comes first.
+    """
+    quantum = length * 1e-9
+    steps = np.round(chords / quantum) % np.round(length / quantum)
+    return np.sort(steps, axis=1)
+
+
+class AdaptiveCutSearch():
+    """Multi-resolution search over chords of a polygon.
+
+    The boundary is first sampled on a coarse uniform grid, to which all
+    polygon vertices are added. Every following level halves the sampling
+    step and resamples a small window around both end points of the top_k
+    chords found so far, until the step drops below tolerance.
+    """
+    __slots__ = (
+        'evaluator',
+        'num_samples',
+        'top_k',
+        'tolerance',
+        'window',
+    )
+
+    def __init__(self,
+                 evaluator: CutEvaluator,
+                 num_samples: int = 16,
+                 top_k: int = 4,
+                 tolerance: float = 0.05,
+                 window: int = 2):
+        """
+        Args:
+            evaluator (CutEvaluator): Scores candidate cuts.
+            num_samples (int): Number of uniform samples of the coarse grid.
+            top_k (int): Number of best chords refined on every level.
+            tolerance (float): Refinement stops once the step along the boundary
+                is below this arc length.
+            window (int): Number of steps sampled on each side of an end point.
+        """
+        self.evaluator = evaluator
+        self.num_samples = num_samples
+        self.top_k = top_k
+        self.tolerance = tolerance
+        self.window = window
+
+    def search(self,
+               polygon: Polygon,
+               robot_a_init_pos: Point,
+               robot_b_init_pos: Point) -> Tuple[Optional[Tuple[np.ndarray, float,
+                                                                Tuple[Polygon, Polygon]]],
+                                                 Dict[str, int]]:
+        """Finds a cut minimizing the maximum chi of the two resulting pieces.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+
+        Returns:
+            ((best cut, its min-max chi, resulting pieces), counters). The first
+            element is None if no candidate is a valid split. Counters hold the
+            pruning counters of the coarse candidates, see generate_cut_pairs,
+            and the number of candidates evaluated on the coarse grid and while
+            refining.
+        """
+        boundary = Boundary(polygon.exterior)
+        length = boundary.length
+
+        distances = np.unique(np.concatenate((
+            np.linspace(0, length, self.num_samples, endpoint=False),
+            boundary.vertex_distances)))
+        points, edges = boundary.sample(distances)
+        cuts, pairs, counters = generate_cut_pairs(points, edges)
+
+        chords = distances[pairs]
+        costs = self.evaluator.score(polygon, cuts, robot_a_init_pos, robot_b_init_pos,
+                                     keep=self.top_k, boundary=boundary)
+
+        counters.update({'coarse': len(cuts), 'refined': 0, 'levels': 0})
+        scored = set(map(tuple, _chord_keys(chords, length).tolist()))
+
+        offsets = np.arange(-self.window, self.window + 1)
+        # The chord itself sits in the middle of its window and is already scored.
+        grid_a, grid_b = [grid.ravel() for grid in np.meshgrid(offsets, offsets, indexing='ij')]
+        off_center = (grid_a != 0) | (grid_b != 0)
+        grid_a, grid_b = grid_a[off_center], grid_b[off_center]
+
+        step = length / self.num_samples
+        while step > self.tolerance and np.isfinite(costs).any():
+            step /= 2
+            counters['levels'] += 1
+
+            top = np.argsort(costs, kind='stable')[:self.top_k]
+            top = top[np.isfinite(costs[top])]
+
+            new_chords = np.unique(np.concatenate([
+                np.stack(((chords[idx, 0] + step*grid_a) % length,
+                          (chords[idx, 1] + step*grid_b) % length), axis=1)
+                for idx in top]), axis=0)
+
+            # Windows of finer levels overlap the chords of coarser ones.
+            fresh = np.zeros(len(new_chords), dtype=bool)
+            for idx, key in enumerate(map(tuple, _chord_keys(new_chords, length).tolist())):
+                fresh[idx] = key not in scored
+                scored.add(key)
+            new_chords = new_chords[fresh]
+
+            points_a, edges_a = boundary.sample(new_chords[:, 0])
+            points_b, edges_b = boundary.sample(new_chords[:, 1])
+            degenerate, same_edge = chord_masks(points_a, edges_a, points_b, edges_b)
+            keep = ~(degenerate | same_edge)
+
+            new_cuts = np.stack((points_a[keep], points_b[keep]), axis=1)
+            new_costs = self.evaluator.score(polygon, new_cuts,
+                                             robot_a_init_pos, robot_b_init_pos,
+                                             keep=self.top_k, boundary=boundary)
+            counters['refined'] += len(new_cuts)
+
+            cuts = np.concatenate((cuts, new_cuts))
+            chords = np.concatenate((chords, new_chords[keep]))
+            costs = np.concatenate((costs, new_costs))
+
+        best_cut = self.evaluator.best_cut(polygon, cuts, costs,
+                                           robot_a_init_pos, robot_b_init_pos, boundary)
+        if best_cut is None:
+            return None, counters
+
+        best_idx, best_cost, best_split = best_cut
+        return (cuts[best_idx], best_cost, best_split), counters
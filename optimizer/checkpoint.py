@@ -0,0 +1,150 @@
+"""Periodic checkpoints of a decomposition written from a background thread."""
+import threading
+from time import perf_counter
+from typing import Dict, Optional
+
+from decomposition import Decomposition
+from log_utils import get_logger
+
+
+logger = get_logger("checkpoint")
+
+
+class Checkpointer():
+    """Saves snapshots of a decomposition every N iterations or T seconds.
+
+    The caller only takes a copy of the decomposition, see Decomposition.copy,
+    serialization and the atomic write of the snapshot file happen on a
+    background thread. At most one write is in flight. A checkpoint that
+    comes due while the previous one is still being written is skipped, the
+    next due iteration tries again.
+
+    A write that fails is logged and its error kept, close raises it once the
+    run is done, so a run never ends believing it can be resumed when it can
+    not.
+
+    Usage:
+        checkpointer = Checkpointer("run.snap", every_iterations=10)
+        for iteration in ...:
+            ...
+            if checkpointer.due(iteration + 1):
+                checkpointer.save(decomposition, state)
+        checkpointer.save(decomposition, state, wait=True)
+        checkpointer.close()
+    """
+    __slots__ = (
+        'path',
+        'every_iterations',
+        'every_seconds',
+        'num_written',
+        'num_skipped',
+        'num_failed',
+        'error',
+        '_last_save',
+        '_thread',
+    )
+
+    def __init__(self,
+                 path: str,
+                 every_iterations: Optional[int] = None,
+                 every_seconds: Optional[float] = None):
+        """
+        Args:
+            path (str): Snapshot file, replaced by every checkpoint.
+            every_iterations (int): Iterations between checkpoints.
+            every_seconds (float): Seconds between checkpoints. With neither
+                interval set, only explicit saves are written.
+        """
+        self.path = path
+        self.every_iterations = every_iterations
+        self.every_seconds = every_seconds
+        self.num_written = 0
+        self.num_skipped = 0
+        self.num_failed = 0
+        self.error: Optional[Exception] = None
+        self._last_save = perf_counter()
+        self._thread: Optional[threading.Thread] = None
+
+    def due(self, iteration: int) -> bool:
+        """True if a checkpoint should be taken after that many iterations."""
+        if self.every_iterations is not None and iteration % self.every_iterations == 0:
+            return True
+        return (self.every_seconds is not None
+                and perf_counter() - self._last_save >= self.every_seconds)
+
+    @property
+    def busy(self) -> bool:
+        """True while a checkpoint is being written."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _write(self, decomposition: Decomposition, state: Dict):
+        try:
+            written = decomposition.save(self.path, metadata=state)
+        except Exception as err:  # pylint: disable=broad-except
+            # Nothing catches exceptions on this thread, close raises it instead.
+            logger.exception("Failed to write checkpoint %s", self.path)
+            self._failed(err)
+            return
+
+        if written:
+            self.num_written += 1
+        else:
+            logger.error("Failed to write checkpoint %s", self.path)
+            self._failed(IOError("Failed to write checkpoint {}".format(self.path)))
+
+    def _failed(self, err: Exception):
+        """Counts a failed write and keeps the first error for close."""
+        self.num_failed += 1
+        if self.error is None:
+            self.error = err
+
+    def save(self, decomposition: Decomposition, state: Dict, wait: bool = False) -> bool:
+        """Starts writing a checkpoint.
+
+        Args:
+            decomposition (Decomposition): Decomposition to save, copied before
+                returning so the caller may go on changing it.
+            state (Dict): JSON serializable run state, saved as the snapshot's
+                metadata. Must not be changed by the caller afterwards.
+            wait (bool): Wait for a write in flight and for this one to finish.
+
+        Returns:
+            bool indicated whether the write was started, False if it was
+            skipped because the previous one is still in flight.
+        """
+        if wait:
+            self.wait()
+        elif self.busy:
+            self.num_skipped += 1
+            return False
+
+        self._last_save = perf_counter()
+        self._thread = threading.Thread(target=self._write,
+                                        args=(decomposition.copy(), state),
+                                        name="checkpoint")
+        self._thread.start()
+        if wait:
+            self.wait()
+        return True
+
+    def wait(self):
+        """Blocks until the write in flight, if any, has finished."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Waits for the write in flight and raises the error of the first failed write.
+
+        The error is raised once, it is cleared before raising.
+        """
+        self.wait()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of checkpoints written, skipped while busy and failed."""
+        return {'written': self.num_written,
+                'skipped': self.num_skipped,
+                'failed': self.num_failed}
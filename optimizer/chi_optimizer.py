@@ -1,16 +1,24 @@
 """High level optimizer that runs iterations."""
-from itertools import product
-from functools import partial
-from typing import List, Tuple, Optional
-import sys
+import logging
+from collections import Counter
+from multiprocessing import Pool
+from time import perf_counter
+from typing import Dict, List, Tuple, Optional
 
-from numpy import linspace
+from shapely import wkb
 from shapely.geometry import LineString, Polygon, Point
 
 from log_utils import get_logger
-from utils import time_execution, polygon_split
-from decomposition import Decomposition, compute_adjacency
-from metrics.chi import compute_chi
+from utils import time_execution
+from utils.boundary import Boundary
+from utils.profiler import NULL_PROFILER, Profiler
+from decomposition import Decomposition
+from metrics.chi_cache import ChiCache
+from .cut_evaluator import CutEvaluator
+from .cut_candidates import generate_cut_candidates
+from .adaptive_search import AdaptiveCutSearch
+from .scheduler import PairScheduler
+from .checkpoint import Checkpointer
 
 
 class ChiOptimizer():
@@ -23,23 +31,228 @@ class ChiOptimizer():
         'logger',
         'num_samples',
         'cost_func',
+        'cut_evaluator',
+        'candidate_counters',
+        'chi_cache_size',
+        'num_workers',
+        'chunk_size',
+        'concurrent_pairs',
+        'adaptive_search',
+        'profiler',
+        'max_search_depth',
+        'max_expansions',
+        'scheduled',
+        'stop_on_no_cut',
+        'plateau_tolerance',
+        'plateau_iterations',
+        'time_limit',
+        'checkpoint_path',
+        'checkpoint_iterations',
+        'checkpoint_seconds',
+        'run_stats',
+        'pool',
     )
 
     def __init__(self,
                  num_iterations: int = 10,
                  radius: float = 0.1,
                  lin_penalty: float = 1.0,
-                 ang_penalty: float = 10 * 1.0 / 360.):
+                 ang_penalty: float = 10 * 1.0 / 360.,
+                 chi_cache_size: int = 4096,
+                 num_workers: int = 0,
+                 chunk_size: int = 256,
+                 num_samples: int = 50,
+                 concurrent_pairs: bool = False,
+                 adaptive: bool = False,
+                 refine_top_k: int = 4,
+                 refine_tolerance: Optional[float] = None,
+                 profile: bool = False,
+                 max_search_depth: Optional[int] = None,
+                 max_expansions: Optional[int] = None,
+                 scheduled: bool = False,
+                 stop_on_no_cut: bool = True,
+                 plateau_tolerance: float = 0.,
+                 plateau_iterations: Optional[int] = None,
+                 time_limit: Optional[float] = None,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_iterations: Optional[int] = None,
+                 checkpoint_seconds: Optional[float] = None):
+        """
+        Args:
+            num_iterations (int): Number of reoptimization iterations.
+            radius (float): Radius of the robot footprint.
+            lin_penalty (float): Weight of the linear terms of chi.
+            ang_penalty (float): Weight of the angular term of chi.
+            chi_cache_size (int): Maximum number of memoized chi values.
+            num_workers (int): Processes used to evaluate cut candidates. 0 or 1
+                evaluates them serially in this process. One pool of workers is
+                kept for a whole run, see start_pool.
+            chunk_size (int): Number of cut candidates per worker task. With
+                concurrent_pairs, workers reoptimize whole pairs instead.
+            num_samples (int): Number of samples along the boundary of a pair of cells.
+            concurrent_pairs (bool): Reoptimize a matching of disjoint adjacent pairs
+                per iteration instead of a single pair.
+            adaptive (bool): Search cuts coarse-to-fine, starting from num_samples
+                uniform samples plus the polygon vertices, instead of trying all
+                pairs of num_samples samples.
+            refine_top_k (int): Number of best cuts refined per level of the
+                adaptive search.
+            refine_tolerance (float): Sampling step along the boundary at which the
+                adaptive search stops refining. Defaults to half the radius.
+            profile (bool): Record counters and timers of every stage in
+                self.profiler, per iteration and per recursion level.
+            max_search_depth (int): Deepest level of dft_search below the cell
+                with the maximum cost. None does not limit the depth.
+            max_expansions (int): Number of cells dft_search expands per iteration.
+                None expands every reachable cell at most once.
+            scheduled (bool): Pick pairs from the priority queues of a
+                PairScheduler instead of dft_search, and stop before num_iterations
+                once no pair is left to improve. Ignored with concurrent_pairs.
+            stop_on_no_cut (bool): Stop once an iteration makes no cut, every
+                following iteration would repeat the same search.
+            plateau_tolerance (float): Relative decrease of the maximum chi below
+                which an iteration counts towards a plateau.
+            plateau_iterations (int): Stop after that many consecutive plateau
+                iterations. None never stops on a plateau.
+            time_limit (float): Wall-clock seconds after which no new iteration
+                is started. None runs without a deadline.
+            checkpoint_path (str): Snapshot file that run_iterations checkpoints
+                the decomposition and its own state to, see resume. None does
+                not checkpoint.
+            checkpoint_iterations (int): Iterations between checkpoints.
+            checkpoint_seconds (float): Seconds between checkpoints. A final
+                checkpoint is always written when the run ends.
+        """
         self.num_iterations = num_iterations
         self.radius = radius
         self.lin_penalty = lin_penalty
         self.ang_penalty = ang_penalty
         self.logger = get_logger(self.__class__.__name__)
-        self.num_samples = 50
-        self.cost_func = partial(compute_chi,
-                                 radius=self.radius,
-                                 lin_penalty=self.lin_penalty,
-                                 ang_penalty=self.ang_penalty)
+        self.num_samples = num_samples
+        self.chi_cache_size = chi_cache_size
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.concurrent_pairs = concurrent_pairs
+        self.max_search_depth = max_search_depth
+        self.max_expansions = max_expansions
+        self.scheduled = scheduled
+        self.stop_on_no_cut = stop_on_no_cut
+        self.plateau_tolerance = plateau_tolerance
+        self.plateau_iterations = plateau_iterations
+        self.time_limit = time_limit
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_iterations = checkpoint_iterations
+        self.checkpoint_seconds = checkpoint_seconds
+        self.run_stats: Dict = {}
+        self.pool: Optional[Pool] = None
+        self.profiler = Profiler() if profile else NULL_PROFILER
+        self.cost_func = ChiCache(radius=self.radius,
+                                  lin_penalty=self.lin_penalty,
+                                  ang_penalty=self.ang_penalty,
+                                  maxsize=chi_cache_size,
+                                  profiler=self.profiler)
+        self.cut_evaluator = CutEvaluator(radius=self.radius,
+                                          lin_penalty=self.lin_penalty,
+                                          ang_penalty=self.ang_penalty,
+                                          num_workers=0 if concurrent_pairs else num_workers,
+                                          chunk_size=chunk_size,
+                                          profiler=self.profiler)
+        self.candidate_counters: Counter = Counter()
+
+        self.adaptive_search: Optional[AdaptiveCutSearch] = None
+        if adaptive:
+            self.adaptive_search = AdaptiveCutSearch(
+                self.cut_evaluator,
+                num_samples=num_samples,
+                top_k=refine_top_k,
+                tolerance=radius / 2 if refine_tolerance is None else refine_tolerance)
+
+    def settings(self) -> Dict:
+        """Constructor arguments that recreate an optimizer with the same settings."""
+        return {
+            'num_iterations': self.num_iterations,
+            'radius': self.radius,
+            'lin_penalty': self.lin_penalty,
+            'ang_penalty': self.ang_penalty,
+            'chi_cache_size': self.chi_cache_size,
+            'num_workers': self.num_workers,
+            'chunk_size': self.chunk_size,
+            'num_samples': self.num_samples,
+            'concurrent_pairs': self.concurrent_pairs,
+            'adaptive': self.adaptive_search is not None,
+            'refine_top_k': self.adaptive_search.top_k if self.adaptive_search else 4,
+            'refine_tolerance': self.adaptive_search.tolerance if self.adaptive_search else None,
+            'profile': self.profiler.enabled,
+            'max_search_depth': self.max_search_depth,
+            'max_expansions': self.max_expansions,
+            'scheduled': self.scheduled,
+            'stop_on_no_cut': self.stop_on_no_cut,
+            'plateau_tolerance': self.plateau_tolerance,
+            'plateau_iterations': self.plateau_iterations,
+            'time_limit': self.time_limit,
+            'checkpoint_path': self.checkpoint_path,
+            'checkpoint_iterations': self.checkpoint_iterations,
+            'checkpoint_seconds': self.checkpoint_seconds,
+        }
+
+    @classmethod
+    def resume(cls, checkpoint_path: str, **overrides) -> Optional[Tuple['ChiOptimizer',
+                                                                        Decomposition,
+                                                                        List[Tuple[int, float]],
+                                                                        List[Tuple[int, float]]]]:
+        """Continues a run from its last checkpoint.
+
+        The optimizer is recreated with the settings saved in the checkpoint and
+        keeps checkpointing to the same file. Runs that ended are continued as
+        well, e.g. with a larger num_iterations.
+
+        Args:
+            checkpoint_path (str): Checkpoint written by run_iterations.
+            overrides: Settings that replace the saved ones.
+
+        Returns:
+            tuple of the optimizer, the decomposition and the original and new
+            costs as returned by run_iterations, or None if the checkpoint could
+            not be read.
+        """
+        state = Decomposition.read_metadata(checkpoint_path)
+        decomposition = Decomposition.load(checkpoint_path)
+        if state is None or decomposition is None:
+            return None
+
+        settings = dict(state['settings'], checkpoint_path=checkpoint_path)
+        settings.update(overrides)
+        optimizer = cls(**settings)
+        old_costs, new_costs = optimizer.run_iterations(decomposition, resume_state=state)
+
+        return optimizer, decomposition, old_costs, new_costs
+
+    def start_pool(self):
+        """Starts the worker processes shared by all parallel work of a run.
+
+        Both the chunks of cut candidates of the cut evaluator and the pairs of
+        reoptimize_pairs are sent to this pool, which run_iterations closes
+        when it returns. Does nothing without workers or if already started.
+        """
+        if self.num_workers <= 1 or self.pool is not None:
+            return
+
+        settings = dict(self.settings(), num_workers=0, concurrent_pairs=False,
+                        profile=False, checkpoint_path=None)
+        self.pool = Pool(processes=self.num_workers,
+                         initializer=_init_pair_worker,
+                         initargs=(settings,))
+        self.cut_evaluator.pool = self.pool
+
+    def close_pool(self):
+        """Stops the worker processes started by start_pool, if any."""
+        if self.pool is None:
+            return
+
+        self.cut_evaluator.pool = None
+        self.pool.close()
+        self.pool.join()
+        self.pool = None
 
     def get_sorted_costs(self, decomposition: Decomposition) -> List[Tuple[int, float]]:
         """Helper function for calculating and sorting costs of all cells in decoms.
@@ -56,76 +269,204 @@ class ChiOptimizer():
 
     @time_execution
     def run_iterations(self,
-                       decomposition: Decomposition) -> Tuple[List[Tuple[int, float]],
-                                                              List[Tuple[int, float]]]:
+                       decomposition: Decomposition,
+                       resume_state: Optional[Dict] = None) -> Tuple[List[Tuple[int, float]],
+                                                                     List[Tuple[int, float]]]:
         """
         Performs pairwise reoptimization on the poylgon with given robot initial
         position.
 
+        Iterations stop early on the termination criteria of the optimizer. The
+        reason is recorded in self.run_stats together with the number of
+        iterations run and the maximum chi before every iteration.
+
+        With a checkpoint_path, the decomposition and the state of the run are
+        checkpointed on the configured intervals and once the run ends. If any
+        checkpoint failed to be written, its error is raised once the run has
+        ended, with self.run_stats already filled in.
+
+        With num_workers > 1, one pool of worker processes is used for the whole
+        run and closed before returning.
+
         Args:
             decomposition: A set of polygon representing the decomposition. Mutated in this func.
-            cell_to_site_map: A mapping between robot and starting location.
+            resume_state: State of an interrupted run saved in a checkpoint, the
+                run continues from it. See resume.
         Returns:
             New decomposition
             List of original costs
             List of new chi costs
         """
-        for i in range(self.num_iterations):
-
+        self.start_pool()
+        try:
+            return self._iterate(decomposition, resume_state)
+        finally:
+            self.close_pool()
+
+    def _iterate(self,
+                 decomposition: Decomposition,
+                 resume_state: Optional[Dict]) -> Tuple[List[Tuple[int, float]],
+                                                        List[Tuple[int, float]]]:
+        """Iterations of run_iterations, with the worker pool already started."""
+        start = perf_counter()
+
+        scheduler = None
+        if self.scheduled and not self.concurrent_pairs:
+            scheduler = PairScheduler(decomposition, self.cost_func)
+            original_chi_costs = scheduler.sorted_costs()
+        else:
+            # Store orignal stats for monitoring performance of the algorithm.
+            original_chi_costs = self.get_sorted_costs(decomposition)
+
+        stop_reason = 'max_iterations'
+        num_iterations = 0
+        plateau = 0
+        last_max_cost = None
+        max_chi_history: List[float] = []
+
+        if resume_state is not None:
+            # Time spent before the interruption counts towards the time limit.
+            start -= resume_state['seconds']
+            original_chi_costs = [tuple(cost) for cost in resume_state['original_costs']]
+            num_iterations = resume_state['iterations']
+            plateau = resume_state['plateau']
+            last_max_cost = resume_state['last_max_cost']
+            max_chi_history = list(resume_state['max_chi_history'])
+            self.logger.info("Resuming after %d iterations.", num_iterations)
+
+        checkpointer = None
+        if self.checkpoint_path is not None:
+            checkpointer = Checkpointer(self.checkpoint_path,
+                                        every_iterations=self.checkpoint_iterations,
+                                        every_seconds=self.checkpoint_seconds)
+
+        def checkpoint_state(stop_reason: Optional[str] = None) -> Dict:
+            return {
+                'settings': self.settings(),
+                'iterations': num_iterations,
+                'seconds': perf_counter() - start,
+                'original_costs': original_chi_costs,
+                'max_chi_history': list(max_chi_history),
+                'plateau': plateau,
+                'last_max_cost': last_max_cost,
+                'stop_reason': stop_reason,
+            }
+
+        for i in range(num_iterations, self.num_iterations):
+            if self.time_limit is not None and perf_counter() - start >= self.time_limit:
+                stop_reason = 'time_limit'
+                break
+
+            with self.profiler.scope('iteration', i), self.profiler.timer('iteration'):
+
+                if scheduler is not None:
+                    max_cell_id, max_cost = scheduler.max_cell()
+                    self.logger.info("Iteration: %3d/%3d: Max cost: %d %f", i, self.num_iterations,
+                                     max_cell_id, max_cost)
+                else:
+                    sorted_chi_costs = self.get_sorted_costs(decomposition)
+                    max_cost = sorted_chi_costs[0][1]
+                    self.logger.info("Iteration: %3d/%3d: Costs: %s", i, self.num_iterations,
+                                     sorted_chi_costs)
+
+                if last_max_cost is not None:
+                    improvement = (last_max_cost - max_cost) / max(last_max_cost, 1e-12)
+                    plateau = plateau + 1 if improvement <= self.plateau_tolerance else 0
+                    if self.plateau_iterations is not None and plateau >= self.plateau_iterations:
+                        stop_reason = 'plateau'
+                        break
+                last_max_cost = max_cost
+                max_chi_history.append(max_cost)
+                num_iterations += 1
+
+                if scheduler is not None:
+                    made_cut = self.scheduled_step(decomposition, scheduler)
+                else:
+                    made_cut = False
+                    if self.concurrent_pairs:
+                        num_reopted = self.reoptimize_pairs(decomposition, sorted_chi_costs)
+                        self.logger.info("Iteration: %3d/%3d: Reoptimized %d pairs.", i,
+                                         self.num_iterations, num_reopted)
+                        made_cut = num_reopted > 0
+
+                    if not made_cut:
+                        made_cut = self.dft_search(decomposition,
+                                                   sorted_chi_costs[0][0],
+                                                   costs=dict(sorted_chi_costs))
+
+                if not made_cut:
+                    self.logger.info("Iteration: %3d/%3d: No cut was made!", i,
+                                     self.num_iterations)
+                    # The scheduler has no pair left, the search would only repeat itself.
+                    if self.stop_on_no_cut or scheduler is not None:
+                        stop_reason = 'no_cut'
+                        break
+
+            if checkpointer is not None and checkpointer.due(num_iterations):
+                with self.profiler.timer('checkpoint'):
+                    checkpointer.save(decomposition, checkpoint_state())
+
+        if scheduler is not None:
+            sorted_chi_costs = scheduler.sorted_costs()
+        else:
             sorted_chi_costs = self.get_sorted_costs(decomposition)
-            self.logger.info("Iteration: %3d/%3d: Costs: %s", i, self.num_iterations,
-                             sorted_chi_costs)
+        new_chi_costs = list(sorted_chi_costs)
 
-            if i == 0:
-                # Store orignal stats for monitoring performance of the algorithm.
-                original_chi_costs = list(sorted_chi_costs)
+        if checkpointer is not None:
+            checkpointer.save(decomposition, checkpoint_state(stop_reason), wait=True)
+            self.logger.info("Checkpoints: %s", checkpointer.stats())
 
-            adjacency_matrix = compute_adjacency(decomposition)
+        self.run_stats = {
+            'iterations': num_iterations,
+            'stop_reason': stop_reason,
+            'max_chi_history': max_chi_history,
+            'seconds': perf_counter() - start,
+            'initial_max_chi': original_chi_costs[0][1] if original_chi_costs else None,
+            'final_max_chi': new_chi_costs[0][1] if new_chi_costs else None,
+        }
 
-            if not self.dft_recursion(decomposition,
-                                      adjacency_matrix,
-                                      sorted_chi_costs[0][0]):
-                self.logger.info("Iteration: %3d/%3d: No cut was made!", i, self.num_iterations)
+        self.logger.info("Final costs: %s", sorted_chi_costs)
+        self.logger.info("Stopped after %d iterations: %s", num_iterations, stop_reason)
+        self.logger.info("Chi cache: %s", self.cost_func.stats())
 
-        sorted_chi_costs = self.get_sorted_costs(decomposition)
-        new_chi_costs = list(sorted_chi_costs)
+        scored = self.cut_evaluator.counters['scored']
+        pruned = self.cut_evaluator.counters['pruned']
+        self.logger.info("Cut evaluation: %d scored, %d pruned by lower bound (%.1f%%)",
+                         scored, pruned, 100.0 * pruned / max(scored + pruned, 1))
+        if self.profiler.enabled:
+            self.logger.info("Profile: %s", self.profiler.totals.summary())
 
-        self.logger.info("Final costs: %s", sorted_chi_costs)
+        if checkpointer is not None:
+            # A failed checkpoint leaves the run unresumable, it must not pass unnoticed.
+            checkpointer.close()
 
         return original_chi_costs, new_chi_costs
 
-    def dft_recursion(self,
-                      decomposition: Decomposition,
-                      adjacency_matrix,
-                      max_vertex_id: int) -> bool:
+    def dft_search(self,
+                   decomposition: Decomposition,
+                   max_vertex_id: int,
+                   costs: Optional[Dict[int, float]] = None) -> bool:
         """
-        This is a recursive function that explores all pairs of cells starting with
-        one with the highest cost. The purpose is to re-optimize cuts of adjacent
-        cells such that the maximum cost over all cells in the map is minimized.
+        Depth first traversal of the adjacency graph that explores pairs of cells
+        starting with the one with the highest cost. The purpose is to re-optimize
+        cuts of adjacent cells such that the maximum cost over all cells in the map
+        is minimized. The first successful reoptimization ends the search.
 
-        Assumption:
-            The adjacency value for a cell with iteself should be None
+        The traversal keeps an explicit stack instead of recursing. A cell whose
+        subtree failed fails again as long as nothing was cut, so every cell is
+        expanded at most once and every directed pair is tried at most once. The
+        search is additionally bounded by max_search_depth and max_expansions.
 
         Params:
-            decomposition: A decomposition as a list of polygons.
-            adjacency_matrix: A matrix representing adjacency relationships between
-                              cells in the decomposition.
+            decomposition: A decomposition as a list of polygons. Its adjacency graph is
+                           kept up to date by the decomposition itself.
             max_vertex_id: Index of a cell in the decomposition with the maximum cost.
+            costs: Known chi of cells, e.g. from get_sorted_costs. Missing costs are
+                   computed once per search.
 
         Returns:
             True if a succseful reoptimization was performed. False otherwise.
         """
-        max_vertex_cost = self.cost_func(*decomposition[max_vertex_id])
-        self.logger.debug("Cell %d has maximum cost of : %f", max_vertex_id, max_vertex_cost)
-
-        neighbor_cell_ids = [cell_id for cell_id, is_adjacent in
-                             enumerate(adjacency_matrix[max_vertex_id]) if is_adjacent]
-        neighbor_chi_costs = [(cell_id, self.cost_func(*decomposition[cell_id])) for cell_id in
-                              neighbor_cell_ids]
-
-        sorted_neighbor_chi_costs = sorted(neighbor_chi_costs, key=lambda v: v[1], reverse=False)
-        self.logger.debug("Neghbours and chi: %s", sorted_neighbor_chi_costs)
-
         # Idea: For a given cell with maximum cost, search all the neighbors
         #        and sort them based on their chi cost.
         #
@@ -133,61 +474,236 @@ class ChiOptimizer():
         #        reoptimize the cut seperating them in hopes of minimizing the max
         #        chi of the two cells.
         #
-        #        If the reoptimization was succesful then stop recursion and complete
+        #        If the reoptimization was succesful then stop the search and complete
         #        the iteration.
         #
         #        If the reoptimization was not succesful then it is possible that we
         #        are in a local minimum and we need to disturb the search in hopes
         #        of finiding a better solution.
         #
-        #        For that purpose, we call the recursive function on the that
-        #        neighboring cell. And so on.
+        #        For that purpose, we expand that neighboring cell the same way,
+        #        unless an earlier branch already expanded it. And so on.
         #
-        #        If the recursive function for that neighboring cell does not yield
-        #        a reoptimization then we pick the next lowest neighbor and attempt
-        #        recursive reoptimization. This ensures DFT of the adjacency graph.
-
-        # List is traversed from lowest cost to highest.
-        for cell_id, cell_chi_cost in sorted_neighbor_chi_costs:
-
-            if cell_chi_cost < max_vertex_cost:
-                self.logger.debug("Attempting reopt %d and %d.", max_vertex_id, cell_id)
-
-                result = self.compute_pairwise_optimal(
-                    polygon_a=decomposition[max_vertex_id][0],
-                    polygon_b=decomposition[cell_id][0],
-                    robot_a_init_pos=decomposition[max_vertex_id][1],
-                    robot_b_init_pos=decomposition[cell_id][1])
-
-                if result is None:
-                    if self.dft_recursion(decomposition=decomposition,
-                                          adjacency_matrix=adjacency_matrix,
-                                          max_vertex_id=cell_id):
-                        return True
-                    continue
+        #        If that neighboring cell does not yield a reoptimization then we pick
+        #        the next lowest neighbor of its parent. This ensures DFT of the
+        #        adjacency graph.
+        costs = dict(costs or {})
+
+        def cost(cell_id: int) -> float:
+            if cell_id not in costs:
+                costs[cell_id] = self.cost_func(*decomposition[cell_id])
+            return costs[cell_id]
+
+        def expand(cell_id: int):
+            """Neighbours cheaper than the cell, from lowest cost to highest."""
+            self.profiler.count('dft_expansions')
+            neighbor_chi_costs = [(neighbor_id, cost(neighbor_id))
+                                  for neighbor_id in sorted(decomposition.adjacency[cell_id])]
+            sorted_neighbor_chi_costs = sorted(neighbor_chi_costs, key=lambda v: v[1])
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Cell %d has cost of : %f", cell_id, cost(cell_id))
+                self.logger.debug("Neghbours and chi: %s", sorted_neighbor_chi_costs)
+            return iter([neighbor_id for neighbor_id, neighbor_cost in sorted_neighbor_chi_costs
+                         if neighbor_cost < cost(cell_id)])
+
+        expanded = {max_vertex_id}
+        stack = [(max_vertex_id, expand(max_vertex_id))]
+
+        while stack:
+            vertex_id, neighbors = stack[-1]
+            depth = len(stack) - 1
+
+            for cell_id in neighbors:
+                self.logger.debug("Attempting reopt %d and %d.", vertex_id, cell_id)
+
+                with self.profiler.scope('level', depth):
+                    result = self.compute_pairwise_optimal(
+                        polygon_a=decomposition[vertex_id][0],
+                        polygon_b=decomposition[cell_id][0],
+                        robot_a_init_pos=decomposition[vertex_id][1],
+                        robot_b_init_pos=decomposition[cell_id][1])
 
                 if result:
-                    # Resolve cell-robot assignments here.
-                    # This is to avoid the issue of cell assignments that
-                    # don't make any sense after polygon cut.
-                    chi_a0 = self.cost_func(result[0], decomposition[max_vertex_id][1])
-                    chi_a1 = self.cost_func(result[1], decomposition[max_vertex_id][1])
-                    chi_b0 = self.cost_func(result[0], decomposition[cell_id][1])
-                    chi_b1 = self.cost_func(result[1], decomposition[cell_id][1])
+                    new_vertex_cell, new_cell = self.assign_pieces(
+                        result,
+                        robot_a_init_pos=decomposition[vertex_id][1],
+                        robot_b_init_pos=decomposition[cell_id][1])
+                    with self.profiler.timer('adjacency'):
+                        decomposition.update_cells({vertex_id: new_vertex_cell,
+                                                    cell_id: new_cell})
+
+                    self.logger.debug("Cells %d and %d reopted.", vertex_id, cell_id)
+
+                    return True
+
+                if cell_id in expanded:
+                    continue
+
+                if self.max_search_depth is not None and depth + 1 > self.max_search_depth:
+                    self.profiler.count('dft_depth_limited')
+                    continue
 
-                    if max(chi_a0, chi_b1) <= max(chi_a1, chi_b0):
-                        decomposition[max_vertex_id], decomposition[cell_id] = result
-                    else:
-                        decomposition[cell_idx], decomposition[max_vertex_id] = result
+                if self.max_expansions is not None and len(expanded) >= self.max_expansions:
+                    self.profiler.count('dft_budget_exhausted')
+                    self.logger.debug("Search stopped after expanding %d cells.",
+                                      len(expanded))
+                    return False
+
+                expanded.add(cell_id)
+                stack.append((cell_id, expand(cell_id)))
+                break
+            else:
+                stack.pop()
+
+        return False
 
-                    self.logger.debug("Cells %d and %d reopted.", max_vertex_id, cell_id)
+    def scheduled_step(self,
+                       decomposition: Decomposition,
+                       scheduler: PairScheduler) -> bool:
+        """
+        Tries the pairs of the scheduler in order until one of them improves.
 
-                    adjacency_matrix = compute_adjacency(decomposition)
+        Params:
+            decomposition: Decomposition the scheduler was built on. Mutated in this func.
+            scheduler: Priority queues of cells and pairs, updated with the new cut.
 
+        Returns:
+            True if a succseful reoptimization was performed. False once no pair
+            is left to try.
+        """
+        for cell_a, cell_b in scheduler.candidate_pairs():
+            self.logger.debug("Attempting reopt %d and %d.", cell_a, cell_b)
+
+            result = self.compute_pairwise_optimal(
+                polygon_a=decomposition[cell_a][0],
+                polygon_b=decomposition[cell_b][0],
+                robot_a_init_pos=decomposition[cell_a][1],
+                robot_b_init_pos=decomposition[cell_b][1])
+
+            if result:
+                new_cell_a, new_cell_b = self.assign_pieces(
+                    result,
+                    robot_a_init_pos=decomposition[cell_a][1],
+                    robot_b_init_pos=decomposition[cell_b][1])
+                with self.profiler.timer('adjacency'):
+                    updated = decomposition.update_cells({cell_a: new_cell_a,
+                                                          cell_b: new_cell_b})
+
+                if updated:
+                    scheduler.update((cell_a, cell_b))
+                    self.logger.debug("Cells %d and %d reopted.", cell_a, cell_b)
                     return True
 
+            scheduler.mark_failed(cell_a, cell_b)
+
         return False
 
+    def assign_pieces(self,
+                      pieces: Tuple[Polygon, Polygon],
+                      robot_a_init_pos: Point,
+                      robot_b_init_pos: Point) -> Tuple[Polygon, Polygon]:
+        """
+        Resolves cell-robot assignments after a cut. This is to avoid the issue of
+        cell assignments that don't make any sense after polygon cut.
+
+        Args:
+            pieces: The two polygons resulting from a cut.
+            robot_a_init_pos: Location of robot A.
+            robot_b_init_pos: Location of robot B.
+
+        Returns:
+            The pieces ordered as (cell of robot A, cell of robot B).
+        """
+        chi_a0 = self.cost_func(pieces[0], robot_a_init_pos)
+        chi_a1 = self.cost_func(pieces[1], robot_a_init_pos)
+        chi_b0 = self.cost_func(pieces[0], robot_b_init_pos)
+        chi_b1 = self.cost_func(pieces[1], robot_b_init_pos)
+
+        if max(chi_a0, chi_b1) <= max(chi_a1, chi_b0):
+            return pieces[0], pieces[1]
+        return pieces[1], pieces[0]
+
+    def match_pairs(self,
+                    decomposition: Decomposition,
+                    sorted_chi_costs: List[Tuple[int, float]]) -> List[Tuple[int, int]]:
+        """
+        Greedily matches adjacent cells into disjoint pairs.
+
+        Cells are visited from the highest cost to the lowest. Every cell that is
+        still unmatched is paired with its cheapest unmatched neighbour, provided
+        that neighbour is cheaper, which is the pair dft_search tries first.
+
+        Args:
+            decomposition: Decomposition object.
+            sorted_chi_costs: Costs of all cells, see get_sorted_costs.
+
+        Returns:
+            List of (expensive cell id, cheaper cell id) pairs, no cell appears twice.
+        """
+        costs = dict(sorted_chi_costs)
+        matched = set()
+        pairs = []
+
+        for cell_id, cell_chi_cost in sorted_chi_costs:
+            if cell_id in matched:
+                continue
+
+            candidates = [(costs[neighbor_id], neighbor_id) for neighbor_id in
+                          decomposition.neighbors(cell_id)
+                          if neighbor_id not in matched and costs[neighbor_id] < cell_chi_cost]
+            if not candidates:
+                continue
+
+            _, neighbor_id = min(candidates)
+            matched.update((cell_id, neighbor_id))
+            pairs.append((cell_id, neighbor_id))
+
+        return pairs
+
+    def reoptimize_pairs(self,
+                         decomposition: Decomposition,
+                         sorted_chi_costs: List[Tuple[int, float]]) -> int:
+        """
+        Reoptimizes a matching of disjoint adjacent pairs in one go.
+
+        Pairs share no cell, so they are reoptimized independently, on the
+        pool of start_pool if num_workers > 1. All resulting cells are
+        committed to the decomposition at once after every pair is done.
+
+        Args:
+            decomposition: Decomposition object. Mutated in this func.
+            sorted_chi_costs: Costs of all cells, see get_sorted_costs.
+
+        Returns:
+            Number of pairs that received a new cut.
+        """
+        pairs = self.match_pairs(decomposition, sorted_chi_costs)
+        self.logger.debug("Matched pairs: %s", pairs)
+        self.profiler.count('pairs_matched', len(pairs))
+
+        tasks = [(decomposition[cell_a][0], decomposition[cell_b][0],
+                  decomposition[cell_a][1], decomposition[cell_b][1]) for cell_a, cell_b in pairs]
+
+        if self.num_workers > 1 and len(tasks) > 1:
+            self.start_pool()
+            wkb_tasks = [tuple(geom.wkb for geom in task) for task in tasks]
+            results = [None if result is None else tuple(wkb.loads(piece) for piece in result)
+                       for result in self.pool.map(_reoptimize_pair, wkb_tasks, chunksize=1)]
+        else:
+            results = [self.compute_pairwise_optimal(*task) for task in tasks]
+
+        new_cells: Dict[int, Polygon] = {}
+        for (cell_a, cell_b), task, result in zip(pairs, tasks, results):
+            if not result:
+                continue
+            new_cells[cell_a], new_cells[cell_b] = self.assign_pieces(result, task[2], task[3])
+
+        if new_cells:
+            with self.profiler.timer('adjacency'):
+                decomposition.update_cells(new_cells)
+
+        return len(new_cells) // 2
+
     def compute_pairwise_optimal(self,
                                  polygon_a: Polygon,
                                  polygon_b: Polygon,
@@ -216,6 +732,8 @@ class ChiOptimizer():
             cut exists or original cut is the best.
         """
 
+        self.profiler.count('pairs_tried')
+
         if not polygon_a or not polygon_b:
             self.logger.warning("Pairwise reoptimization is requested on an empty polygon.")
             return None
@@ -260,56 +778,89 @@ class ChiOptimizer():
                                 " non polygon.")
             return None
 
-        # This search for better cut is over any two pairs of samples points on the exterior.
-        # The number of points along the exterior is controlled by num_samples.
-        search_space: List[Tuple] = []
-        poly_exterior = polygon_union.exterior
-        for distance in linspace(0, poly_exterior.length, self.num_samples):
-            solution_candidate = poly_exterior.interpolate(distance)
-            search_space.append((solution_candidate.x, solution_candidate.y))
-
         # Record the costs at this point
         chi_1 = self.cost_func(polygon_a, robot_a_init_pos)
         chi_2 = self.cost_func(polygon_b, robot_b_init_pos)
 
         init_max_chi = max(chi_1, chi_2)
 
-        min_max_chi_final = sys.float_info.max
-        min_candidate: Tuple[Tuple]
+        with self.profiler.timer('search'):
+            if self.adaptive_search is not None:
+                best_cut, counters = self.adaptive_search.search(polygon_union,
+                                                                 robot_a_init_pos,
+                                                                 robot_b_init_pos)
+            else:
+                best_cut, counters = self.dense_search(polygon_union,
+                                                       robot_a_init_pos,
+                                                       robot_b_init_pos)
+        self.candidate_counters.update(counters)
+        for name, value in counters.items():
+            self.profiler.count('candidates_' + name, value)
+        self.logger.debug("Cut candidates: %s", counters)
+
+        if best_cut is None or init_max_chi < best_cut[1]:
+            self.logger.debug("No cut results in minimum altitude")
 
-        for cut_edge in product(search_space, repeat=2):
-            self.logger.debug("Cut candidate: %s", cut_edge)
+            return None
 
-            poly_split = polygon_split(polygon_union, LineString(cut_edge))
+        min_candidate, min_max_chi_final, new_polygons = best_cut
+        self.profiler.count('pairs_improved')
 
-            if not poly_split:
-                self.logger.debug("%s Split Line: %s", "BAD ", cut_edge)
-                continue
+        # The cut is a numpy array, only format it when it is logged.
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Computed min max chi as: %4.2f", min_max_chi_final)
+            self.logger.debug("Cut: %s", min_candidate.tolist())
 
-            self.logger.debug("%s Split Line: %s", 'GOOD', cut_edge)
-            # Resolve cell-robot assignments here.
-            # This is to avoid the issue of cell assignments that
-            # don't make any sense after polygon cut.
-            chi_a0 = self.cost_func(poly_split[0], robot_a_init_pos)
-            chi_a1 = self.cost_func(poly_split[1], robot_a_init_pos)
-            chi_b0 = self.cost_func(poly_split[0], robot_b_init_pos)
-            chi_b1 = self.cost_func(poly_split[1], robot_b_init_pos)
+        return new_polygons
 
-            max_chi_cases = [max(chi_a0, chi_b1),
-                             max(chi_a1, chi_b0)]
+    def dense_search(self,
+                     polygon_union: Polygon,
+                     robot_a_init_pos: Point,
+                     robot_b_init_pos: Point):
+        """
+        Tries every pair of num_samples uniform samples along the exterior.
 
-            min_max_chi = min(max_chi_cases)
-            if min_max_chi <= min_max_chi_final:
-                min_candidate = cut_edge
-                min_max_chi_final = min_max_chi
+        Symmetric and degenerate pairs are pruned before evaluation.
 
-        if init_max_chi < min_max_chi_final:
-            self.logger.debug("No cut results in minimum altitude")
+        Args:
+            polygon_union: Polygon to split.
+            robot_a_init_pos: Location of robot A.
+            robot_b_init_pos: Location of robot B.
 
-            return None
+        Returns:
+            ((best cut, its min-max chi, resulting pieces), counters). The first
+            element is None if no candidate is a valid split.
+        """
+        boundary = Boundary(polygon_union.exterior)
+        search_space, sample_edges = boundary.uniform(self.num_samples)
+        cut_candidates, counters = generate_cut_candidates(search_space, sample_edges)
 
-        self.logger.debug("Computed min max chi as: %4.2f", min_max_chi_final)
-        self.logger.debug("Cut: %s", min_candidate)
+        best_cut = self.cut_evaluator.evaluate(polygon_union,
+                                               cut_candidates,
+                                               robot_a_init_pos,
+                                               robot_b_init_pos,
+                                               boundary=boundary)
+        if best_cut is None:
+            return None, counters
 
-        new_polygons = polygon_split(polygon_union, LineString(min_candidate))
-        return new_polygons
+        min_candidate_idx, min_max_chi, new_polygons = best_cut
+        return (cut_candidates[min_candidate_idx], min_max_chi, new_polygons), counters
+
+
+# Optimizer of a worker process, set up once per run by _init_pair_worker.
+_pair_worker_state: Dict = {}
+
+
+def _init_pair_worker(settings: Dict):
+    """Pool initializer, builds a serial optimizer with the parent's settings."""
+    _pair_worker_state['optimizer'] = ChiOptimizer(**settings)
+
+
+def _reoptimize_pair(task: Tuple[bytes, bytes, bytes, bytes]) -> Optional[Tuple[bytes, bytes]]:
+    """Pool task, reoptimizes one pair given as WKB of both cells and both sites."""
+    result = _pair_worker_state['optimizer'].compute_pairwise_optimal(
+        *(wkb.loads(geom) for geom in task))
+
+    if result is None:
+        return None
+    return tuple(piece.wkb for piece in result)
@@ -0,0 +1,89 @@
+"""Generation of cut candidates for pairwise reoptimization."""
+from typing import Dict, Tuple
+
+import numpy as np
+from shapely.geometry import LinearRing
+
+from utils.boundary import Boundary
+
+
+def sample_boundary(ring: LinearRing, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Samples points uniformly along a ring, end points included.
+
+    Args:
+        ring (LinearRing): Ring to sample, usually a polygon exterior.
+        num_samples (int): Number of samples.
+
+    Returns:
+        (points, edges): See Boundary.sample.
+    """
+    return Boundary(ring).uniform(num_samples)
+
+
+def chord_masks(points_a: np.ndarray,
+                edges_a: np.ndarray,
+                points_b: np.ndarray,
+                edges_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Flags chords that can not split a polygon.
+
+    Args:
+        points_a, points_b (np.ndarray): End points of the chords, shape (N, 2).
+        edges_a, edges_b (np.ndarray): Edge ids of the end points, see Boundary.sample.
+
+    Returns:
+        (degenerate, same_edge): Boolean masks of chords with coincident end
+        points and of chords whose end points share a boundary edge.
+    """
+    degenerate = np.all(np.isclose(points_a, points_b), axis=1)
+    same_edge = ((edges_a[:, :, None] == edges_b[:, None, :]).any(axis=(1, 2)) &
+                 ~degenerate)
+    return degenerate, same_edge
+
+
+def generate_cut_candidates(points: np.ndarray,
+                            edges: np.ndarray) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Enumerates chords between boundary samples that can split a polygon.
+
+    Only unordered pairs are kept, since (p, q) and (q, p) yield the same split.
+    Pairs with coincident end points and pairs whose end points share a boundary
+    edge are dropped, as such a chord runs along the boundary.
+
+    Args:
+        points (np.ndarray): Boundary samples of shape (N, 2).
+        edges (np.ndarray): Edge ids of every sample, see sample_boundary.
+
+    Returns:
+        (cuts, counters): Cuts of shape (M, 2, 2) in the order of the ordered
+        product of samples. Counters of candidates pruned per reason.
+    """
+    cuts, _, counters = generate_cut_pairs(points, edges)
+    return cuts, counters
+
+
+def generate_cut_pairs(points: np.ndarray,
+                       edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """Same as generate_cut_candidates, also returns the sample ids of every cut.
+
+    Returns:
+        (cuts, pairs, counters): Pairs of shape (M, 2) hold the sample ids of the
+        end points of every cut.
+    """
+    num_points = len(points)
+    first, second = np.triu_indices(num_points, k=1)
+
+    degenerate, same_edge = chord_masks(points[first], edges[first],
+                                        points[second], edges[second])
+    keep = ~(degenerate | same_edge)
+
+    counters = {
+        'ordered': num_points * num_points,
+        'diagonal': num_points,
+        'symmetric': len(first),
+        'degenerate': int(degenerate.sum()),
+        'same_edge': int(same_edge.sum()),
+        'candidates': int(keep.sum()),
+    }
+
+    pairs = np.stack((first[keep], second[keep]), axis=1)
+    cuts = np.stack((points[pairs[:, 0]], points[pairs[:, 1]]), axis=1)
+    return cuts, pairs, counters
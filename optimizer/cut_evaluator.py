@@ -0,0 +1,460 @@
+"""Batch evaluation of candidate cuts for pairwise reoptimization."""
+import heapq
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely import wkb
+from shapely.geometry import Polygon, Point
+
+from log_utils import get_logger, TraceSampler
+from utils import PolygonSplitter
+from utils.boundary import Boundary
+from utils.profiler import NULL_PROFILER
+from metrics.chi import chi_from_terms, compute_num_contours, contour_lower_bound
+
+
+# Configure logging properties for this module
+logger = get_logger("cut_evaluator")
+trace = TraceSampler(logger, every=100)
+
+# Costs within this relative distance of the best one are rescored on the
+# pieces of the cut that would actually be made, see CutEvaluator.best_cut.
+TIE_TOLERANCE = 1e-9
+
+
+class CutEvaluator():
+    """Scores a whole set of candidate cuts of a polygon at once.
+
+    Every valid cut splits the polygon into two pieces. The geometric terms of
+    chi (distance, area, number of contours) are extracted once per piece and
+    stacked into arrays, the four robot-to-piece chi values and the min-max
+    assignment are then computed for all candidates with numpy.
+
+    Contours do not depend on the robot, so each piece is contoured once
+    instead of once per robot. When only the best cuts matter, contouring is
+    skipped for cuts whose chi without the angular term already exceeds them.
+
+    With more than one worker, candidates are scored in chunks on a process
+    pool. Tasks carry the polygon and robot sites as WKB along with the cut
+    coordinates, so one pool serves every polygon, see pool.
+    """
+    __slots__ = (
+        'radius',
+        'lin_penalty',
+        'ang_penalty',
+        'num_workers',
+        'chunk_size',
+        'counters',
+        'profiler',
+        'pool',
+    )
+
+    def __init__(self,
+                 radius: float = 0.1,
+                 lin_penalty: float = 1.0,
+                 ang_penalty: float = 10 * 1.0 / 360.,
+                 num_workers: int = 0,
+                 chunk_size: int = 256,
+                 profiler=NULL_PROFILER,
+                 pool: Optional[Pool] = None):
+        """
+        Args:
+            radius (float): Radius of the robot footprint.
+            lin_penalty (float): Weight of the linear terms of chi.
+            ang_penalty (float): Weight of the angular term of chi.
+            num_workers (int): Number of worker processes, 0 or 1 evaluates serially.
+            chunk_size (int): Number of candidates per worker task.
+            profiler (Profiler): Records splitting and contouring time. Worker
+                processes only report their counters.
+            pool (Pool): Worker processes owned by the caller, e.g. the pool of a
+                ChiOptimizer run, which also closes it. Without one, every
+                parallel scoring starts and stops a pool of its own.
+        """
+        self.radius = radius
+        self.lin_penalty = lin_penalty
+        self.ang_penalty = ang_penalty
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.counters: Counter = Counter()
+        self.profiler = profiler
+        self.pool = pool
+
+    def is_parallel(self, num_candidates: int) -> bool:
+        """True if that many candidates are worth fanning out to worker processes."""
+        return self.num_workers > 1 and num_candidates > self.chunk_size
+
+    def split_candidates(self,
+                         polygon: Polygon,
+                         cuts: np.ndarray,
+                         boundary: Optional[Boundary] = None) -> List[Optional[Tuple[Polygon,
+                                                                                     Polygon]]]:
+        """Splits the polygon along every candidate cut.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            cuts (np.ndarray): Array of shape (N, 2, 2) with cut end points.
+            boundary (Boundary): Parameterization of the polygon exterior, if
+                already built.
+
+        Returns:
+            list of N splits, None where the cut is not a valid split.
+        """
+        with self.profiler.timer('split'):
+            return PolygonSplitter(polygon, boundary).split_chords(cuts)
+
+    def score_splits(self,
+                     splits: List[Optional[Tuple[Polygon, Polygon]]],
+                     robot_a_init_pos: Point,
+                     robot_b_init_pos: Point,
+                     keep: Optional[int] = None) -> np.ndarray:
+        """Computes the min-max chi of every split.
+
+        With keep set, splits are scored in stages. Distance and area terms are
+        computed for all splits and, with no contours, bound chi from below.
+        Contours are then counted in order of increasing bound, and only as long
+        as the bound does not exceed the keep-th best cost found so far.
+
+        Args:
+            splits (List): Output of split_candidates.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+            keep (int): Number of best costs that must be exact. None scores all
+                splits exactly.
+
+        Returns:
+            array of N costs, inf for invalid splits. Pruned splits hold their
+            lower bound, which is above all of the keep best costs.
+        """
+        costs = np.full(len(splits), np.inf)
+        valid_ids = [idx for idx, split in enumerate(splits) if split]
+        self.profiler.count('cuts_invalid', len(splits) - len(valid_ids))
+        if not valid_ids:
+            return costs
+
+        # Array of shape (N, 2) of the pieces, area and distance terms are
+        # computed by GEOS for all of them in one call each.
+        pieces = np.empty((len(valid_ids), 2), dtype=object)
+        pieces[:] = [splits[idx] for idx in valid_ids]
+
+        areas = shapely.area(pieces)
+        dist_a = shapely.distance(pieces, robot_a_init_pos)
+        dist_b = shapely.distance(pieces, robot_b_init_pos)
+
+        if keep is None:
+            with self.profiler.timer('contours'):
+                contours = np.array([[compute_num_contours(piece, radius=self.radius)
+                                      for piece in split] for split in pieces])
+            costs[valid_ids] = self.assignment_costs(dist_a, dist_b, areas, contours)
+            self.counters['scored'] += len(pieces)
+            self.profiler.count('cuts_scored', len(pieces))
+            return costs
+
+        contours = np.array([[contour_lower_bound(piece, radius=self.radius)
+                              for piece in split] for split in pieces], dtype=float)
+        bounds = self.assignment_costs(dist_a, dist_b, areas, contours)
+
+        scored = np.zeros(len(pieces), dtype=bool)
+        best_costs: List[float] = []
+        tracing = trace.enabled()
+        for idx in np.argsort(bounds, kind='stable'):
+            threshold = -best_costs[0] if len(best_costs) == keep else np.inf
+            if tracing:
+                trace("Split %d: lower bound %.2f, threshold %.2f", valid_ids[idx],
+                      bounds[idx], threshold)
+
+            # Splits tied with the keep-th best cost are still scored, the
+            # caller may break ties by position.
+            if bounds[idx] > threshold:
+                break
+
+            # Contour the larger piece first, its count alone often lifts the
+            # bound above the threshold.
+            for piece_idx in np.argsort(-areas[idx], kind='stable'):
+                piece = pieces[idx][piece_idx]
+                limit = self.contour_limit(dist_a[idx], dist_b[idx], areas[idx],
+                                           contours[idx], piece_idx, threshold)
+                with self.profiler.timer('contours'):
+                    contours[idx, piece_idx] = compute_num_contours(piece, radius=self.radius,
+                                                                    limit=limit)
+                cost = float(self.assignment_costs(dist_a[idx], dist_b[idx], areas[idx],
+                                                   contours[idx]))
+                if cost > threshold:
+                    break
+
+                # Counting stopped early but fell short of the threshold.
+                if limit is not None and contours[idx, piece_idx] >= limit:
+                    with self.profiler.timer('contours'):
+                        contours[idx, piece_idx] = compute_num_contours(piece,
+                                                                        radius=self.radius)
+                    cost = float(self.assignment_costs(dist_a[idx], dist_b[idx], areas[idx],
+                                                       contours[idx]))
+                    if cost > threshold:
+                        break
+            else:
+                scored[idx] = True
+                if len(best_costs) < keep:
+                    heapq.heappush(best_costs, -cost)
+                else:
+                    heapq.heapreplace(best_costs, -cost)
+
+        # Contours of pruned splits are lower bounds, so are their costs.
+        costs[valid_ids] = self.assignment_costs(dist_a, dist_b, areas, contours)
+        self.counters['scored'] += int(scored.sum())
+        self.counters['pruned'] += int((~scored).sum())
+        self.profiler.count('cuts_scored', int(scored.sum()))
+        self.profiler.count('cuts_pruned', int((~scored).sum()))
+        return costs
+
+    def contour_limit(self,
+                      dist_a: np.ndarray,
+                      dist_b: np.ndarray,
+                      areas: np.ndarray,
+                      contours: np.ndarray,
+                      piece_idx: int,
+                      threshold: float) -> Optional[int]:
+        """Number of contours of one piece that lifts the cost of a split above threshold.
+
+        Args:
+            dist_a, dist_b, areas, contours (np.ndarray): Terms of both pieces of
+                the split, contours of the other piece may be a lower bound.
+            piece_idx (int): Piece whose contours are about to be counted.
+            threshold (float): Cost to exceed.
+
+        Returns:
+            contour count or None if counting can not stop early.
+        """
+        if not np.isfinite(threshold) or self.ang_penalty <= 0:
+            return None
+
+        other_idx = 1 - piece_idx
+        no_contours = np.zeros(2)
+        chi_piece = chi_from_terms(np.array([dist_a[piece_idx], dist_b[piece_idx]]),
+                                   areas[piece_idx], no_contours, radius=self.radius,
+                                   lin_penalty=self.lin_penalty, ang_penalty=self.ang_penalty)
+        chi_other = chi_from_terms(np.array([dist_b[other_idx], dist_a[other_idx]]),
+                                   areas[other_idx], contours[other_idx], radius=self.radius,
+                                   lin_penalty=self.lin_penalty, ang_penalty=self.ang_penalty)
+
+        # The split exceeds the threshold once both assignments do. An assignment
+        # whose other piece already does needs no contours from this one.
+        needed = np.floor((threshold - chi_piece) / (self.ang_penalty * 360.)) + 1
+        needed[chi_other > threshold] = 0
+        return max(int(needed.max()), 0)
+
+    def assignment_costs(self,
+                         dist_a: np.ndarray,
+                         dist_b: np.ndarray,
+                         areas: np.ndarray,
+                         contours: np.ndarray) -> np.ndarray:
+        """Min-max chi of splits given the terms of both pieces along the last axis."""
+        chi_a = chi_from_terms(dist_a, areas, contours, radius=self.radius,
+                               lin_penalty=self.lin_penalty, ang_penalty=self.ang_penalty)
+        chi_b = chi_from_terms(dist_b, areas, contours, radius=self.radius,
+                               lin_penalty=self.lin_penalty, ang_penalty=self.ang_penalty)
+
+        # Resolve cell-robot assignments here. Robot A either gets the first
+        # piece and robot B the second one, or the other way around.
+        return np.minimum(np.maximum(chi_a[..., 0], chi_b[..., 1]),
+                          np.maximum(chi_a[..., 1], chi_b[..., 0]))
+
+    def score(self,
+              polygon: Polygon,
+              cuts: np.ndarray,
+              robot_a_init_pos: Point,
+              robot_b_init_pos: Point,
+              keep: Optional[int] = None,
+              boundary: Optional[Boundary] = None) -> np.ndarray:
+        """Computes the min-max chi of every candidate cut.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            cuts (np.ndarray): Array of shape (N, 2, 2) with cut end points.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+            keep (int): Number of best costs that must be exact, see score_splits.
+            boundary (Boundary): Parameterization of the polygon exterior, if
+                already built.
+
+        Returns:
+            array of N costs, inf for invalid splits.
+        """
+        if self.is_parallel(len(cuts)):
+            return self.score_parallel(polygon, cuts, robot_a_init_pos, robot_b_init_pos,
+                                       keep=keep)
+
+        splits = self.split_candidates(polygon, cuts, boundary)
+        return self.score_splits(splits, robot_a_init_pos, robot_b_init_pos, keep=keep)
+
+    def evaluate(self,
+                 polygon: Polygon,
+                 cuts: np.ndarray,
+                 robot_a_init_pos: Point,
+                 robot_b_init_pos: Point,
+                 boundary: Optional[Boundary] = None) -> Optional[Tuple[int, float,
+                                                                        Tuple[Polygon, Polygon]]]:
+        """Finds the cut minimizing the maximum chi of the two resulting pieces.
+
+        Ties are broken in favour of the last candidate, which matches the
+        original serial search over candidates.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            cuts (np.ndarray): Array of shape (N, 2, 2) with cut end points.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+            boundary (Boundary): Parameterization of the polygon exterior, if
+                already built.
+
+        Returns:
+            (index of the best cut, its min-max chi, resulting pieces). None if no
+            candidate is a valid split.
+        """
+        if self.is_parallel(len(cuts)):
+            splits = None
+            costs = self.score_parallel(polygon, cuts, robot_a_init_pos, robot_b_init_pos,
+                                        keep=1)
+        else:
+            splits = self.split_candidates(polygon, cuts, boundary)
+            costs = self.score_splits(splits, robot_a_init_pos, robot_b_init_pos, keep=1)
+
+        return self.best_cut(polygon, cuts, costs, robot_a_init_pos, robot_b_init_pos, boundary)
+
+    def best_cut(self,
+                 polygon: Polygon,
+                 cuts: np.ndarray,
+                 costs: np.ndarray,
+                 robot_a_init_pos: Point,
+                 robot_b_init_pos: Point,
+                 boundary: Optional[Boundary] = None) -> Optional[Tuple[int, float,
+                                                                        Tuple[Polygon, Polygon]]]:
+        """Picks the cut to make from scored candidates, the last one on ties.
+
+        Candidates are scored on pieces built from coordinates, whose costs can
+        differ from the ones of the GEOS pieces in the last bits. The cut that
+        is made gets the pieces of split_chord, and all candidates within
+        TIE_TOLERANCE of the best cost are rescored on them, so near ties are
+        broken exactly as the GEOS pieces would break them.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            cuts (np.ndarray): Array of shape (N, 2, 2) with cut end points.
+            costs (np.ndarray): Costs of the cuts, exact at least for the best ones.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+            boundary (Boundary): Parameterization of the polygon exterior, if
+                already built.
+
+        Returns:
+            (index of the best cut, its min-max chi, resulting pieces). None if no
+            candidate is a valid split.
+        """
+        best_idx = last_argmin(costs)
+        if best_idx is None:
+            return None
+
+        best_cost = costs[best_idx]
+        tied = np.flatnonzero(costs <= best_cost + TIE_TOLERANCE * abs(best_cost))
+        splitter = PolygonSplitter(polygon, boundary)
+        splits = [splitter.split_chord(cuts[idx]) for idx in tied]
+        tied_costs = self.score_splits(splits, robot_a_init_pos, robot_b_init_pos)
+
+        tied_idx = last_argmin(tied_costs)
+        if tied_idx is None:
+            return None
+        return int(tied[tied_idx]), float(tied_costs[tied_idx]), splits[tied_idx]
+
+    def score_parallel(self,
+                       polygon: Polygon,
+                       cuts: np.ndarray,
+                       robot_a_init_pos: Point,
+                       robot_b_init_pos: Point,
+                       keep: Optional[int] = None) -> np.ndarray:
+        """Scores candidates in chunks on a pool of worker processes.
+
+        Chunks are reassembled in order. Every chunk prunes against its own best
+        costs, so the keep best costs are identical to the ones of the serial
+        path.
+
+        Args:
+            polygon (Polygon): Polygon to split.
+            cuts (np.ndarray): Array of shape (N, 2, 2) with cut end points.
+            robot_a_init_pos (Point): Location of robot A.
+            robot_b_init_pos (Point): Location of robot B.
+            keep (int): Number of best costs that must be exact, see score_splits.
+
+        Returns:
+            array of N costs, inf for invalid splits.
+        """
+        shared = (polygon.wkb, robot_a_init_pos.wkb, robot_b_init_pos.wkb,
+                  self.radius, self.lin_penalty, self.ang_penalty, keep)
+        tasks = [(shared, cuts[start:start + self.chunk_size])
+                 for start in range(0, len(cuts), self.chunk_size)]
+
+        with self.profiler.timer('score_parallel'):
+            if self.pool is not None:
+                results = self.pool.map(_score_chunk, tasks, chunksize=1)
+            else:
+                with Pool(processes=min(self.num_workers, len(tasks))) as pool:
+                    results = pool.map(_score_chunk, tasks, chunksize=1)
+
+        for costs, counters in results:
+            self.counters.update(counters)
+            self.profiler.count('cuts_invalid', int(np.isinf(costs).sum()))
+            self.profiler.count('cuts_scored', counters['scored'])
+            self.profiler.count('cuts_pruned', counters['pruned'])
+
+        return np.concatenate([costs for costs, _ in results])
+
+
+def last_argmin(costs: np.ndarray) -> Optional[int]:
+    """Index of the last minimal finite cost, None if there is no finite cost."""
+    if not len(costs) or not np.isfinite(costs).any():
+        return None
+    return len(costs) - 1 - int(np.argmin(costs[::-1]))
+
+
+# State of a worker process, the decoded arguments shared by the chunks of
+# the last score_parallel call it worked on.
+_worker_state: Dict = {}
+
+
+def _load_shared(shared: Tuple):
+    """Decodes the polygon, robot sites and evaluator settings of a call once per worker."""
+    if _worker_state.get('shared') == shared:
+        return
+
+    polygon_wkb, robot_a_wkb, robot_b_wkb, radius, lin_penalty, ang_penalty, keep = shared
+    _worker_state['shared'] = shared
+    _worker_state['polygon'] = wkb.loads(polygon_wkb)
+    _worker_state['robot_a_init_pos'] = wkb.loads(robot_a_wkb)
+    _worker_state['robot_b_init_pos'] = wkb.loads(robot_b_wkb)
+    _worker_state['evaluator'] = CutEvaluator(radius=radius,
+                                              lin_penalty=lin_penalty,
+                                              ang_penalty=ang_penalty)
+    _worker_state['keep'] = keep
+
+
+def _score_chunk(task: Tuple[Tuple, np.ndarray]) -> Tuple[np.ndarray, Counter]:
+    """Pool task, scores a chunk of candidates.
+
+    Args:
+        task: (arguments shared by all chunks of a call, see score_parallel,
+            array of shape (N, 2, 2) with the cuts of this chunk)
+
+    Returns:
+        (costs, scoring counters of this chunk)
+    """
+    shared, cuts = task
+    _load_shared(shared)
+    evaluator = _worker_state['evaluator']
+    evaluator.counters.clear()
+
+    splits = evaluator.split_candidates(_worker_state['polygon'], cuts)
+    costs = evaluator.score_splits(splits,
+                                   _worker_state['robot_a_init_pos'],
+                                   _worker_state['robot_b_init_pos'],
+                                   keep=_worker_state['keep'])
+    return costs, Counter(evaluator.counters)
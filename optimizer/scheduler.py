@@ -0,0 +1,125 @@
+"""Priority queues of cells and cell pairs for pairwise reoptimization."""
+import heapq
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from decomposition import Decomposition
+
+
+class PairScheduler():
+    """Keeps cells ordered by chi and adjacent pairs by expected improvement.
+
+    Cells sit in a max-heap keyed by chi. Every adjacent pair sits in a second
+    heap, the more expensive cell first, keyed by half the difference of their
+    costs, which bounds how much a new cut between them can lower the larger
+    cost. Both heaps are lazy: every cell carries a version that is bumped
+    when the cell changes, and entries with an outdated version are dropped
+    when they reach the top. An accepted cut therefore only pushes entries for
+    the two changed cells and their neighbours.
+
+    A pair that failed to improve is not tried again until one of its cells
+    changes. The search has converged once no pair is left to try.
+    """
+    __slots__ = (
+        'decomposition',
+        'cost_func',
+        'costs',
+        'versions',
+        '_cells',
+        '_pairs',
+        '_failed',
+    )
+
+    def __init__(self,
+                 decomposition: Decomposition,
+                 cost_func: Callable):
+        """
+        Args:
+            decomposition (Decomposition): Decomposition to schedule, its cells
+                must only change through update.
+            cost_func (Callable): Chi of a cell given its polygon and robot site.
+        """
+        self.decomposition = decomposition
+        self.cost_func = cost_func
+
+        self.costs: Dict[int, float] = {cell_id: cost_func(cell, site)
+                                        for cell_id, cell, site in decomposition.items()}
+        self.versions: Dict[int, int] = dict.fromkeys(self.costs, 0)
+        self._failed: Set[Tuple[int, int, int, int]] = set()
+
+        self._cells: List[Tuple[float, int, int]] = [(-cost, cell_id, 0)
+                                                     for cell_id, cost in self.costs.items()]
+        heapq.heapify(self._cells)
+
+        self._pairs: List[Tuple[float, int, int, int, int]] = []
+        for cell_id in self.costs:
+            for neighbor_id in decomposition.neighbors(cell_id):
+                if neighbor_id > cell_id:
+                    self._push_pair(cell_id, neighbor_id)
+
+    def _pair_key(self, cell_a: int, cell_b: int) -> Tuple[int, int, int, int]:
+        return cell_a, self.versions[cell_a], cell_b, self.versions[cell_b]
+
+    def _push_pair(self, cell_a: int, cell_b: int):
+        """Queues a pair, the more expensive cell first. Pairs of equal cost can not improve."""
+        if self.costs[cell_a] < self.costs[cell_b]:
+            cell_a, cell_b = cell_b, cell_a
+        if self.costs[cell_a] == self.costs[cell_b]:
+            return
+
+        gain = (self.costs[cell_a] - self.costs[cell_b]) / 2
+        heapq.heappush(self._pairs, (-gain,) + self._pair_key(cell_a, cell_b))
+
+    def is_open(self, cell_a: int, cell_b: int) -> bool:
+        """True if the pair has not failed since either cell last changed."""
+        return self._pair_key(cell_a, cell_b) not in self._failed
+
+    def max_cell(self) -> Tuple[int, float]:
+        """Cell with the maximum cost and its cost."""
+        while self._cells[0][2] != self.versions[self._cells[0][1]]:
+            heapq.heappop(self._cells)
+        return self._cells[0][1], -self._cells[0][0]
+
+    def sorted_costs(self) -> List[Tuple[int, float]]:
+        """Costs of all cells from highest to lowest, see ChiOptimizer.get_sorted_costs."""
+        return sorted(self.costs.items(), key=lambda v: v[1], reverse=True)
+
+    def candidate_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Pairs worth reoptimizing, more expensive cell first.
+
+        The pairs of the cell with the maximum cost come first, starting with
+        its cheapest neighbour. The remaining open pairs follow in order of
+        expected improvement. Pairs are yielded lazily, the caller stops at the
+        first one that improves and must report every failure with mark_failed.
+        """
+        max_cell_id, max_cost = self.max_cell()
+        neighbor_ids = sorted(self.decomposition.neighbors(max_cell_id),
+                              key=lambda neighbor_id: (self.costs[neighbor_id], neighbor_id))
+        first_pairs = [(max_cell_id, neighbor_id) for neighbor_id in neighbor_ids
+                       if self.costs[neighbor_id] < max_cost]
+        for cell_a, cell_b in first_pairs:
+            if self.is_open(cell_a, cell_b):
+                yield cell_a, cell_b
+
+        while self._pairs:
+            _, cell_a, version_a, cell_b, version_b = heapq.heappop(self._pairs)
+            if (version_a, version_b) != (self.versions[cell_a], self.versions[cell_b]):
+                continue
+            if (cell_a, cell_b) not in first_pairs and self.is_open(cell_a, cell_b):
+                yield cell_a, cell_b
+
+    def mark_failed(self, cell_a: int, cell_b: int):
+        """Records that the pair can not be improved in the current state of both cells."""
+        self._failed.add(self._pair_key(cell_a, cell_b))
+
+    def update(self, cell_ids: Iterable[int]):
+        """Rescores cells after they changed in the decomposition and requeues their pairs."""
+        cell_ids = list(cell_ids)
+        for cell_id in cell_ids:
+            self.costs[cell_id] = self.cost_func(*self.decomposition[cell_id])
+            self.versions[cell_id] += 1
+            heapq.heappush(self._cells, (-self.costs[cell_id], cell_id, self.versions[cell_id]))
+
+        pairs = {tuple(sorted((cell_id, neighbor_id))) for cell_id in cell_ids
+                 for neighbor_id in self.decomposition.neighbors(cell_id)}
+        for cell_a, cell_b in sorted(pairs):
+            self._push_pair(cell_a, cell_b)
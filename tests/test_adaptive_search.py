@@ -0,0 +1,68 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from optimizer.adaptive_search import AdaptiveCutSearch
+from optimizer.cut_candidates import generate_cut_candidates, sample_boundary
+from optimizer.cut_evaluator import CutEvaluator
+
+
+class RecordingEvaluator(CutEvaluator):
+    """Keeps every cut it scores."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.scored = []
+
+    def score(self, polygon, cuts, *args, **kwargs):
+        self.scored.extend(cuts)
+        return super().score(polygon, cuts, *args, **kwargs)
+
+
+# Test suite for the coarse-to-fine cut search
+class adaptiveCutSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.evaluator = CutEvaluator(radius=0.2, lin_penalty=1.0, ang_penalty=100/360.)
+        self.P = Polygon([(0, 0), (3, 0), (3, 1), (1, 1), (1, 2), (0, 2)])
+        self.init_a = Point((0, 0))
+        self.init_b = Point((3, 1))
+
+    def test_matches_dense_search(self):
+        points, edges = sample_boundary(self.P.exterior, 50)
+        cuts, _ = generate_cut_candidates(points, edges)
+        _, dense_cost, _ = self.evaluator.evaluate(self.P, cuts, self.init_a, self.init_b)
+
+        search = AdaptiveCutSearch(self.evaluator, num_samples=12, tolerance=0.02)
+        (cut, cost, (P1, P2)), counters = search.search(self.P, self.init_a, self.init_b)
+
+        self.assertLessEqual(cost, dense_cost * 1.02)
+        self.assertLess(counters['coarse'] + counters['refined'], len(cuts))
+        self.assertGreater(counters['levels'], 0)
+        # Pruning counters of the coarse candidates are kept.
+        self.assertEqual(counters['candidates'], counters['coarse'])
+        self.assertGreater(counters['same_edge'], 0)
+        self.assertEqual(cut.shape, (2, 2))
+        self.assertAlmostEqual(P1.area + P2.area, self.P.area)
+
+    def test_no_chord_scored_twice(self):
+        evaluator = RecordingEvaluator(radius=0.2, lin_penalty=1.0, ang_penalty=100/360.)
+        search = AdaptiveCutSearch(evaluator, num_samples=12, tolerance=0.02, window=3)
+        _, counters = search.search(self.P, self.init_a, self.init_b)
+
+        keys = {tuple(sorted(map(tuple, np.round(cut, 9).tolist()))) for cut in evaluator.scored}
+        self.assertEqual(len(keys), len(evaluator.scored))
+        self.assertEqual(counters['coarse'] + counters['refined'], len(evaluator.scored))
+
+    def test_no_refinement_below_tolerance(self):
+        search = AdaptiveCutSearch(self.evaluator, num_samples=12, tolerance=np.inf)
+        _, counters = search.search(self.P, self.init_a, self.init_b)
+
+        self.assertEqual(counters['levels'], 0)
+        self.assertEqual(counters['refined'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# pylint: disable=missing-function-docstring
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from batch.runner import expand_jobs, run_batch
+
+
+MANIFEST = {
+    'defaults': {'num_iterations': 2, 'radius': 0.2, 'num_samples': 10},
+    'maps': [{'poly_id': 3}, {'name': 'missing', 'snapshot': 'missing.snap'}],
+    'settings': [{'name': 'default'}, {'name': 'scheduled', 'scheduled': True}],
+}
+
+
+# Test suite for the batch runner
+class batchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp_dir.name, "results.jsonl")
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.tmp_dir.cleanup()
+
+    def test_expand_jobs(self):
+        jobs = expand_jobs(MANIFEST)
+        self.assertEqual([job['job_id'] for job in jobs],
+                         ['map_3/default', 'map_3/scheduled',
+                          'missing/default', 'missing/scheduled'])
+        self.assertEqual(jobs[1]['settings'],
+                         {'num_iterations': 2, 'radius': 0.2, 'num_samples': 10,
+                          'scheduled': True})
+
+        with self.assertRaises(ValueError):
+            expand_jobs(dict(MANIFEST, maps=[{'poly_id': 3}, {'poly_id': 3}]))
+
+    def test_run_and_resume(self):
+        jobs = expand_jobs(MANIFEST)
+        counts = run_batch(jobs, self.output)
+        self.assertEqual(counts, {'ok': 2, 'error': 2, 'skipped': 0})
+
+        with open(self.output) as results_file:
+            results = {result['job_id']: result for result in map(json.loads, results_file)}
+        self.assertEqual(results['map_3/default']['final_max_chi'],
+                         results['map_3/default']['new_costs'][0][1])
+        self.assertEqual(len(results['map_3/default']['cells']), 4)
+        self.assertEqual(results['missing/default']['status'], 'error')
+
+        # Only the failed jobs run again.
+        counts = run_batch(jobs, self.output, resume=True)
+        self.assertEqual(counts, {'ok': 0, 'error': 2, 'skipped': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+import numpy as np
+from shapely.geometry import Polygon
+
+from utils.polygons import decomposition_generator
+from utils.boundary import Boundary
+
+
+# Test suite for arc-length parameterized boundaries
+class boundaryTest(unittest.TestCase):
+
+    def test_points_match_interpolate(self):
+        for poly_id in range(11):
+            ring = decomposition_generator(poly_id).polygon.exterior
+            boundary = Boundary(ring)
+            distances = np.linspace(0, ring.length, 101)
+
+            with self.subTest(poly_id=poly_id):
+                np.testing.assert_array_equal(
+                    boundary.points(distances),
+                    [ring.interpolate(distance).coords[0] for distance in distances])
+
+    def test_edges_of_samples(self):
+        boundary = Boundary(Polygon([(0, 0), (2, 0), (2, 1), (0, 1)]))
+        points, edges = boundary.sample(np.array([0., 1., 2., 6.]))
+
+        np.testing.assert_array_equal(points, [(0, 0), (1, 0), (2, 0), (0, 0)])
+        np.testing.assert_array_equal(edges, [(3, 0), (0, 0), (0, 1), (3, 0)])
+        np.testing.assert_array_equal(boundary.vertex_distances, [0, 2, 3, 5])
+
+    def test_locate(self):
+        boundary = Boundary(Polygon([(0, 0), (2, 0), (2, 1), (0, 1)]))
+        positions = boundary.locate(np.array([(1, 0), (2, 0.5), (1, 0.5)]))
+
+        np.testing.assert_array_equal(positions[:2], [1, 2.5])
+        self.assertTrue(np.isnan(positions[2]))
+        np.testing.assert_array_equal(boundary.contains_points(np.array([(1, 0.5), (3, 0.5)])),
+                                      [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+import numpy as np
+
+from shapely.geometry import Polygon, box
+
+from decomposition import CellStore, Decomposition
+from optimizer import ChiOptimizer
+from utils.polygons import decomposition_generator
+
+
+def compact_copy(dec):
+    compact = Decomposition(dec.canonical_polygon, compact=True)
+    for cell_id in range(dec.num_cells):
+        compact.add_cell(dec.canonical_cells[cell_id])
+        compact.add_robot_site(cell_id, dec.canonical_robot_sites[cell_id])
+    return compact
+
+
+# Test suite for the array backed cell storage
+class cellStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = CellStore(cache_size=1)
+        self.square = [[(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 4.0)],
+                       [[(1.0, 1.0), (1.0, 2.0), (2.0, 2.0), (2.0, 1.0)]]]
+        self.store[0] = self.square
+        self.store[1] = box(4, 0, 5, 1)
+
+    def test_round_trip(self):
+        self.assertEqual(self.store.canonical(0), self.square)
+        self.assertTrue(self.store[0].equals_exact(Polygon(*self.square), 0))
+        self.assertTrue(self.store[1].equals(box(4, 0, 5, 1)))
+        self.assertEqual(sorted(self.store), [0, 1])
+
+    def test_polygon_rings_match_stored_rings(self):
+        for cell_id, cell in ((0, self.square), (1, box(4, 0, 5, 1))):
+            expected = CellStore.polygon_rings(cell)
+            rings = self.store.rings(cell_id)
+            self.assertEqual(len(rings), len(expected))
+            for ring, expected_ring in zip(rings, expected):
+                self.assertEqual(ring.tolist(), expected_ring.tolist())
+
+    def test_from_arrays(self):
+        coords = self.store.coords[:self.store.num_coords]
+        ring_bounds = self.store.ring_bounds[:self.store.num_rings]
+
+        store = CellStore.from_arrays(coords, ring_bounds, np.array([3, 5]), np.array([2, 1]))
+        self.assertEqual(store.canonical(3), self.square)
+        self.assertTrue(store[5].equals(box(4, 0, 5, 1)))
+
+        with self.assertLogs('cell_store', level='WARNING'):
+            self.assertIsNone(CellStore.from_arrays(coords, ring_bounds, np.array([3]),
+                                                    np.array([2])))
+            self.assertIsNone(CellStore.from_arrays(coords, ring_bounds, np.array([3, 3]),
+                                                    np.array([2, 1])))
+            self.assertIsNone(CellStore.from_arrays(coords[:8], ring_bounds, np.array([3, 5]),
+                                                    np.array([2, 1])))
+
+    def test_replace_and_repack(self):
+        self.store[0] = box(0, 0, 2, 2)
+        self.assertEqual(self.store.num_garbage, 8)
+
+        self.store.repack()
+        self.assertEqual(self.store.num_garbage, 0)
+        self.assertEqual(self.store.num_coords, 8)
+        self.assertTrue(self.store[0].equals(box(0, 0, 2, 2)))
+        self.assertTrue(self.store[1].equals(box(4, 0, 5, 1)))
+
+    def test_compact_decomposition(self):
+        for poly_id in (3, 7):
+            with self.subTest(poly_id=poly_id):
+                dec = decomposition_generator(poly_id)
+                compact = compact_copy(dec)
+                self.assertEqual(dict(compact.canonical_cells), dec.canonical_cells)
+
+                results = [ChiOptimizer(num_iterations=3, radius=0.2, num_samples=10)
+                           .run_iterations(decomposition) for decomposition in (dec, compact)]
+                self.assertEqual(results[0], results[1])
+                self.assertEqual(compact.adjacency, dec.adjacency)
+                for cell_id in range(dec.num_cells):
+                    self.assertTrue(compact.cells[cell_id].equals_exact(dec.cells[cell_id], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
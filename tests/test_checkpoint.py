@@ -0,0 +1,94 @@
+# pylint: disable=missing-function-docstring
+import os
+import tempfile
+import unittest
+
+from shapely.geometry import box
+
+from decomposition import Decomposition
+from optimizer import ChiOptimizer
+from optimizer.checkpoint import Checkpointer
+from utils.polygons import decomposition_generator
+
+
+SETTINGS = dict(radius=0.3, ang_penalty=100*1.0/360, num_samples=12, stop_on_no_cut=False)
+
+
+# Test suite for checkpointing and resuming optimizer runs
+class checkpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "run.snap")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_copy_is_independent(self):
+        dec = decomposition_generator(3)
+        copy = dec.copy()
+        dec[0] = box(0, 0, 1, 1)
+
+        self.assertFalse(copy.cells[0].equals(dec.cells[0]))
+        self.assertNotEqual(copy.adjacency, dec.adjacency)
+        self.assertEqual(copy.adjacency, decomposition_generator(3).adjacency)
+
+    def test_checkpointer(self):
+        checkpointer = Checkpointer(self.path, every_iterations=2)
+        self.assertFalse(checkpointer.due(1))
+        self.assertTrue(checkpointer.due(2))
+
+        dec = decomposition_generator(3)
+        self.assertTrue(checkpointer.save(dec, {'iterations': 2}, wait=True))
+        self.assertEqual(checkpointer.stats(), {'written': 1, 'skipped': 0, 'failed': 0})
+        self.assertEqual(Decomposition.read_metadata(self.path), {'iterations': 2})
+        self.assertEqual(Decomposition.load(self.path).adjacency, dec.adjacency)
+
+    def test_failed_write_is_raised_on_close(self):
+        dec = decomposition_generator(3)
+        # Breaks Decomposition.save itself on the writer thread.
+        dec.robot_sites[0] = None
+        checkpointer = Checkpointer(self.path)
+
+        with self.assertLogs('checkpoint', level='ERROR'), self.assertRaises(AttributeError):
+            checkpointer.save(dec, {'iterations': 1})
+            checkpointer.close()
+        self.assertEqual(checkpointer.stats()['failed'], 1)
+        self.assertFalse(os.path.exists(self.path))
+
+        # The error is raised once.
+        checkpointer.close()
+
+    def test_run_reports_failed_checkpoint(self):
+        path = os.path.join(self.tmp_dir.name, "missing", "run.snap")
+        optimizer = ChiOptimizer(num_iterations=2, checkpoint_path=path, checkpoint_iterations=1,
+                                 **SETTINGS)
+
+        with self.assertRaises(IOError):
+            optimizer.run_iterations(decomposition_generator(3))
+        self.assertEqual(optimizer.run_stats['iterations'], 2)
+
+    def test_resume_matches_uninterrupted_run(self):
+        for poly_id in (4, 7):
+            with self.subTest(poly_id=poly_id):
+                full = ChiOptimizer(num_iterations=6, **SETTINGS)
+                expected = full.run_iterations(decomposition_generator(poly_id))
+
+                # Stands in for a run interrupted after its third iteration.
+                ChiOptimizer(num_iterations=3, checkpoint_path=self.path, checkpoint_iterations=1,
+                             **SETTINGS).run_iterations(decomposition_generator(poly_id))
+                self.assertEqual(Decomposition.read_metadata(self.path)['iterations'], 3)
+
+                optimizer, _, old_costs, new_costs = ChiOptimizer.resume(self.path,
+                                                                         num_iterations=6)
+                self.assertEqual((old_costs, new_costs), expected)
+                self.assertEqual(optimizer.run_stats['max_chi_history'],
+                                 full.run_stats['max_chi_history'])
+                self.assertEqual(Decomposition.read_metadata(self.path)['iterations'], 6)
+
+    def test_resume_missing_checkpoint(self):
+        self.assertIsNone(ChiOptimizer.resume(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+import numpy as np
+from shapely.geometry import LineString, MultiPoint, Point, Polygon
+
+from utils.map_generator import generate_decomposition
+from utils.polygon_split import polygon_split
+from utils.polygons import decomposition_generator
+from metrics.chi import compute_num_contours, compute_num_contours_buffered, contour_lower_bound
+from metrics.chi import is_convex, num_contour_levels, compute_chi
+from metrics.chi_cache import ChiCache
+
+
+NUM_POLY_IDS = 11
+RADII = [0.05, 0.1, 0.2, 0.5, 1.0]
+
+
+def random_convex_polygons(count, seed):
+    rng = np.random.default_rng(seed)
+    polygons = []
+    while len(polygons) < count:
+        scale = rng.uniform(0.2, 6) * np.array([1, rng.uniform(0.2, 1)])
+        hull = MultiPoint(rng.uniform(0, 1, (rng.integers(3, 12), 2)) * scale).convex_hull
+        if isinstance(hull, Polygon):
+            polygons.append(hull)
+    return polygons
+
+
+def map_pieces(num_maps, seed):
+    rng = np.random.default_rng(seed)
+    polygons = []
+    for map_seed in range(num_maps):
+        decomposition = generate_decomposition(num_cells=10, seed=map_seed, radius=3.)
+        for _, cell, _ in decomposition.items():
+            polygons.append(cell)
+            for _ in range(2):
+                chord = LineString([cell.exterior.interpolate(rng.uniform(), normalized=True),
+                                    cell.exterior.interpolate(rng.uniform(), normalized=True)])
+                polygons.extend(polygon_split(cell, chord) or [])
+    return polygons
+
+
+# Test suite for contour counting
+class numContoursTest(unittest.TestCase):
+
+    def test_parity_with_buffering(self):
+        for poly_id in range(NUM_POLY_IDS):
+            decomposition = decomposition_generator(poly_id)
+            polygons = [decomposition.polygon] + [cell for _, cell, _ in decomposition.items()]
+
+            for idx, polygon in enumerate(polygons):
+                for radius in RADII:
+                    with self.subTest(poly_id=poly_id, polygon=idx, radius=radius):
+                        self.assertEqual(compute_num_contours(polygon, radius),
+                                         compute_num_contours_buffered(polygon, radius))
+
+    def test_convex_polygons(self):
+        for w, h in [(10, 1), (9, 1), (2.5, 1), (1, 1), (3, 3)]:
+            P = Polygon([(0, 0), (w, 0), (w, h), (0, h)])
+            for radius in RADII:
+                with self.subTest(w=w, h=h, radius=radius):
+                    self.assertEqual(compute_num_contours(P, radius),
+                                     compute_num_contours_buffered(P, radius))
+
+    def test_parity_random_polygons(self):
+        polygons = random_convex_polygons(300, seed=0) + map_pieces(5, seed=0)
+
+        for idx, polygon in enumerate(polygons):
+            for radius in RADII:
+                num_contours = compute_num_contours_buffered(polygon, radius)
+                with self.subTest(polygon=idx, radius=radius):
+                    self.assertEqual(compute_num_contours(polygon, radius), num_contours)
+
+                    # Counts stopped at the limit may only be lower bounds.
+                    limited = compute_num_contours(polygon, radius, limit=2)
+                    if num_contours < 2:
+                        self.assertEqual(limited, num_contours)
+                    else:
+                        self.assertGreaterEqual(limited, 2)
+                        self.assertLessEqual(limited, num_contours)
+
+    def test_lower_bound(self):
+        polygons = random_convex_polygons(300, seed=0) + map_pieces(5, seed=0)
+
+        for idx, polygon in enumerate(polygons):
+            for radius in RADII:
+                with self.subTest(polygon=idx, radius=radius):
+                    self.assertLessEqual(contour_lower_bound(polygon, radius),
+                                         compute_num_contours_buffered(polygon, radius))
+
+    def test_limit(self):
+        P = Polygon([(0, 0), (4, 0), (4, 4), (2, 1), (0, 4)])
+        num_contours = compute_num_contours(P, 0.1)
+
+        self.assertEqual(compute_num_contours(P, 0.1, limit=num_contours + 1), num_contours)
+        self.assertLess(compute_num_contours(P, 0.1, limit=2), num_contours)
+        self.assertGreaterEqual(compute_num_contours(P, 0.1, limit=2), 2)
+
+    def test_is_convex(self):
+        self.assertTrue(is_convex(Polygon([(0, 0), (4, 0), (0, 3)])))
+        self.assertFalse(is_convex(Polygon([(0, 0), (2, 0), (2, 2), (1, 1), (0, 2)])))
+        self.assertFalse(is_convex(Polygon([(0, 0), (3, 0), (3, 3), (0, 3)],
+                                           [[(1, 1), (2, 1), (2, 2), (1, 2)]])))
+
+    def test_num_contour_levels(self):
+        # Levels are eroded by 0.1, 0.2, 0.5, 1.0, ... for radius 0.2.
+        self.assertEqual(num_contour_levels(0.1, 0.2), 0)
+        self.assertEqual(num_contour_levels(0.5, 0.2), 2)
+        self.assertEqual(num_contour_levels(0.51, 0.2), 3)
+
+
+# Test suite for the chi cache
+class chiCacheTest(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = ChiCache(radius=0.2, lin_penalty=1.0, ang_penalty=1.0)
+        P = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+        site = Point((0, 0))
+
+        self.assertEqual(cache(P, site), compute_chi(P, site, 0.2, 1.0, 1.0))
+        self.assertEqual(cache(Polygon(P.exterior.coords), site), cache(P, site))
+        cache(P, Point((1, 1)))
+
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_eviction(self):
+        cache = ChiCache(maxsize=2)
+        P = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+
+        for x in range(3):
+            cache(P, Point((x, 0)))
+        cache(P, Point((0, 0)))
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()['evictions'], 2)
+        self.assertEqual(cache.stats()['misses'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from optimizer import ChiOptimizer
+from test_decomposition import grid_decomposition
+
+
+# Test suite for concurrent reoptimization of disjoint pairs
+class concurrentPairsTest(unittest.TestCase):
+
+    def test_match_pairs_is_disjoint(self):
+        dec = grid_decomposition(4, 3)
+        for cell_id in range(dec.num_cells):
+            dec.add_robot_site(cell_id, (0.0, 0.0))
+
+        optimizer = ChiOptimizer(radius=0.2)
+        sorted_chi_costs = optimizer.get_sorted_costs(dec)
+        costs = dict(sorted_chi_costs)
+        pairs = optimizer.match_pairs(dec, sorted_chi_costs)
+
+        cells = [cell_id for pair in pairs for cell_id in pair]
+        self.assertEqual(len(cells), len(set(cells)))
+        self.assertGreater(len(pairs), 1)
+        for cell_a, cell_b in pairs:
+            self.assertIn(cell_b, dec.neighbors(cell_a))
+            self.assertLess(costs[cell_b], costs[cell_a])
+
+    def test_concurrent_iterations(self):
+        dec = grid_decomposition(3, 2)
+        for cell_id in range(dec.num_cells):
+            dec.add_robot_site(cell_id, (0.0, 0.0))
+
+        optimizer = ChiOptimizer(num_iterations=2, radius=0.2, num_samples=10,
+                                 concurrent_pairs=True)
+        old_costs, new_costs = optimizer.run_iterations(dec)
+
+        self.assertLessEqual(new_costs[0][1], old_costs[0][1])
+        self.assertAlmostEqual(sum(cell.area for _, cell, _ in dec.items()), 6.0)
+
+    def test_worker_pool_matches_serial(self):
+        results = []
+        for num_workers in (0, 2):
+            dec = grid_decomposition(3, 2)
+            for cell_id in range(dec.num_cells):
+                dec.add_robot_site(cell_id, (0.0, 0.0))
+
+            optimizer = ChiOptimizer(num_iterations=2, radius=0.2, num_samples=10,
+                                     concurrent_pairs=True, num_workers=num_workers)
+            results.append(optimizer.run_iterations(dec))
+
+            # The pool of the run is closed when it ends.
+            self.assertIsNone(optimizer.pool)
+            self.assertIsNone(optimizer.cut_evaluator.pool)
+
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
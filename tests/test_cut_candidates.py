@@ -0,0 +1,38 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from shapely.geometry import LineString, Polygon
+
+from optimizer.cut_candidates import sample_boundary, generate_cut_candidates
+
+
+# Test suite for cut candidate generation
+class cutCandidatesTest(unittest.TestCase):
+
+    def test_sample_edges(self):
+        P = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+        points, edges = sample_boundary(P.exterior, 9)
+
+        self.assertEqual(tuple(points[1]), (1.0, 0.0))
+        self.assertEqual(tuple(edges[1]), (0, 0))
+        # Vertex (2, 0) joins the first and the second edge.
+        self.assertEqual(tuple(edges[2]), (0, 1))
+        # The last sample closes the ring at the first vertex.
+        self.assertEqual(tuple(edges[8]), (3, 0))
+
+    def test_pruning(self):
+        P = Polygon([(0, 0), (2, 0), (2, 2), (0, 2)])
+        points, edges = sample_boundary(P.exterior, 9)
+        cuts, counters = generate_cut_candidates(points, edges)
+
+        self.assertEqual(counters['ordered'], 81)
+        self.assertEqual(counters['symmetric'], 36)
+        self.assertEqual(counters['degenerate'], 1)
+        self.assertEqual(len(cuts), counters['candidates'])
+        self.assertLess(counters['candidates'], counters['ordered'] / 2)
+        for cut in cuts:
+            self.assertFalse(P.exterior.contains(LineString(cut)))
+
+
+if __name__ == '__main__':
+    unittest.main()
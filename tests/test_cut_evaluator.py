@@ -0,0 +1,114 @@
+# pylint: disable=missing-function-docstring
+import unittest
+from multiprocessing import Pool
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from metrics.chi import compute_chi
+from optimizer.cut_evaluator import CutEvaluator, last_argmin
+
+
+# Test suite for batch evaluation of cut candidates
+class cutEvaluatorTest(unittest.TestCase):
+
+    def test_last_argmin(self):
+        self.assertEqual(last_argmin(np.array([2.0, 1.0, 3.0, 1.0])), 3)
+        self.assertIsNone(last_argmin(np.array([np.inf, np.inf])))
+        self.assertIsNone(last_argmin(np.array([])))
+
+    def test_scores_match_compute_chi(self):
+        evaluator = CutEvaluator(radius=0.2, lin_penalty=1.0, ang_penalty=100/360.)
+        P = Polygon([(0, 0), (2, 0), (2, 1), (0, 1)])
+        init_a = Point((0, 0))
+        init_b = Point((2, 1))
+        cuts = np.array([[(0.5, 0), (0.5, 1)],
+                         [(0, 0), (0, 1)],
+                         [(1.5, 0), (0.5, 1)]])
+
+        splits = evaluator.split_candidates(P, cuts)
+        costs = evaluator.score_splits(splits, init_a, init_b)
+
+        self.assertIsNone(splits[1])
+        self.assertEqual(costs[1], np.inf)
+        for idx in (0, 2):
+            P1, P2 = splits[idx]
+            chi = lambda poly, pos: compute_chi(poly, pos, 0.2, 1.0, 100/360.)
+            expected = min(max(chi(P1, init_a), chi(P2, init_b)),
+                           max(chi(P2, init_a), chi(P1, init_b)))
+            self.assertEqual(costs[idx], expected)
+
+    def test_evaluate_returns_best_split(self):
+        evaluator = CutEvaluator(radius=0.2)
+        P = Polygon([(0, 0), (2, 0), (2, 1), (0, 1)])
+        cuts = np.array([[(0.5, 0), (0.5, 1)],
+                         [(1, 0), (1, 1)]])
+
+        best_idx, _, (P1, P2) = evaluator.evaluate(P, cuts, Point((0, 0)), Point((2, 0)))
+
+        self.assertEqual(best_idx, 1)
+        self.assertAlmostEqual(P1.area, 1.0)
+        self.assertAlmostEqual(P2.area, 1.0)
+
+    def test_pruning_keeps_best_costs(self):
+        evaluator = CutEvaluator(radius=0.1, lin_penalty=1.0, ang_penalty=100/360.)
+        P = Polygon([(0, 0), (3, 0), (3, 1), (1, 1), (1, 2), (0, 2)])
+        init_a = Point((0, 0))
+        init_b = Point((3, 1))
+        points = [P.exterior.interpolate(d).coords[0]
+                  for d in np.linspace(0, P.exterior.length, 20)]
+        cuts = np.array([(p, q) for p in points for q in points])
+        splits = evaluator.split_candidates(P, cuts)
+
+        exact = evaluator.score_splits(splits, init_a, init_b)
+        for keep in (1, 3):
+            with self.subTest(keep=keep):
+                evaluator.counters.clear()
+                pruned = evaluator.score_splits(splits, init_a, init_b, keep=keep)
+
+                self.assertGreater(evaluator.counters['pruned'], 0)
+                self.assertTrue(np.all(pruned <= exact))
+                best = np.argsort(exact, kind='stable')[:keep]
+                np.testing.assert_array_equal(np.argsort(pruned, kind='stable')[:keep], best)
+                np.testing.assert_array_equal(pruned[best], exact[best])
+                self.assertEqual(last_argmin(pruned), last_argmin(exact))
+
+    def test_parallel_matches_serial(self):
+        serial = CutEvaluator(radius=0.2)
+        parallel = CutEvaluator(radius=0.2, num_workers=2, chunk_size=4)
+        P = Polygon([(0, 0), (2, 0), (2, 1), (1, 2), (0, 1)])
+        init_a = Point((0, 0))
+        init_b = Point((2, 1))
+        points = [P.exterior.interpolate(d).coords[0]
+                  for d in np.linspace(0, P.exterior.length, 7)]
+        cuts = np.array([(p, q) for p in points for q in points])
+
+        self.assertTrue(parallel.is_parallel(len(cuts)))
+        np.testing.assert_array_equal(
+            parallel.score_parallel(P, cuts, init_a, init_b),
+            serial.score_splits(serial.split_candidates(P, cuts), init_a, init_b))
+        self.assertEqual(parallel.evaluate(P, cuts, init_a, init_b)[:2],
+                         serial.evaluate(P, cuts, init_a, init_b)[:2])
+
+    def test_shared_pool_serves_many_polygons(self):
+        serial = CutEvaluator(radius=0.2)
+        init_a = Point((0, 0))
+        init_b = Point((2, 1))
+        polygons = [Polygon([(0, 0), (2, 0), (2, 1), (1, 2), (0, 1)]),
+                    Polygon([(0, 0), (3, 0), (3, 1), (0, 1)])]
+
+        with Pool(processes=2) as pool:
+            parallel = CutEvaluator(radius=0.2, num_workers=2, chunk_size=4, pool=pool)
+            for P in polygons:
+                points = [P.exterior.interpolate(d).coords[0]
+                          for d in np.linspace(0, P.exterior.length, 7)]
+                cuts = np.array([(p, q) for p in points for q in points])
+                with self.subTest(polygon=P.wkt):
+                    np.testing.assert_array_equal(
+                        parallel.score_parallel(P, cuts, init_a, init_b, keep=1),
+                        serial.score_splits(serial.split_candidates(P, cuts), init_a, init_b,
+                                            keep=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from shapely.geometry import Polygon
+
+from decomposition import Decomposition, compute_adjacency
+from utils.polygons import decomposition_generator
+
+
+def grid_decomposition(num_cols, num_rows):
+    dec = Decomposition([[(0.0, 0.0), (num_cols, 0.0), (num_cols, num_rows), (0.0, num_rows)],
+                         []])
+    for row in range(num_rows):
+        for col in range(num_cols):
+            dec.add_cell([[(col, row), (col + 1, row), (col + 1, row + 1), (col, row + 1)], []])
+            dec.add_robot_site(row*num_cols + col, (col, row))
+    return dec
+
+
+def adjacency_as_matrix(dec):
+    return [[j in dec.adjacency[i] for j in range(dec.num_cells)] for i in range(dec.num_cells)]
+
+
+# Test suite for the decomposition container
+class decompositionTest(unittest.TestCase):
+
+    def test_adjacency_matches_compute_adjacency(self):
+        for poly_id in range(11):
+            dec = decomposition_generator(poly_id)
+            with self.subTest(poly_id=poly_id):
+                self.assertEqual(adjacency_as_matrix(dec), compute_adjacency(dec))
+
+    def test_grid_adjacency(self):
+        dec = grid_decomposition(6, 7)
+
+        self.assertEqual(dec.adjacency[0], {1: 1.0, 6: 1.0})
+        self.assertEqual(sorted(dec.adjacency[7]), [1, 6, 8, 13])
+        self.assertEqual(adjacency_as_matrix(dec), compute_adjacency(dec))
+
+    def test_adjacency_after_cut(self):
+        dec = grid_decomposition(2, 1)
+
+        # Move the shared edge, cells only touch at a point afterwards.
+        dec[0], dec[1] = (Polygon([(0, 0), (1, 0), (0, 1)]),
+                          Polygon([(1, 0), (2, 0), (2, 1), (0.5, 1)]))
+        self.assertEqual(dec.adjacency, {0: {}, 1: {}})
+
+        dec[0], dec[1] = (Polygon([(0, 0), (1, 0), (0.5, 1), (0, 1)]),
+                          Polygon([(1, 0), (2, 0), (2, 1), (0.5, 1)]))
+        self.assertAlmostEqual(dec.adjacency[0][1], 1.25**0.5)
+        self.assertEqual(adjacency_as_matrix(dec), compute_adjacency(dec))
+
+
+    def test_spatial_queries(self):
+        dec = grid_decomposition(20, 20)
+
+        self.assertEqual(dec.neighbors(21), [1, 20, 22, 41])
+        self.assertEqual(dec.containing_cell((3.5, 2.5)), 43)
+        self.assertEqual(dec.containing_cell((3.0, 2.5)), 42)
+        self.assertIsNone(dec.containing_cell((-1.0, 2.5)))
+        self.assertEqual(dec.nearest_cell((-1.0, 2.5)), 40)
+        self.assertEqual(dec.nearest_cell((-1.0, -1.0)), 0)
+        self.assertEqual(dec.cells_intersecting(Polygon([(0.5, 0.5), (1.5, 0.5), (1.5, 0.6)])),
+                         [0, 1])
+
+    def test_spatial_queries_after_updates(self):
+        dec = grid_decomposition(20, 20)
+
+        # Shift every cell by 100, more than enough to force a rebuild.
+        for cell_id in range(40):
+            cell, _ = dec[cell_id]
+            dec[cell_id] = Polygon([(x + 100, y) for x, y in cell.exterior.coords])
+
+        self.assertEqual(dec.containing_cell((100.5, 0.5)), 0)
+        self.assertEqual(dec.containing_cell((0.5, 0.5)), None)
+        self.assertEqual(dec.nearest_cell((0.5, 0.5)), 40)
+        self.assertEqual(dec.neighbors(0), [1, 20])
+        self.assertEqual(dec.neighbors(40), [41, 60])
+
+
+    def test_update_cells(self):
+        dec = grid_decomposition(3, 1)
+        left = Polygon([(0, 0), (1.5, 0), (1.5, 1), (0, 1)])
+        middle = Polygon([(1.5, 0), (2, 0), (2, 1), (1.5, 1)])
+
+        self.assertFalse(dec.update_cells({0: left, 1: Polygon()}))
+        self.assertFalse(dec.update_cells({0: left, 5: middle}))
+        self.assertTrue(dec[0][0].equals(Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])))
+
+        self.assertTrue(dec.update_cells({0: left, 1: middle}))
+        self.assertTrue(dec[0][0].equals(left))
+        self.assertEqual(dec.adjacency, {0: {1: 1.0}, 1: {0: 1.0, 2: 1.0}, 2: {1: 1.0}})
+
+
+if __name__ == '__main__':
+    unittest.main()
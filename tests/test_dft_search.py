@@ -0,0 +1,41 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from optimizer import ChiOptimizer
+from utils.map_generator import generate_decomposition
+
+
+def run(**kwargs):
+    dec = generate_decomposition(num_vertices=14, num_holes=2, num_cells=25, seed=0)
+    optimizer = ChiOptimizer(num_iterations=25, radius=0.3, ang_penalty=100*1.0/360,
+                             num_samples=12, profile=True, **kwargs)
+    _, new_costs = optimizer.run_iterations(dec)
+    return dec, new_costs, optimizer.profiler.summary()
+
+
+# Test suite for the bounded depth first search over cell pairs
+class dftSearchTest(unittest.TestCase):
+
+    def test_cells_expanded_once(self):
+        dec, _, summary = run()
+
+        self.assertIn('1', summary['level'])
+        for stats in summary['iteration'].values():
+            self.assertLessEqual(stats['counters']['dft_expansions'], dec.num_cells)
+
+    def test_depth_limit(self):
+        _, _, summary = run(max_search_depth=0)
+
+        self.assertEqual(list(summary['level']), ['0'])
+        self.assertGreater(summary['counters']['dft_depth_limited'], 0)
+
+    def test_expansion_budget(self):
+        _, _, summary = run(max_expansions=2)
+
+        self.assertGreater(summary['counters']['dft_budget_exhausted'], 0)
+        for stats in summary['iteration'].values():
+            self.assertLessEqual(stats['counters']['dft_expansions'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# pylint: disable=missing-function-docstring
+import logging
+import unittest
+
+from log_utils import get_logger, TraceSampler, TRACE
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+# Test suite for the logging helpers
+class loggerTest(unittest.TestCase):
+
+    def test_handlers_attached_once(self):
+        logger = get_logger("test_logger")
+        num_handlers = len(logger.handlers)
+
+        self.assertIs(get_logger("test_logger"), logger)
+        self.assertEqual(len(logger.handlers), num_handlers)
+
+    def test_trace_sampling(self):
+        logger = get_logger("test_trace")
+        handler = ListHandler()
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.addCleanup(logger.setLevel, logger.level)
+
+        trace = TraceSampler(logger, every=3)
+        self.assertFalse(trace.enabled())
+
+        logger.setLevel(TRACE)
+        self.assertTrue(trace.enabled())
+        for idx in range(7):
+            trace("Record %d", idx)
+
+        self.assertEqual(handler.messages, ["Record 0", "Record 3", "Record 6"])
+
+
+if __name__ == '__main__':
+    unittest.main()
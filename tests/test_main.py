@@ -0,0 +1,22 @@
+# pylint: disable=missing-function-docstring
+import sys
+import unittest
+
+from main import distributed_planner
+
+
+# Test suite for the planner entry point
+class mainTest(unittest.TestCase):
+
+    def test_headless(self):
+        plotting = 'visuals.coverage_plot' in sys.modules
+        old_costs, new_costs = distributed_planner(poly_id=3, num_reopt_iters=2, headless=True)
+
+        self.assertEqual(len(old_costs), len(new_costs))
+        self.assertLessEqual(new_costs[0][1], old_costs[0][1])
+        # Only the interactive mode and figure rendering import the plotting modules.
+        self.assertEqual('visuals.coverage_plot' in sys.modules, plotting)
+
+
+if __name__ == '__main__':
+    unittest.main()
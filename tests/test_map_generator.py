@@ -0,0 +1,53 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from utils.map_generator import generate_decomposition
+
+
+def canonical_cells(dec):
+    return [dec.canonical_cells[cell_id] for cell_id in range(dec.num_cells)]
+
+
+# Test suite for the procedural map generator
+class mapGeneratorTest(unittest.TestCase):
+
+    def test_sizes(self):
+        for method in ('voronoi', 'chords'):
+            with self.subTest(method=method):
+                dec = generate_decomposition(num_vertices=16, num_holes=3, num_cells=25,
+                                             method=method, seed=7)
+
+                self.assertEqual(len(dec.polygon.exterior.coords) - 1, 16)
+                self.assertEqual(len(dec.polygon.interiors), 3)
+                self.assertEqual(dec.num_cells, 25)
+                self.assertEqual(len(dec.robot_sites), 25)
+
+    def test_cells_partition_map(self):
+        for method in ('voronoi', 'chords'):
+            with self.subTest(method=method):
+                dec = generate_decomposition(num_vertices=12, num_holes=2, num_cells=30,
+                                             method=method, seed=3)
+
+                self.assertTrue(dec.polygon.is_valid)
+                self.assertAlmostEqual(sum(cell.area for _, cell, _ in dec.items()),
+                                       dec.polygon.area)
+                for cell_id, cell, site in dec.items():
+                    self.assertEqual(cell.geom_type, 'Polygon')
+                    self.assertTrue(cell.covers(site))
+                    self.assertTrue(dec.adjacency[cell_id])
+
+    def test_seeded(self):
+        dec_a = generate_decomposition(num_holes=2, num_cells=10, seed=5)
+        dec_b = generate_decomposition(num_holes=2, num_cells=10, seed=5)
+        dec_c = generate_decomposition(num_holes=2, num_cells=10, seed=6)
+
+        self.assertEqual(canonical_cells(dec_a), canonical_cells(dec_b))
+        self.assertEqual(dec_a.canonical_robot_sites, dec_b.canonical_robot_sites)
+        self.assertNotEqual(canonical_cells(dec_a), canonical_cells(dec_c))
+
+    def test_unknown_method(self):
+        self.assertIsNone(generate_decomposition(method='grid', seed=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Polygon
+
+from optimizer.cut_candidates import generate_cut_candidates, sample_boundary
+from utils.polygons import decomposition_generator
+from utils.polygon_split import polygon_split, PolygonSplitter
+
+
+def chords(polygon, num_samples):
+    ring = polygon.exterior
+    points = [ring.interpolate(d).coords[0] for d in np.linspace(0, ring.length, num_samples)]
+    return [LineString([p, q]) for p in points for q in points if p != q]
+
+
+# Test suite for splitting polygons along cuts
+class polygonSplitterTest(unittest.TestCase):
+
+    def assertSameSplit(self, polygon, line):
+        expected = polygon_split(polygon, line)
+        result = PolygonSplitter(polygon).split(line)
+
+        if expected is None:
+            self.assertIsNone(result)
+            return
+
+        self.assertIsNotNone(result)
+        by_area = lambda pieces: sorted(pieces, key=lambda piece: piece.area)
+        for piece, expected_piece in zip(by_area(result), by_area(expected)):
+            self.assertTrue(piece.is_valid)
+            self.assertAlmostEqual(piece.symmetric_difference(expected_piece).area, 0)
+
+    def test_matches_polygon_split_with_holes(self):
+        P = Polygon([(0, 0), (3, 0), (3, 2), (0, 2)],
+                    [[(0.5, 0.5), (1, 0.5), (1, 1.5), (0.5, 1.5)],
+                     [(2, 0.5), (2.5, 0.5), (2.5, 1), (2, 1)]])
+        for line in chords(P, 16):
+            with self.subTest(line=line.wkt):
+                self.assertSameSplit(P, line)
+
+    def test_matches_polygon_split_on_maps(self):
+        for poly_id in (0, 6, 9):
+            decomposition = decomposition_generator(poly_id)
+            polygons = [decomposition.polygon] + [cell for _, cell, _ in decomposition.items()]
+            for idx, polygon in enumerate(polygons):
+                for line in chords(polygon, 12):
+                    with self.subTest(poly_id=poly_id, polygon=idx, line=line.wkt):
+                        self.assertSameSplit(polygon, line)
+
+    def test_split_chords_accepts_what_polygon_split_accepts(self):
+        for poly_id in (0, 2, 7):
+            decomposition = decomposition_generator(poly_id)
+            for cell_id, neighbors in decomposition.adjacency.items():
+                for neighbor_id in neighbors:
+                    if neighbor_id < cell_id:
+                        continue
+                    union = decomposition[cell_id][0].union(decomposition[neighbor_id][0])
+                    if union.geom_type != 'Polygon':
+                        continue
+
+                    cuts, _ = generate_cut_candidates(*sample_boundary(union.exterior, 30))
+                    splits = PolygonSplitter(union).split_chords(cuts)
+                    expected = [polygon_split(union, LineString(cut)) is not None
+                                for cut in cuts]
+                    with self.subTest(poly_id=poly_id, cells=(cell_id, neighbor_id)):
+                        self.assertEqual([split is not None for split in splits], expected)
+
+    def test_chord_validity(self):
+        # Notched square, the notch reaches down to (1, 1).
+        P = Polygon([(0, 0), (2, 0), (2, 2), (1.5, 2), (1, 1), (0.5, 2), (0, 2)])
+        splitter = PolygonSplitter(P)
+        cuts = np.array([[(0, 1), (2, 1)],           # through the notch vertex
+                         [(0, 1.5), (2, 1.5)],       # leaves the polygon
+                         [(0, 0), (2, 0)],           # along an edge
+                         [(0.25, 0), (2, 1.5)],      # proper chord
+                         [(0, 0.5), (1, 2)]])        # end point off the exterior
+
+        splits = splitter.split_chords(cuts)
+
+        self.assertEqual([split is not None for split in splits],
+                         [False, False, False, True, False])
+        self.assertAlmostEqual(splits[3][0].area + splits[3][1].area, P.area)
+        self.assertFalse(shapely.is_prepared(P))
+
+    def test_rejects_cut_through_hole(self):
+        P = Polygon([(0, 0), (3, 0), (3, 2), (0, 2)],
+                    [[(1, 0.5), (2, 0.5), (2, 1.5), (1, 1.5)]])
+
+        self.assertIsNone(PolygonSplitter(P).split(LineString([(1.5, 0), (1.5, 2)])))
+        self.assertIsNotNone(PolygonSplitter(P).split(LineString([(0.5, 0), (0.5, 2)])))
+
+
+if __name__ == '__main__':
+    unittest.main()
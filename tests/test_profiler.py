@@ -0,0 +1,67 @@
+# pylint: disable=missing-function-docstring
+import json
+import unittest
+
+from optimizer import ChiOptimizer
+from utils.polygons import decomposition_generator
+from utils.profiler import NULL_PROFILER, Profiler
+
+
+# Test suite for the optimizer profiling hooks
+class profilerTest(unittest.TestCase):
+
+    def test_scopes(self):
+        profiler = Profiler()
+        for iteration in range(2):
+            with profiler.scope('iteration', iteration), profiler.timer('iteration'):
+                profiler.count('calls')
+                with profiler.scope('level', 0):
+                    profiler.count('calls', 2)
+                    with profiler.scope('level', 1):
+                        profiler.count('calls', 3)
+
+        summary = profiler.summary()
+        self.assertEqual(summary['counters'], {'calls': 12})
+        self.assertEqual(summary['timers']['iteration']['calls'], 2)
+        self.assertEqual(summary['iteration']['1']['counters'], {'calls': 6})
+        self.assertEqual(summary['level']['0']['counters'], {'calls': 4})
+        self.assertEqual(summary['level']['1']['counters'], {'calls': 6})
+
+    def test_null_profiler(self):
+        with NULL_PROFILER.scope('iteration', 0), NULL_PROFILER.timer('iteration'):
+            NULL_PROFILER.count('calls')
+        self.assertEqual(NULL_PROFILER.summary(), {'counters': {}, 'timers': {}})
+
+    def test_optimizer_profile(self):
+        optimizer = ChiOptimizer(num_iterations=2, radius=0.2, lin_penalty=1.0,
+                                 ang_penalty=100*1.0/360, num_samples=10, profile=True)
+        optimizer.run_iterations(decomposition_generator(3))
+
+        summary = json.loads(json.dumps(optimizer.profiler.summary()))
+        self.assertEqual(sorted(summary['iteration']), ['0', '1'])
+        self.assertEqual(summary['timers']['iteration']['calls'], 2)
+        self.assertGreater(summary['counters']['pairs_tried'], 0)
+        self.assertEqual(summary['counters']['cuts_scored'],
+                         optimizer.cut_evaluator.counters['scored'])
+        for stage in ('chi', 'split', 'contours', 'search'):
+            self.assertIn(stage, summary['timers'])
+
+    def test_adaptive_profile_counts_pruned_candidates(self):
+        optimizer = ChiOptimizer(num_iterations=2, radius=0.2, lin_penalty=1.0,
+                                 ang_penalty=100*1.0/360, num_samples=10, adaptive=True,
+                                 profile=True)
+        optimizer.run_iterations(decomposition_generator(3))
+
+        counters = optimizer.profiler.summary()['counters']
+        self.assertGreater(counters['candidates_same_edge'], 0)
+        self.assertEqual(counters['candidates_same_edge'],
+                         optimizer.candidate_counters['same_edge'])
+        self.assertEqual(counters['candidates_degenerate'],
+                         optimizer.candidate_counters['degenerate'])
+
+    def test_disabled_by_default(self):
+        self.assertIs(ChiOptimizer().profiler, NULL_PROFILER)
+
+
+if __name__ == '__main__':
+    unittest.main()
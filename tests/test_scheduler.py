@@ -0,0 +1,59 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from shapely.geometry import box
+
+from metrics.chi_cache import ChiCache
+from optimizer import ChiOptimizer
+from optimizer.scheduler import PairScheduler
+from utils.polygons import decomposition_generator
+from test_decomposition import grid_decomposition
+
+
+def costs_by_area(cell, _):
+    return cell.area
+
+
+# Test suite for the priority queue scheduler of cell pairs
+class schedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dec = grid_decomposition(3, 1)
+        # Cells of areas 1.5, 1 and 0.5 for a strict order of costs.
+        self.dec.update_cells({0: box(0, 0, 1.5, 1), 1: box(1.5, 0, 2.5, 1),
+                               2: box(2.5, 0, 3, 1)})
+        self.scheduler = PairScheduler(self.dec, costs_by_area)
+
+    def test_candidate_order(self):
+        self.assertEqual(self.scheduler.max_cell(), (0, 1.5))
+        self.assertEqual(list(self.scheduler.candidate_pairs()), [(0, 1), (1, 2)])
+
+    def test_failed_pairs_are_skipped(self):
+        self.scheduler.mark_failed(0, 1)
+        self.assertEqual(list(self.scheduler.candidate_pairs()), [(1, 2)])
+
+    def test_update(self):
+        self.scheduler.mark_failed(0, 1)
+        self.dec.update_cells({0: box(0, 0, 0.8, 1), 1: box(0.8, 0, 2.5, 1)})
+        self.scheduler.update((0, 1))
+
+        self.assertEqual(self.scheduler.max_cell(), (1, 1.7))
+        self.assertEqual(self.scheduler.sorted_costs()[0], (1, 1.7))
+        self.assertEqual(list(self.scheduler.candidate_pairs()), [(1, 2), (1, 0)])
+
+    def test_scheduled_run_converges(self):
+        dec = decomposition_generator(7)
+        optimizer = ChiOptimizer(num_iterations=30, radius=0.3, ang_penalty=100*1.0/360,
+                                 num_samples=12, profile=True, scheduled=True)
+        old_costs, new_costs = optimizer.run_iterations(dec)
+
+        self.assertLess(len(optimizer.profiler.summary()['iteration']), 30)
+        self.assertLess(new_costs[0][1], old_costs[0][1])
+
+        cost_func = ChiCache(radius=0.3, ang_penalty=100*1.0/360)
+        for cell_id, cost in new_costs:
+            self.assertAlmostEqual(cost, cost_func(*dec[cell_id]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# pylint: disable=missing-function-docstring
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from decomposition import Decomposition
+from decomposition.snapshot import read_snapshot, write_snapshot
+from optimizer import ChiOptimizer
+from utils.polygons import decomposition_generator
+
+
+# Test suite for decomposition snapshots
+class snapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "dec.snap")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_arrays_round_trip(self):
+        arrays = {'a': np.arange(7, dtype=np.int64),
+                  'b': np.random.default_rng(0).random((5, 2)),
+                  'empty': np.empty((0, 2))}
+        self.assertTrue(write_snapshot(self.path, arrays, {'key': [1, 2]}))
+
+        for mmap in (False, True):
+            loaded, attrs = read_snapshot(self.path, mmap=mmap)
+            self.assertEqual(attrs, {'key': [1, 2]})
+            for name, array in arrays.items():
+                np.testing.assert_array_equal(loaded[name], array)
+                if mmap:
+                    self.assertEqual(loaded[name].ctypes.data % 64, 0)
+
+    def test_invalid_files(self):
+        self.assertIsNone(read_snapshot(self.path))
+        with open(self.path, 'wb') as snapshot:
+            snapshot.write(b'not a snapshot')
+        self.assertIsNone(read_snapshot(self.path))
+        self.assertIsNone(Decomposition.load(self.path))
+
+    def test_inconsistent_rings(self):
+        dec = decomposition_generator(3)
+        self.assertTrue(dec.save(self.path))
+        arrays, attrs = read_snapshot(self.path, mmap=False)
+
+        arrays['num_rings'] = arrays['num_rings'][:-1]
+        self.assertTrue(write_snapshot(self.path, arrays, attrs))
+        self.assertIsNone(Decomposition.load(self.path))
+
+    def test_decomposition_round_trip(self):
+        for poly_id in (3, 7):
+            dec = decomposition_generator(poly_id)
+            self.assertTrue(dec.save(self.path, metadata={'poly_id': poly_id}))
+            self.assertEqual(Decomposition.read_metadata(self.path), {'poly_id': poly_id})
+
+            for compact in (False, True):
+                with self.subTest(poly_id=poly_id, compact=compact):
+                    loaded = Decomposition.load(self.path, compact=compact)
+                    self.assertEqual(loaded.num_cells, dec.num_cells)
+                    self.assertEqual(loaded.adjacency, dec.adjacency)
+                    self.assertEqual(loaded.canonical_robot_sites, dec.canonical_robot_sites)
+                    for cell_id in range(dec.num_cells):
+                        self.assertTrue(loaded.cells[cell_id].equals_exact(dec.cells[cell_id], 0))
+
+                    results = [ChiOptimizer(num_iterations=3, radius=0.2, num_samples=10)
+                               .run_iterations(decomposition)
+                               for decomposition in (decomposition_generator(poly_id), loaded)]
+                    self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
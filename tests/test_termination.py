@@ -0,0 +1,43 @@
+# pylint: disable=missing-function-docstring
+import unittest
+
+from optimizer import ChiOptimizer
+from utils.polygons import decomposition_generator
+
+
+def run(poly_id, **kwargs):
+    optimizer = ChiOptimizer(num_iterations=30, radius=0.3, ang_penalty=100*1.0/360,
+                             num_samples=12, **kwargs)
+    old_costs, new_costs = optimizer.run_iterations(decomposition_generator(poly_id))
+    return optimizer.run_stats, old_costs, new_costs
+
+
+# Test suite for the termination criteria of run_iterations
+class terminationTest(unittest.TestCase):
+
+    def test_stop_on_no_cut(self):
+        stats, _, new_costs = run(7)
+        self.assertEqual(stats['stop_reason'], 'no_cut')
+        self.assertLess(stats['iterations'], 30)
+        self.assertEqual(stats['final_max_chi'], new_costs[0][1])
+
+        # Running on does not change the result.
+        full_stats, _, full_costs = run(7, stop_on_no_cut=False)
+        self.assertEqual(full_stats['stop_reason'], 'max_iterations')
+        self.assertEqual(full_stats['iterations'], 30)
+        self.assertEqual(full_costs, new_costs)
+
+    def test_plateau(self):
+        stats, _, _ = run(1, plateau_iterations=2)
+        self.assertEqual(stats['stop_reason'], 'plateau')
+        self.assertLess(stats['iterations'], 30)
+
+    def test_time_limit(self):
+        stats, old_costs, new_costs = run(4, time_limit=0.)
+        self.assertEqual(stats['stop_reason'], 'time_limit')
+        self.assertEqual(stats['iterations'], 0)
+        self.assertEqual(old_costs, new_costs)
+
+
+if __name__ == '__main__':
+    unittest.main()
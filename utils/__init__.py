@@ -1,2 +1,4 @@
 from .timing import time_execution
-from .polygon_split import polygon_split
+from .boundary import Boundary
+from .polygon_split import polygon_split, PolygonSplitter
+from .profiler import Profiler, NullProfiler, NULL_PROFILER
@@ -0,0 +1,165 @@
+"""Arc-length parameterization of polygon boundaries."""
+from typing import Tuple, Union
+
+import numpy as np
+from shapely.geometry import LinearRing, Polygon
+
+
+class Boundary():
+    """Closed ring parameterized by arc length.
+
+    Vertex coordinates, edge lengths and cumulative lengths are extracted from
+    the ring once. Positions along the ring are then mapped to points and edge
+    ids in bulk with numpy, instead of interpolating through Shapely one
+    position at a time.
+    """
+    __slots__ = (
+        'coords',
+        'edge_lengths',
+        'cum_lengths',
+        'length',
+        'tolerance',
+    )
+
+    def __init__(self, ring: Union[LinearRing, Polygon], tolerance: float = 1e-9):
+        """
+        Args:
+            ring (LinearRing): Ring to parameterize. The exterior is taken for
+                polygons.
+            tolerance (float): Relative tolerance, scaled by the ring length,
+                within which points are considered to lie on the ring.
+        """
+        if isinstance(ring, Polygon):
+            ring = ring.exterior
+
+        self.coords = np.asarray(ring.coords, dtype=float)
+        deltas = np.diff(self.coords, axis=0)
+        self.edge_lengths = np.sqrt(deltas[:, 0]**2 + deltas[:, 1]**2)
+        self.cum_lengths = np.concatenate(([0.], np.cumsum(self.edge_lengths)))
+        self.length = float(self.cum_lengths[-1])
+        self.tolerance = tolerance * self.length
+
+    @property
+    def num_edges(self) -> int:
+        """Number of edges, equal to the number of vertices."""
+        return len(self.edge_lengths)
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """Vertex coordinates of shape (num_edges, 2), the closing vertex excluded."""
+        return self.coords[:-1]
+
+    @property
+    def vertex_distances(self) -> np.ndarray:
+        """Arc-length position of every vertex, the closing vertex excluded."""
+        return self.cum_lengths[:-1]
+
+    def edge_ids(self, distances: np.ndarray) -> np.ndarray:
+        """Edge ids of the edge every position falls into.
+
+        Args:
+            distances (np.ndarray): Arc-length positions in [0, length].
+
+        Returns:
+            array of edge ids, the last edge for the end of the ring.
+        """
+        return np.clip(np.searchsorted(self.cum_lengths, distances, side='right') - 1,
+                       0, self.num_edges - 1)
+
+    def points(self, distances: np.ndarray) -> np.ndarray:
+        """Points at arc-length positions along the ring.
+
+        Args:
+            distances (np.ndarray): Arc-length positions in [0, length].
+
+        Returns:
+            array of shape (len(distances), 2).
+        """
+        distances = np.clip(np.asarray(distances, dtype=float), 0, self.length)
+        edge_ids = self.edge_ids(distances)
+
+        edge_lengths = self.edge_lengths[edge_ids]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            params = np.where(edge_lengths > 0,
+                              (distances - self.cum_lengths[edge_ids]) / edge_lengths, 0.)
+
+        # Same arithmetic as GEOS interpolation, so points match it bit for bit.
+        starts = self.coords[edge_ids]
+        ends = self.coords[edge_ids + 1]
+        at_end = (params >= 1) | (distances >= self.length)
+        return np.where(at_end[:, None], ends,
+                        starts + np.clip(params, 0, 1)[:, None]*(ends - starts))
+
+    def sample(self, distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Locates points along the ring and records the edges they lie on.
+
+        A point in the interior of edge k lies on edges (k, k). A point on the
+        vertex joining edges k-1 and k lies on both of them.
+
+        Args:
+            distances (np.ndarray): Arc-length positions in [0, length].
+
+        Returns:
+            (points, edges): Arrays of shape (len(distances), 2). Edges holds the
+            two edge ids of every point.
+        """
+        distances = np.asarray(distances, dtype=float)
+        edge_ids = self.edge_ids(distances)
+        edges = np.stack((edge_ids, edge_ids), axis=1)
+
+        at_start = np.isclose(distances, self.cum_lengths[edge_ids])
+        edges[at_start, 0] = (edge_ids[at_start] - 1) % self.num_edges
+
+        at_end = np.isclose(distances, self.cum_lengths[edge_ids + 1])
+        edges[at_end, 1] = (edge_ids[at_end] + 1) % self.num_edges
+
+        return self.points(distances), edges
+
+    def uniform(self, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples points uniformly along the ring, end points included. See sample."""
+        return self.sample(np.linspace(0, self.length, num_samples))
+
+    def locate(self, points: np.ndarray) -> np.ndarray:
+        """Arc-length positions of points on the ring.
+
+        Args:
+            points (np.ndarray): Array of shape (M, 2).
+
+        Returns:
+            array of M positions, nan for points off the ring.
+        """
+        starts = self.vertices
+        edges = self.coords[1:] - starts
+        offsets = points[:, None, :] - starts[None, :, :]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            params = np.clip(np.einsum('mej,ej->me', offsets, edges) / self.edge_lengths**2,
+                             0, 1)
+        params[~np.isfinite(params)] = 0
+
+        distances = np.hypot(*np.moveaxis(offsets - params[..., None]*edges, -1, 0))
+        edge_ids = np.argmin(distances, axis=1)
+        rows = np.arange(len(points))
+
+        positions = self.cum_lengths[edge_ids] + params[rows, edge_ids]*self.edge_lengths[edge_ids]
+        positions[distances[rows, edge_ids] > self.tolerance] = np.nan
+        return positions
+
+    def contains_points(self, points: np.ndarray) -> np.ndarray:
+        """Even-odd test of points against the ring.
+
+        Args:
+            points (np.ndarray): Array of shape (M, 2).
+
+        Returns:
+            boolean array of M.
+        """
+        x_0, y_0 = self.coords[:-1].T
+        x_1, y_1 = self.coords[1:].T
+        x_p, y_p = points[:, 0:1], points[:, 1:2]
+
+        straddles = (y_0 > y_p) != (y_1 > y_p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x_0 + (y_p - y_0) * (x_1 - x_0) / (y_1 - y_0)
+
+        return np.count_nonzero(straddles & (x_cross > x_p), axis=1) % 2 == 1
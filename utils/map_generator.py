@@ -0,0 +1,312 @@
+"""Seeded procedural maps and initial decompositions for scaling tests.
+
+The hard coded maps of utils.polygons only have three or four cells. The
+functions here generate random simple polygons with holes of any size and
+decompose them into any number of cells with a robot site each, either with
+a Voronoi diagram of the sites clipped to the polygon or with random chord
+cuts. The same seed always produces the same map.
+"""
+from typing import List, Optional
+
+import numpy as np
+from shapely.geometry import LineString, MultiPoint, Point, Polygon
+from shapely.ops import snap, split, voronoi_diagram
+from shapely.prepared import prep
+
+from decomposition import Decomposition
+from log_utils import get_logger
+
+
+# Configure logging properties for this module
+logger = get_logger("map_generator")
+
+
+def random_simple_polygon(num_vertices: int,
+                          rng: np.random.Generator,
+                          center=(0., 0.),
+                          radius: float = 1.,
+                          irregularity: float = 0.5,
+                          spikiness: float = 0.3) -> Polygon:
+    """Random star shaped polygon around a center.
+
+    Vertices are placed at increasing angles around the center, so the
+    polygon is always simple.
+
+    Args:
+        num_vertices (int): Number of vertices, at least 3.
+        rng (Generator): Source of randomness.
+        center (Tuple): Center of the polygon.
+        radius (float): Average distance of the vertices from the center.
+        irregularity (float): In [0, 1], variance of the angular steps.
+        spikiness (float): In [0, 1], variance of the vertex distances.
+
+    Returns:
+        Polygon with counter-clockwise exterior.
+    """
+    steps = rng.uniform(1 - irregularity, 1 + irregularity, num_vertices)
+    angles = rng.uniform(0, 2*np.pi) + np.cumsum(steps) * 2*np.pi / steps.sum()
+
+    radii = np.clip(rng.normal(radius, spikiness*radius, num_vertices), 0.2*radius, 2*radius)
+
+    return Polygon(np.stack((center[0] + radii*np.cos(angles),
+                             center[1] + radii*np.sin(angles)), axis=1))
+
+
+def random_points(polygon: Polygon,
+                  num_points: int,
+                  rng: np.random.Generator,
+                  min_distance: float = 0.,
+                  max_attempts: int = 100) -> Optional[np.ndarray]:
+    """Uniformly samples points inside a polygon by rejection.
+
+    Args:
+        polygon (Polygon): Polygon to sample, holes excluded.
+        num_points (int): Number of points.
+        rng (Generator): Source of randomness.
+        min_distance (float): Minimum distance between any two points.
+        max_attempts (int): Number of batches of candidates to draw.
+
+    Returns:
+        array of shape (num_points, 2), None if not enough points fit.
+    """
+    prepared = prep(polygon)
+    min_x, min_y, max_x, max_y = polygon.bounds
+
+    points = np.empty((0, 2))
+    for _ in range(max_attempts):
+        candidates = rng.uniform((min_x, min_y), (max_x, max_y), (num_points, 2))
+        for candidate in candidates:
+            if not prepared.contains(Point(candidate)):
+                continue
+            if len(points) and np.hypot(*(points - candidate).T).min() < min_distance:
+                continue
+
+            points = np.vstack((points, candidate))
+            if len(points) == num_points:
+                return points
+
+    return None
+
+
+def random_map(num_vertices: int,
+               num_holes: int,
+               rng: np.random.Generator,
+               radius: float = 10.,
+               hole_vertices: int = 6,
+               max_attempts: int = 100) -> Optional[Polygon]:
+    """Random simple polygon with random holes.
+
+    Holes are smaller random polygons kept clear of the exterior and of each
+    other, so they never touch.
+
+    Args:
+        num_vertices (int): Number of vertices of the exterior.
+        num_holes (int): Number of holes.
+        rng (Generator): Source of randomness.
+        radius (float): Average distance of exterior vertices from the origin.
+        hole_vertices (int): Number of vertices of every hole.
+        max_attempts (int): Number of attempts at placing every hole.
+
+    Returns:
+        Polygon, None if the holes do not fit.
+    """
+    exterior = random_simple_polygon(num_vertices, rng, radius=radius,
+                                     irregularity=0.5, spikiness=0.2)
+
+    # Holes cover about a fifth of the map, whatever their number.
+    hole_radius = 0.25 * np.sqrt(exterior.area / max(num_holes, 1) / np.pi)
+    clearance = 0.5 * hole_radius
+
+    polygon = exterior
+    for _ in range(num_holes):
+        for _ in range(max_attempts):
+            center = random_points(polygon.buffer(-hole_radius - clearance), 1, rng)
+            if center is None:
+                break
+
+            hole = random_simple_polygon(hole_vertices, rng, center[0], hole_radius,
+                                         irregularity=0.3, spikiness=0.2)
+            if polygon.contains(hole.buffer(clearance)):
+                polygon = Polygon(polygon.exterior, list(polygon.interiors) + [hole.exterior])
+                break
+        else:
+            center = None
+
+        if center is None:
+            logger.warning("Could not fit %d holes into the map.", num_holes)
+            return None
+
+    return polygon
+
+
+def _merge_fragments(cells: List[Polygon], fragments: List[Polygon]) -> List[Polygon]:
+    """Merges every fragment into the cell it shares the longest edge with."""
+    while fragments:
+        remaining = []
+        for fragment in fragments:
+            lengths = [cell.intersection(fragment).length for cell in cells]
+            best = int(np.argmax(lengths))
+            merged = cells[best].union(fragment)
+            if lengths[best] > 0 and merged.geom_type == 'Polygon':
+                cells[best] = merged
+            else:
+                remaining.append(fragment)
+
+        # Fragments isolated from every cell are dropped rather than looping forever.
+        if len(remaining) == len(fragments):
+            logger.warning("Dropping %d fragments not adjacent to any cell.", len(remaining))
+            break
+        fragments = remaining
+
+    return cells
+
+
+def voronoi_cells(polygon: Polygon, sites: np.ndarray) -> List[Polygon]:
+    """Voronoi diagram of sites clipped to a polygon.
+
+    A clipped region falling apart into several pieces keeps the piece
+    containing its site. The other pieces are merged into neighbouring cells.
+
+    Args:
+        polygon (Polygon): Polygon to decompose.
+        sites (np.ndarray): Array of shape (N, 2) of sites inside the polygon.
+
+    Returns:
+        list of N cells, the cell of every site at its index.
+    """
+    regions = voronoi_diagram(MultiPoint([tuple(site) for site in sites]),
+                              envelope=polygon.envelope.buffer(polygon.length))
+
+    cells: List[Optional[Polygon]] = [None] * len(sites)
+    fragments = []
+    for region in regions.geoms:
+        site_idx = next(idx for idx, site in enumerate(sites) if region.intersects(Point(site)))
+
+        clipped = region.intersection(polygon)
+        pieces = [piece for piece in getattr(clipped, 'geoms', [clipped])
+                  if piece.geom_type == 'Polygon' and piece.area > 0]
+
+        own = min(pieces, key=lambda piece: piece.distance(Point(sites[site_idx])))
+        cells[site_idx] = own
+        fragments.extend(piece for piece in pieces if piece is not own)
+
+    return _merge_fragments(cells, fragments)
+
+
+def chord_cells(polygon: Polygon,
+                num_cells: int,
+                rng: np.random.Generator,
+                max_attempts: int = 100) -> Optional[List[Polygon]]:
+    """Decomposes a polygon by repeatedly cutting its largest cell.
+
+    Every cut is a line through a random point of the cell at a random angle.
+    A cut splitting a cell around holes into more than two pieces is accepted
+    as long as the total does not exceed num_cells.
+
+    Args:
+        polygon (Polygon): Polygon to decompose.
+        num_cells (int): Number of cells.
+        rng (Generator): Source of randomness.
+        max_attempts (int): Number of attempts at every cut.
+
+    Returns:
+        list of cells, None if the cells could not be cut.
+    """
+    min_area = 0.05 * polygon.area / num_cells
+    reach = polygon.length
+    tolerance = 1e-9 * reach
+
+    cells = [polygon]
+    while len(cells) < num_cells:
+        largest = int(np.argmax([cell.area for cell in cells]))
+        cell = cells[largest]
+
+        for _ in range(max_attempts):
+            point = random_points(cell, 1, rng)
+            if point is None:
+                continue
+
+            angle = rng.uniform(0, np.pi)
+            direction = reach * np.array((np.cos(angle), np.sin(angle)))
+            chord = LineString([point[0] - direction, point[0] + direction])
+
+            pieces = [piece for piece in split(cell, chord).geoms
+                      if piece.geom_type == 'Polygon']
+            if (len(pieces) >= 2 and len(cells) - 1 + len(pieces) <= num_cells and
+                    min(piece.area for piece in pieces) >= min_area):
+                # Neighbours get the new vertices of the cut as well, otherwise
+                # they overlap the pieces by rounding and stop being adjacent.
+                old_vertices = set(cell.exterior.coords)
+                new_vertices = MultiPoint([vertex for piece in pieces
+                                           for vertex in piece.exterior.coords
+                                           if vertex not in old_vertices])
+                cells = [snap(other, new_vertices, tolerance)
+                         if other.distance(new_vertices) < tolerance else other
+                         for other in cells]
+                cells[largest:largest + 1] = pieces
+                break
+        else:
+            logger.warning("Could not cut the map into %d cells.", num_cells)
+            return None
+
+    return cells
+
+
+def _canonical(polygon: Polygon) -> List[List]:
+    """Canonical form of a polygon, without the closing vertices."""
+    return [list(polygon.exterior.coords)[:-1],
+            [list(interior.coords)[:-1] for interior in polygon.interiors]]
+
+
+def generate_decomposition(num_vertices: int = 12,
+                           num_holes: int = 0,
+                           num_cells: int = 4,
+                           method: str = 'voronoi',
+                           seed: Optional[int] = None,
+                           radius: float = 10.) -> Optional[Decomposition]:
+    """Random map and initial decomposition with one robot per cell.
+
+    Args:
+        num_vertices (int): Number of vertices of the map exterior.
+        num_holes (int): Number of holes in the map.
+        num_cells (int): Number of cells and robots.
+        method (str): 'voronoi' to clip the Voronoi diagram of random robot
+            sites, 'chords' to cut the map with random chords and place a
+            robot at a random point of every cell.
+        seed (int): Seed of the generator, the same seed gives the same map.
+        radius (float): Average distance of exterior vertices from the origin.
+
+    Returns:
+        Decomposition, None if the map could not be generated.
+    """
+    rng = np.random.default_rng(seed)
+
+    polygon = random_map(num_vertices, num_holes, rng, radius=radius)
+    if polygon is None:
+        return None
+
+    if method == 'voronoi':
+        # Sites closer than this would produce slivers instead of cells.
+        min_distance = 0.3 * np.sqrt(polygon.area / num_cells)
+        sites = random_points(polygon, num_cells, rng, min_distance=min_distance)
+        if sites is None:
+            logger.warning("Could not place %d robot sites.", num_cells)
+            return None
+        cells = voronoi_cells(polygon, sites)
+
+    elif method == 'chords':
+        cells = chord_cells(polygon, num_cells, rng)
+        if cells is None:
+            return None
+        sites = [random_points(cell, 1, rng)[0] for cell in cells]
+
+    else:
+        logger.warning("Unknown decomposition method %s.", method)
+        return None
+
+    decomposition = Decomposition(_canonical(polygon))
+    for cell, site in zip(cells, sites):
+        cell_id = decomposition.add_cell(_canonical(cell))
+        decomposition.add_robot_site(cell_id, tuple(float(coord) for coord in site))
+
+    return decomposition
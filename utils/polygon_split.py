@@ -1,5 +1,10 @@
-from typing import Optional, Tuple
+import copy
+import logging
+from typing import List, Optional, Tuple
 
+import numpy as np
+
+import shapely
 from shapely.geometry import Point
 from shapely.geometry import MultiPoint
 from shapely.geometry import Polygon
@@ -8,11 +13,17 @@ from shapely.geometry import MultiLineString
 from shapely.geometry import LinearRing
 
 from log_utils import get_logger
+from .boundary import Boundary
 
 
 # Configure logging properties for this module
 logger = get_logger("polygon_split")
 
+MULTIPOINT_TYPE_ID = 4
+# Area, relative to the split polygon, below which a piece counts as a sliver
+# and by which two pieces may miss the area of the polygon.
+AREA_TOLERANCE = 1e-9
+
 
 def pretty_print_poly(P=[]):
     """Pretty prints cannonical polygons to help with debugging
@@ -98,7 +109,9 @@ def polygon_split(polygon: Polygon, split_line: LineString) -> Optional[Tuple[Po
     # This calculates the points on the boundary where the split will happen.
     ext_line = polygon.exterior
     common_pts = ext_line.intersection(split_line)
-    logger.debug("Cut: %s Intersection: %s"%(split_line, common_pts))
+    # Formatting geometries generates WKT, skip it unless it is logged.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Cut: %s Intersection: %s", split_line, common_pts)
 
     # No intersection check.
     if not common_pts:
@@ -107,7 +120,7 @@ def polygon_split(polygon: Polygon, split_line: LineString) -> Optional[Tuple[Po
     if not isinstance(common_pts, MultiPoint):
         return None
     # Should only ever contain two points.
-    if len(common_pts) != 2:
+    if len(common_pts.geoms) != 2:
         return None
     # Split line should be inside polygon.
     if not split_line.within(polygon):
@@ -117,30 +130,51 @@ def polygon_split(polygon: Polygon, split_line: LineString) -> Optional[Tuple[Po
         if split_line.intersects(hole):
             return None
 
+    return split_by_masks(polygon, split_line)
+
+
+def split_by_masks(polygon: Polygon, split_line: LineString) -> Optional[Tuple[Polygon, Polygon]]:
+    """Splits a polygon along a cut already known to be a proper chord.
+
+    The exterior is cut into two open lines, each closed into a mask polygon
+    by the cut, and the polygon is intersected with both masks.
+
+    Args:
+        polygon: Shapely polygon object.
+        split_line: Shapely LineString object connecting two exterior points
+            through the interior of the polygon.
+
+    Returns:
+        (P1, P2): A tuple of Shapely polygons resulted from the split. None if
+        the masks do not yield two valid polygons.
+    """
+
+    ext_line = polygon.exterior
     split_boundary = ext_line.difference(split_line)
     # Check that split_boundary is a collection of linestrings
     if not isinstance(split_boundary, MultiLineString):
         return None
     # Make sure there are only 2 linestrings in the collection
-    if len(split_boundary) > 3 or len(split_boundary) < 2:
+    if len(split_boundary.geoms) > 3 or len(split_boundary.geoms) < 2:
         return None
 
-    logger.debug("Split boundary: %s", split_boundary)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Split boundary: %s", split_boundary)
 
     # Even though we use LinearRing, there is no wrap around and diff produces
     #    3 strings. Need to union. Not sure if combining 1st and last strings
     #    is guaranteed to be the right combo. For now, place a check.
-    if len(split_boundary) == 3:
-        if split_boundary[0].coords[0] != split_boundary[-1].coords[-1]:
+    if len(split_boundary.geoms) == 3:
+        if split_boundary.geoms[0].coords[0] != split_boundary.geoms[-1].coords[-1]:
             logger.warn("The assumption that pts0[0] == pts2[-1] DOES not hold. Need"
                         " to investigate.")
             return None
 
-        line1 = LineString(
-            list(list(split_boundary[-1].coords)[:-1] + list(split_boundary[0].coords)))
+        line1 = LineString(list(list(split_boundary.geoms[-1].coords)[:-1] +
+                                list(split_boundary.geoms[0].coords)))
     else:
-        line1 = split_boundary[0]
-    line2 = split_boundary[1]
+        line1 = split_boundary.geoms[0]
+    line2 = split_boundary.geoms[1]
 
 
     if len(line1.coords) < 3 or len(line2.coords) < 3:
@@ -167,6 +201,171 @@ def polygon_split(polygon: Polygon, split_line: LineString) -> Optional[Tuple[Po
     return res_p1_pol, res_p2_pol
 
 
+class PolygonSplitter():
+    """Splits one polygon along many candidate cuts.
+
+    Accepts exactly the cuts polygon_split accepts and gives the same pieces,
+    up to the starting vertex and floating point rounding of the pieces. For
+    polygons without holes, cuts are validated by GEOS predicates in one
+    vectorized call and the two pieces are emitted straight from the
+    exterior coordinates, without any GEOS overlay.
+    Polygons with holes go through the GEOS path, with predicates evaluated on
+    geometries prepared once per polygon instead of once per cut.
+    """
+    __slots__ = (
+        'polygon',
+        'exterior',
+        'boundary',
+        '_prepared_polygon',
+        '_prepared_holes',
+    )
+
+    def __init__(self, polygon: Polygon, boundary: Optional[Boundary] = None):
+        """
+        Args:
+            polygon: Shapely polygon object to split.
+            boundary: Parameterization of the polygon exterior, if already built.
+        """
+        self.polygon = polygon
+        self.exterior = polygon.exterior
+        self.boundary = Boundary(self.exterior) if boundary is None else boundary
+
+        self._prepared_polygon = None
+        self._prepared_holes = None
+        if polygon.interiors:
+            self._prepared_holes = MultiLineString([hole.coords for hole in polygon.interiors])
+            shapely.prepare(self._prepared_holes)
+
+    def split(self, split_line: LineString) -> Optional[Tuple[Polygon, Polygon]]:
+        """Split the polygon into two other polygons along split_line.
+
+        Pieces are built by the GEOS overlays of split_by_masks and are
+        identical to the ones of polygon_split.
+
+        Args:
+            split_line: Shapely LineString object.
+
+        Returns:
+            (P1, P2): A tuple of Shapely polygons resulted from the split. None if
+            split_line is not a valid cut.
+        """
+
+        common_pts = self.exterior.intersection(split_line)
+
+        # The cut must cross the exterior at exactly two points.
+        if not isinstance(common_pts, MultiPoint) or len(common_pts.geoms) != 2:
+            return None
+        # Split line should be inside polygon.
+        if not shapely.contains(self.prepared_polygon, split_line):
+            return None
+        # Check to see if cut line touches any holes
+        if self._prepared_holes is not None and shapely.intersects(self._prepared_holes,
+                                                                   split_line):
+            return None
+
+        return split_by_masks(self.polygon, split_line)
+
+    @property
+    def prepared_polygon(self):
+        """Prepared copy of the polygon, the caller's polygon is left unprepared."""
+        if self._prepared_polygon is None:
+            self._prepared_polygon = copy.copy(self.polygon)
+            shapely.prepare(self._prepared_polygon)
+        return self._prepared_polygon
+
+    def split_chord(self, chord: np.ndarray) -> Optional[Tuple[Polygon, Polygon]]:
+        """Split the polygon along a straight cut given by its end points.
+
+        Meant for the cut that is actually made. The pieces are the ones of
+        split, the pieces of split_chords may start at a different vertex and
+        differ by rounding, which changes the candidates sampled on them later.
+
+        Args:
+            chord: Array of shape (2, 2) with the end points of the cut.
+
+        Returns:
+            (P1, P2): A tuple of Shapely polygons resulted from the split. None if
+            the chord is not a valid cut.
+        """
+        return self.split(LineString(chord))
+
+    def split_chords(self, chords: np.ndarray) -> List[Optional[Tuple[Polygon, Polygon]]]:
+        """Split the polygon along many straight cuts at once.
+
+        A chord is accepted exactly when polygon_split accepts it: its
+        intersection with the exterior is two points and it lies within the
+        polygon. Both predicates are evaluated by GEOS for all cuts in one
+        vectorized call. Only the overlays are skipped, the pieces of accepted
+        chords are emitted straight from the exterior coordinates and go
+        through the validity and area checks of split_by_masks.
+
+        Args:
+            chords: Array of shape (N, 2, 2) with the end points of the cuts.
+
+        Returns:
+            list of N splits, None where the chord is not a valid cut.
+        """
+        chords = np.asarray(chords, dtype=float)
+        if self._prepared_holes is not None:
+            return [self.split(LineString(chord)) for chord in chords]
+
+        splits: List[Optional[Tuple[Polygon, Polygon]]] = [None] * len(chords)
+        if not len(chords):
+            return splits
+
+        lines = shapely.linestrings(chords)
+        common_pts = shapely.intersection(self.exterior, lines)
+        accepted = ((shapely.get_type_id(common_pts) == MULTIPOINT_TYPE_ID) &
+                    (shapely.get_num_geometries(common_pts) == 2))
+        accepted_ids = np.flatnonzero(accepted)
+        accepted[accepted_ids] = shapely.within(lines[accepted_ids], self.prepared_polygon)
+
+        tolerance = self.boundary.tolerance
+        positions = self.boundary.locate(chords.reshape(-1, 2)).reshape(-1, 2)
+        vertices = self.boundary.vertex_distances
+        coords = self.boundary.vertices
+        for idx in np.flatnonzero(accepted):
+            start, end = np.sort(positions[idx])
+            if not np.isfinite(positions[idx]).all() or end - start <= tolerance:
+                # End points GEOS places on the exterior but the arc length
+                # parameterization does not, leave them to the overlays.
+                splits[idx] = split_by_masks(self.polygon, lines[idx])
+                continue
+
+            start_point, end_point = chords[idx][np.argsort(positions[idx])]
+
+            # Vertices strictly between the end points form one piece, the ones
+            # before and after them, wrapping around the ring start, the other.
+            before = vertices < start - tolerance
+            between = (vertices > start + tolerance) & (vertices < end - tolerance)
+            after = vertices > end + tolerance
+
+            ring_1 = np.vstack((start_point, coords[between], end_point))
+            ring_2 = np.vstack((end_point, coords[after], coords[before], start_point))
+            if len(ring_1) < 3 or len(ring_2) < 3:
+                continue
+
+            pieces = (Polygon(ring_1), Polygon(ring_2))
+            if self.valid_pieces(pieces):
+                splits[idx] = pieces
+
+        return splits
+
+    def valid_pieces(self, pieces: Tuple[Polygon, Polygon]) -> bool:
+        """Checks of split_by_masks on pieces built from coordinates.
+
+        Without holes the masks of split_by_masks are the pieces themselves, so
+        they must be valid. Both must have an area, slivers left by chords along
+        a collinear edge are rejected, and together they must cover the
+        polygon, which rules out pieces that wrap around the wrong way.
+        """
+        areas = shapely.area(pieces)
+        tolerance = AREA_TOLERANCE * self.polygon.area
+        if not shapely.is_valid(pieces).all() or (areas <= tolerance).any():
+            return False
+        return abs(areas.sum() - self.polygon.area) <= tolerance
+
+
 if __name__ == '__main__':
 
 
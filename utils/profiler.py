@@ -0,0 +1,196 @@
+"""Named counters and timers for profiling optimizer runs."""
+import json
+from collections import Counter
+from time import perf_counter
+from typing import Dict, Hashable
+
+
+class StageStats():
+    """Counters and accumulated wall-clock time of named stages."""
+    __slots__ = (
+        'counters',
+        'seconds',
+        'calls',
+    )
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.calls: Counter = Counter()
+
+    def summary(self) -> Dict:
+        """Counters and timers as plain dicts."""
+        return {
+            'counters': dict(self.counters),
+            'timers': {name: {'seconds': self.seconds[name], 'calls': self.calls[name]}
+                       for name in self.seconds},
+        }
+
+
+class _Timer():
+    """Context manager adding its elapsed time to every target."""
+    __slots__ = (
+        'name',
+        'targets',
+        'start',
+    )
+
+    def __init__(self, name: str, targets):
+        self.name = name
+        self.targets = targets
+        self.start = 0.
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.start
+        for stats in self.targets:
+            stats.seconds[self.name] += elapsed
+            stats.calls[self.name] += 1
+        return False
+
+
+class _Scope():
+    """Context manager setting the key of a scope dimension, restoring the outer one on exit."""
+    __slots__ = (
+        'scopes',
+        'dimension',
+        'key',
+        'outer',
+    )
+
+    def __init__(self, scopes: Dict, dimension: str, key: Hashable):
+        self.scopes = scopes
+        self.dimension = dimension
+        self.key = key
+        self.outer = None
+
+    def __enter__(self):
+        self.outer = self.scopes.get(self.dimension)
+        self.scopes[self.dimension] = self.key
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.outer is None:
+            del self.scopes[self.dimension]
+        else:
+            self.scopes[self.dimension] = self.outer
+        return False
+
+
+class Profiler():
+    """Collects named counters and timers, in total and per scope.
+
+    A scope is a dimension, such as the iteration or the recursion level, and
+    its current key. Everything recorded while a scope is active is added both
+    to the totals and to the stats of that key, so the same timer reads as one
+    total and as a breakdown per iteration or per level.
+
+    Usage:
+        with profiler.scope('iteration', i), profiler.timer('iteration'):
+            profiler.count('pairs_tried')
+    """
+    __slots__ = (
+        'totals',
+        'scoped',
+        '_scopes',
+    )
+
+    enabled = True
+
+    def __init__(self):
+        self.totals = StageStats()
+        self.scoped: Dict[str, Dict[Hashable, StageStats]] = {}
+        self._scopes: Dict[str, Hashable] = {}
+
+    def _targets(self):
+        """Stats of the totals and of every active scope."""
+        return [self.totals] + [self.scoped[dimension][key]
+                                for dimension, key in self._scopes.items()]
+
+    def count(self, name: str, value: int = 1):
+        """Adds value to a named counter."""
+        for stats in self._targets():
+            stats.counters[name] += value
+
+    def timer(self, name: str) -> _Timer:
+        """Context manager timing a named stage."""
+        return _Timer(name, self._targets())
+
+    def scope(self, dimension: str, key: Hashable) -> _Scope:
+        """Context manager attributing everything recorded inside it to key."""
+        self.scoped.setdefault(dimension, {}).setdefault(key, StageStats())
+        return _Scope(self._scopes, dimension, key)
+
+    def reset(self):
+        """Drops everything recorded so far."""
+        self.totals = StageStats()
+        self.scoped.clear()
+        self._scopes.clear()
+
+    def summary(self) -> Dict:
+        """Totals and per scope stats as a JSON serializable dict.
+
+        Returns:
+            dict with 'counters' and 'timers' of the totals, and the same per
+            key under the name of every scope dimension.
+        """
+        summary = self.totals.summary()
+        for dimension, stats_by_key in self.scoped.items():
+            summary[dimension] = {str(key): stats.summary()
+                                  for key, stats in sorted(stats_by_key.items())}
+        return summary
+
+    def dump(self, path: str):
+        """Writes the summary to a JSON file."""
+        with open(path, 'w') as summary_file:
+            json.dump(self.summary(), summary_file, indent=2)
+
+
+class _NullContext():
+    """Context manager doing nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class NullProfiler():
+    """Profiler interface that records nothing, for runs without profiling."""
+    __slots__ = ()
+
+    enabled = False
+
+    def count(self, name: str, value: int = 1):
+        """Does nothing."""
+
+    def timer(self, name: str) -> _NullContext:
+        """Shared context manager doing nothing."""
+        return _NULL_CONTEXT
+
+    def scope(self, dimension: str, key: Hashable) -> _NullContext:
+        """Shared context manager doing nothing."""
+        return _NULL_CONTEXT
+
+    def reset(self):
+        """Does nothing."""
+
+    def summary(self) -> Dict:
+        """Empty summary."""
+        return {'counters': {}, 'timers': {}}
+
+    def dump(self, path: str):
+        """Writes the empty summary to a JSON file."""
+        with open(path, 'w') as summary_file:
+            json.dump(self.summary(), summary_file, indent=2)
+
+
+NULL_PROFILER = NullProfiler()
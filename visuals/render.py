@@ -0,0 +1,101 @@
+"""Rendering of decompositions to image files in a background process.
+
+Nothing here imports matplotlib at module level. Importing this module is
+cheap, the plotting libraries are only loaded by the worker process that
+renders the figures, so headless runs never pay for them in the main process.
+"""
+from multiprocessing import Pool
+from typing import List, Optional, Tuple
+
+from decomposition import Decomposition
+from log_utils import get_logger
+
+
+logger = get_logger("render")
+
+
+def render_decomposition(path: str, title: str, decomposition: Decomposition) -> str:
+    """Plots the outline, cells and robot sites of a decomposition to an image file.
+
+    Draws on a figure of its own through the Agg canvas, so no display and no
+    pyplot state are needed.
+
+    Args:
+        path (str): Image file, the format follows the extension.
+        title (str): Title of the plot.
+        decomposition (Decomposition): Decomposition to plot.
+
+    Returns:
+        path of the written file.
+    """
+    # Deferred so that only the rendering process loads matplotlib.
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import visuals.coverage_plot as splot
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    ax.set_aspect('equal')
+    ax.get_xaxis().set_ticks([])
+    ax.get_yaxis().set_ticks([])
+    ax.set_title(title)
+
+    splot.plot_polygon_outline(ax, decomposition.canonical_polygon)
+    splot.plot_decomposition(ax, decomposition)
+    splot.plot_init_pos_and_assignment(ax, decomposition)
+
+    figure.savefig(path)
+    return path
+
+
+class FigureRenderer():
+    """Renders decompositions to files in a worker process while the caller goes on.
+
+    Usage:
+        renderer = FigureRenderer()
+        renderer.submit("before.png", "Original Decomposition", decomposition)
+        ... change decomposition ...
+        renderer.submit("after.png", "Reoptimized Decomposition", decomposition)
+        written = renderer.close()
+    """
+    __slots__ = (
+        '_pool',
+        '_pending',
+    )
+
+    def __init__(self):
+        self._pool: Optional[Pool] = None
+        self._pending: List[Tuple[str, object]] = []
+
+    def submit(self, path: str, title: str, decomposition: Decomposition):
+        """Queues a figure. The decomposition is copied, later changes do not show.
+
+        The worker process is started with the first figure.
+        """
+        if self._pool is None:
+            self._pool = Pool(processes=1)
+        self._pending.append((path, self._pool.apply_async(render_decomposition,
+                                                           (path, title, decomposition.copy()))))
+
+    def close(self) -> List[str]:
+        """Waits for all queued figures and stops the worker process.
+
+        Returns:
+            paths of the files written, figures that failed are logged and left out.
+        """
+        written = []
+        for path, pending in self._pending:
+            try:
+                written.append(pending.get())
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning("Failed to render %s: %s", path, err)
+        self._pending = []
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+        return written